@@ -13,6 +13,7 @@ from .serializers import (
     ChangePasswordSerializer, PendingInfluencerSerializer, ApprovalActionSerializer
 )
 from .youtube_service import VideoStatsService
+from social_media.write_behind import write_behind
 
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
@@ -67,7 +68,7 @@ class RegisterView(generics.CreateAPIView):
                     platform='instagram',
                     platform_user_id=instagram_handle,
                     username=instagram_handle,
-                    encrypted_access_token='auto_created',
+                    encrypted_access_token=SocialMediaAccount.AUTO_CREATED_TOKEN,
                     status='active',
                     connected_at=timezone.now()
                 )
@@ -84,7 +85,7 @@ class RegisterView(generics.CreateAPIView):
                     platform='youtube',
                     platform_user_id=youtube_channel,
                     username=youtube_channel,
-                    encrypted_access_token='auto_created',
+                    encrypted_access_token=SocialMediaAccount.AUTO_CREATED_TOKEN,
                     status='active',
                     connected_at=timezone.now()
                 )
@@ -166,7 +167,7 @@ class InfluencerProfileView(generics.RetrieveUpdateAPIView):
                         defaults={
                             'platform_user_id': instagram_handle,
                             'username': instagram_handle,
-                            'encrypted_access_token': 'auto_created',
+                            'encrypted_access_token': SocialMediaAccount.AUTO_CREATED_TOKEN,
                             'status': 'active',
                             'connected_at': timezone.now()
                         }
@@ -204,7 +205,7 @@ class InfluencerProfileView(generics.RetrieveUpdateAPIView):
                         defaults={
                             'platform_user_id': youtube_channel,
                             'username': youtube_channel,
-                            'encrypted_access_token': 'auto_created',
+                            'encrypted_access_token': SocialMediaAccount.AUTO_CREATED_TOKEN,
                             'status': 'active',
                             'connected_at': timezone.now()
                         }
@@ -501,7 +502,7 @@ def approve_influencer(request, user_id):
         else:
             ip_address = request.META.get('REMOTE_ADDR')
         
-        ApprovalAuditLog.objects.create(
+        write_behind.create(ApprovalAuditLog(
             user=user,
             admin=request.user,
             action='approved',
@@ -509,7 +510,7 @@ def approve_influencer(request, user_id):
             new_status='approved',
             reason='',
             ip_address=ip_address
-        )
+        ), opt_in='WRITE_BEHIND_AUDIT_LOGS')
         logger.info(f"Audit log created for approval of {user.username}")
     except Exception as e:
         logger.error(f"Failed to create audit log: {e}")
@@ -561,7 +562,7 @@ def reject_influencer(request, user_id):
         else:
             ip_address = request.META.get('REMOTE_ADDR')
         
-        ApprovalAuditLog.objects.create(
+        write_behind.create(ApprovalAuditLog(
             user=user,
             admin=request.user,
             action='rejected',
@@ -569,7 +570,7 @@ def reject_influencer(request, user_id):
             new_status='rejected',
             reason=rejection_reason,
             ip_address=ip_address
-        )
+        ), opt_in='WRITE_BEHIND_AUDIT_LOGS')
         logger.info(f"Audit log created for rejection of {user.username}")
     except Exception as e:
         logger.error(f"Failed to create audit log: {e}")
@@ -628,7 +629,7 @@ def bulk_approve_influencers(request):
         
         # Create audit log
         try:
-            ApprovalAuditLog.objects.create(
+            write_behind.create(ApprovalAuditLog(
                 user=user,
                 admin=request.user,
                 action='approved',
@@ -636,7 +637,7 @@ def bulk_approve_influencers(request):
                 new_status='approved',
                 reason='Bulk approval',
                 ip_address=ip_address
-            )
+            ), opt_in='WRITE_BEHIND_AUDIT_LOGS')
         except Exception as e:
             logger.error(f"Failed to create audit log for {user.username}: {e}")
         
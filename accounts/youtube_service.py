@@ -1,8 +1,9 @@
-import requests
 import re
 import json
 from django.conf import settings
 
+from social_media.http import get_session
+
 class YouTubeService:
     """Service to fetch YouTube video statistics"""
     
@@ -64,7 +65,7 @@ class YouTubeService:
                 'key': cls.API_KEY
             }
             
-            response = requests.get(cls.BASE_URL, params=params, timeout=10)
+            response = get_session('youtube_api').get(cls.BASE_URL, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -97,7 +98,7 @@ class YouTubeService:
                 'Accept-Language': 'en-US,en;q=0.9',
             }
             
-            response = requests.get(url, headers=headers, timeout=15)
+            response = get_session('video_stats').get(url, headers=headers, timeout=15)
             
             if response.status_code == 200:
                 content = response.text
@@ -189,7 +190,7 @@ class InstagramService:
                 'Accept-Language': 'en-US,en;q=0.9',
             }
             
-            response = requests.get(oembed_url, headers=headers, timeout=15)
+            response = get_session('video_stats').get(oembed_url, headers=headers, timeout=15)
             
             if response.status_code == 200:
                 content = response.text
@@ -251,7 +252,7 @@ class InstagramService:
                 'Accept-Language': 'en-US,en;q=0.9',
             }
             
-            response = requests.get(url, headers=headers, timeout=15)
+            response = get_session('video_stats').get(url, headers=headers, timeout=15)
             
             if response.status_code == 200:
                 content = response.text
@@ -25,6 +25,10 @@ app.conf.beat_schedule = {
         'task': 'social_media.tasks.schedule_follower_updates',
         'schedule': crontab(minute='*/30'),  # Every 30 minutes
     },
+    'refresh-public-accounts': {
+        'task': 'social_media.tasks.refresh_public_accounts',
+        'schedule': crontab(minute=0, hour='*/6'),  # Every 6 hours
+    },
 }
 
 app.conf.timezone = 'UTC'
@@ -1,5 +1,7 @@
 import os
+import sys
 from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +45,7 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'social_media.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -80,6 +83,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': config('DB_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+        'OPTIONS': {
+            # Seconds a writer waits on SQLite's lock before "database is locked"
+            'timeout': config('DB_TIMEOUT', default=20, cast=int),
+        },
     }
 }
 
@@ -166,13 +173,157 @@ STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='')
 STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET', default='')
 
 # Celery Settings
-CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379')
-CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379')
+REDIS_URL = config('REDIS_URL', default='')
+CELERY_BROKER_URL = REDIS_URL or 'redis://localhost:6379'
+CELERY_RESULT_BACKEND = CELERY_BROKER_URL
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Cache Settings
+def redis_database_url(url, db):
+    """The same Redis server as url, but numbered database db"""
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, f'/{db}', parts.query, parts.fragment))
+
+
+# Sync leases, the freshness window, quota counters, debounce flags, circuit breakers,
+# metrics and job progress must be shared by gunicorn and Celery processes. With
+# REDIS_URL set they live in database 1 of that Redis, apart from the Celery broker;
+# CACHE_URL overrides the location. Without either, and in test runs, each process
+# uses local memory, which is fine for runserver and management commands.
+CACHE_URL = config('CACHE_URL', default=redis_database_url(REDIS_URL, 1) if REDIS_URL else '')
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+SOCIAL_API_RESPONSE_CACHE_MAX_ENTRIES = config('SOCIAL_API_RESPONSE_CACHE_MAX_ENTRIES', default=5000, cast=int)
+if CACHE_URL and not TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        },
+        # API response bodies kept for ETag revalidation; SOCIAL_API_RESPONSE_CACHE
+        # bounds how many are kept, so this may share the Redis database of the default cache
+        'api_responses': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('API_RESPONSE_CACHE_URL', default=CACHE_URL),
+            'KEY_PREFIX': 'api_responses',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'api_responses': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'api_responses',
+            # Room for every entry plus its index slot, so culling never comes first
+            'OPTIONS': {'MAX_ENTRIES': 2 * SOCIAL_API_RESPONSE_CACHE_MAX_ENTRIES + 1},
+        },
+    }
+
+# Server API key for public YouTube channel lookups (handle-only accounts)
+YOUTUBE_API_KEY = config('YOUTUBE_API_KEY', default='')
+
+# Social Media Sync Settings
+# Fan API calls out to per-platform thread pools during sweeps
+SOCIAL_SYNC_CONCURRENT = config('SOCIAL_SYNC_CONCURRENT', default=True, cast=bool)
+# Maximum in-flight API syncs per platform (keep within each platform's rate limit)
+SOCIAL_SYNC_PLATFORM_CONCURRENCY = {
+    'instagram': config('SOCIAL_SYNC_INSTAGRAM_CONCURRENCY', default=4, cast=int),
+    'youtube': config('SOCIAL_SYNC_YOUTUBE_CONCURRENCY', default=4, cast=int),
+    'default': 2,
+}
+# Drive OAuth account syncs from one asyncio event loop (httpx) instead of thread pools
+SOCIAL_SYNC_ASYNC = config('SOCIAL_SYNC_ASYNC', default=False, cast=bool)
+SOCIAL_SYNC_ASYNC_CONCURRENCY = {
+    'instagram': config('SOCIAL_SYNC_INSTAGRAM_ASYNC_CONCURRENCY', default=50, cast=int),
+    'youtube': config('SOCIAL_SYNC_YOUTUBE_ASYNC_CONCURRENCY', default=50, cast=int),
+    'default': 20,
+}
+# Pack Instagram OAuth accounts' profile and media calls into Graph API batch requests
+SOCIAL_SYNC_INSTAGRAM_BATCH = config('SOCIAL_SYNC_INSTAGRAM_BATCH', default=False, cast=bool)
+# Split the periodic full sync into Celery shards of this many accounts
+SOCIAL_SYNC_SHARDED = config('SOCIAL_SYNC_SHARDED', default=True, cast=bool)
+SOCIAL_SYNC_SHARD_SIZE = config('SOCIAL_SYNC_SHARD_SIZE', default=100, cast=int)
+# Buffer sync results and write them in batches of this many rows
+SOCIAL_SYNC_WRITE_BATCH_SIZE = config('SOCIAL_SYNC_WRITE_BATCH_SIZE', default=200, cast=int)
+# Stream accounts through sweeps and maintenance tasks in chunks of this size
+SOCIAL_SYNC_CHUNK_SIZE = config('SOCIAL_SYNC_CHUNK_SIZE', default=500, cast=int)
+# Only one process syncs an account at a time; the lease expires after this many seconds
+SOCIAL_SYNC_LEASE_SECONDS = config('SOCIAL_SYNC_LEASE_SECONDS', default=300, cast=int)
+# Sync requests within this window of the last successful sync reuse its result (0 disables)
+SOCIAL_SYNC_FRESHNESS_SECONDS = config('SOCIAL_SYNC_FRESHNESS_SECONDS', default=600, cast=int)
+# A running full sync with no checkpoint for this long is treated as dead and resumed
+# (unsharded sweeps only; sharded sweeps recover per shard through Celery retries)
+SOCIAL_SYNC_STALE_JOB_SECONDS = config('SOCIAL_SYNC_STALE_JOB_SECONDS', default=1800, cast=int)
+# Stop calling a platform API once this share of requests in a window fails,
+# then let a single probe request through after open_seconds
+SOCIAL_API_CIRCUIT_BREAKER = {
+    'error_rate': config('SOCIAL_API_CIRCUIT_ERROR_RATE', default=0.5, cast=float),
+    'min_requests': config('SOCIAL_API_CIRCUIT_MIN_REQUESTS', default=10, cast=int),
+    'window_seconds': config('SOCIAL_API_CIRCUIT_WINDOW_SECONDS', default=60, cast=int),
+    'open_seconds': config('SOCIAL_API_CIRCUIT_OPEN_SECONDS', default=120, cast=int),
+    'probe_timeout': 60,
+}
+# Shared outbound HTTP sessions: keep-alive pools per host, retries with
+# backoff on 429/5xx, and a consistent (connect, read) timeout
+SOCIAL_HTTP = {
+    'pool_connections': config('SOCIAL_HTTP_POOL_CONNECTIONS', default=10, cast=int),
+    'pool_maxsize': config('SOCIAL_HTTP_POOL_MAXSIZE', default=16, cast=int),
+    'retries': config('SOCIAL_HTTP_RETRIES', default=3, cast=int),
+    'backoff_factor': config('SOCIAL_HTTP_BACKOFF_FACTOR', default=0.5, cast=float),
+    'backoff_max': 10,
+    # Longer Retry-After values are returned to the caller instead of waited out
+    'max_retry_after': 30,
+    'connect_timeout': config('SOCIAL_HTTP_CONNECT_TIMEOUT', default=5, cast=float),
+    'read_timeout': config('SOCIAL_HTTP_READ_TIMEOUT', default=30, cast=float),
+    # Connection limits of the httpx client used by the async sync loop
+    'async_max_connections': config('SOCIAL_HTTP_ASYNC_MAX_CONNECTIONS', default=100, cast=int),
+    'async_max_keepalive': config('SOCIAL_HTTP_ASYNC_MAX_KEEPALIVE', default=20, cast=int),
+}
+# Write-behind queue for high-volume inserts: one writer thread per process commits
+# in batches. Follower history snapshots use it whenever it is enabled; webhook
+# events and approval audit logs only when opted in as well, since rows still
+# queued when a process dies are lost
+WRITE_BEHIND_ENABLED = config('WRITE_BEHIND_ENABLED', default=False, cast=bool)
+WRITE_BEHIND_WEBHOOK_EVENTS = config('WRITE_BEHIND_WEBHOOK_EVENTS', default=False, cast=bool)
+WRITE_BEHIND_AUDIT_LOGS = config('WRITE_BEHIND_AUDIT_LOGS', default=False, cast=bool)
+WRITE_BEHIND_BATCH_SIZE = config('WRITE_BEHIND_BATCH_SIZE', default=500, cast=int)
+WRITE_BEHIND_FLUSH_SECONDS = config('WRITE_BEHIND_FLUSH_SECONDS', default=1.0, cast=float)
+WRITE_BEHIND_MAX_QUEUE = config('WRITE_BEHIND_MAX_QUEUE', default=10000, cast=int)
+# Bearer token required to scrape /metrics (when empty only logged-in staff can view it)
+METRICS_AUTH_TOKEN = config('METRICS_AUTH_TOKEN', default='')
+# Extend the previous FollowerHistory row instead of inserting an identical snapshot
+SOCIAL_SYNC_CHANGE_DETECTION = config('SOCIAL_SYNC_CHANGE_DETECTION', default=True, cast=bool)
+# Instagram posts younger than this many days have their like/comment counts refreshed on each sync
+INSTAGRAM_MEDIA_RECENCY_DAYS = config('INSTAGRAM_MEDIA_RECENCY_DAYS', default=7, cast=int)
+# Profile edits within this many seconds of each other trigger a single sync
+SOCIAL_SYNC_DEBOUNCE_SECONDS = config('SOCIAL_SYNC_DEBOUNCE_SECONDS', default=30, cast=int)
+# Sync job progress is published to the cache at most once per interval; clients
+# poll sync/jobs/<job_id>/ at about the same rate
+SOCIAL_SYNC_PROGRESS_INTERVAL = config('SOCIAL_SYNC_PROGRESS_INTERVAL', default=1.0, cast=float)
+# Accounts the priority scheduler may dispatch per platform on each 15 minute tick
+SOCIAL_SYNC_TICK_BUDGET = {
+    'instagram': config('SOCIAL_SYNC_INSTAGRAM_TICK_BUDGET', default=200, cast=int),
+    'youtube': config('SOCIAL_SYNC_YOUTUBE_TICK_BUDGET', default=100, cast=int),
+    'default': 50,
+}
+# Daily quota units of metered APIs; scheduled syncs stop when the reserve fraction is all that is left
+SOCIAL_API_DAILY_QUOTA = {
+    'youtube': config('YOUTUBE_DAILY_QUOTA', default=10000, cast=int),
+}
+SOCIAL_API_QUOTA_RESERVE = config('SOCIAL_API_QUOTA_RESERVE', default=0.1, cast=float)
+# ETag revalidation of platform API GETs; bodies above max_body_bytes are not cached,
+# and at most max_entries responses are kept (the oldest stored is evicted first)
+SOCIAL_API_RESPONSE_CACHE = {
+    'enabled': config('SOCIAL_API_RESPONSE_CACHE_ENABLED', default=True, cast=bool),
+    'timeout': config('SOCIAL_API_RESPONSE_CACHE_TIMEOUT', default=86400, cast=int),
+    'max_body_bytes': config('SOCIAL_API_RESPONSE_CACHE_MAX_BODY_BYTES', default=262144, cast=int),
+    'max_entries': SOCIAL_API_RESPONSE_CACHE_MAX_ENTRIES,
+}
+
 # Email Settings
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = config('EMAIL_HOST', default='')
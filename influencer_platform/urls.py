@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
+from social_media.views import metrics
 
 def api_root(request):
     return JsonResponse({
@@ -23,6 +24,7 @@ def api_root(request):
 urlpatterns = [
     path('', api_root, name='api-root'),
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
     path('api/auth/', include('accounts.urls')),
     path('api/collaborations/', include('collaborations.urls')),
     path('api/payments/', include('payments.urls')),
@@ -80,10 +80,8 @@ def get_company_analytics(request):
             month_end = month_start + timedelta(days=30)
             
             # Get follower history for this month
-            month_history = FollowerHistory.objects.filter(
-                social_account__user_id__in=influencer_ids,
-                recorded_at__gte=month_start,
-                recorded_at__lt=month_end
+            month_history = FollowerHistory.objects.valid_during(month_start, month_end).filter(
+                social_account__user_id__in=influencer_ids
             )
             
             month_reach = month_history.aggregate(
@@ -254,7 +252,7 @@ def get_influencer_analytics(request):
                     'views': latest_history.views_count,
                     'likes': latest_history.likes_count,
                     'username': account.username,
-                    'last_updated': latest_history.recorded_at
+                    'last_updated': latest_history.last_confirmed_at
                 }
         
         avg_engagement = total_engagement / social_accounts.count() if social_accounts.count() > 0 else 0
@@ -264,9 +262,11 @@ def get_influencer_analytics(request):
         for i in range(30):
             date = timezone.now() - timedelta(days=29 - i)
             
-            day_history = FollowerHistory.objects.filter(
-                social_account__user=user,
-                recorded_at__date=date.date()
+            day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+            day_history = FollowerHistory.objects.valid_during(
+                day_start, day_start + timedelta(days=1)
+            ).filter(
+                social_account__user=user
             ).aggregate(
                 total=Sum('follower_count')
             )
@@ -3,24 +3,115 @@ Social Media API Clients
 Handles communication with official social media APIs
 """
 
+import json
+import time
 import requests
 from abc import ABC, abstractmethod
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlencode
 from datetime import datetime, timedelta
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 import logging
 
+from .circuit_breaker import get_circuit_breaker
+from .http import get_session
+from .metrics import api_request_seconds
+from .quota import quota_ledger
+from .response_cache import response_cache
+
 logger = logging.getLogger(__name__)
 
 
 class BaseSocialMediaClient(ABC):
     """Base class for social media API clients"""
     
+    # Platform name, also the key of the shared circuit breaker
+    PLATFORM = None
+    
+    # Cost of one get_engagement_metrics() call, used by the sync planner
+    SYNC_REQUEST_COUNT = 1
+    SYNC_QUOTA_UNITS = 0
+    
+    # Quota units per endpoint (last path segment) for APIs with a daily quota
+    QUOTA_COSTS = {}
+    
     def __init__(self, access_token: str, refresh_token: Optional[str] = None):
         self.access_token = access_token
         self.refresh_token = refresh_token
-        self.session = requests.Session()
+        # Shared per platform so connections survive across accounts and syncs
+        self.session = get_session(f"{self.PLATFORM}_api")
+        self.circuit_breaker = get_circuit_breaker(self.PLATFORM)
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the platform's circuit breaker.
+        
+        Network errors, 5xx and 429 responses count as platform failures;
+        other 4xx responses are account problems and count as successes.
+        GETs are revalidated against the response cache: a 304 is answered
+        with the cached body as a 200.
+        """
+        ticket = self._allow_request()
+        self._spend_quota(url)
+        cache_key, cached = self._cached_response(method, url, kwargs)
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self._record_request_error(ticket, started)
+            raise
+        
+        self._record_response(ticket, started, response.status_code)
+        
+        if response.status_code == 304 and cached:
+            response_cache.touch(cache_key)
+            response_cache.record(self.PLATFORM, 'hit')
+            return response_cache.to_response(cached, url)
+        if response_cache.save(cache_key, response.status_code, response.headers, response.content, response.encoding):
+            response_cache.record(self.PLATFORM, 'stored')
+        return response
+    
+    def _cached_response(self, method: str, url: str, kwargs: Dict) -> Tuple[Optional[str], Optional[Dict]]:
+        """Cache key and entry of a request; adds If-None-Match to kwargs when there is an entry"""
+        cache_key = response_cache.key_for(method, url, kwargs.get('params'))
+        cached = response_cache.get(cache_key)
+        if cached:
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **response_cache.conditional_headers(cached)}
+        elif cache_key:
+            response_cache.record(self.PLATFORM, 'miss')
+        return cache_key, cached
+    
+    def _allow_request(self) -> str:
+        """Ticket from the platform's circuit breaker; fails fast while it is open"""
+        ticket = self.circuit_breaker.allow_request()
+        if ticket is None:
+            raise CircuitOpenError(f"{self.PLATFORM} API circuit is open, skipping request")
+        return ticket
+    
+    def _quota_units(self, url: str) -> int:
+        """Quota cost of a request to url (0 for unmetered endpoints)"""
+        return self.QUOTA_COSTS.get(url.rstrip('/').rsplit('/', 1)[-1], 0)
+    
+    def _spend_quota(self, url: str):
+        """Charge the request to the platform's quota ledger; quota is spent even when it fails"""
+        units = self._quota_units(url)
+        if units:
+            quota_ledger.spend(self.PLATFORM, units)
+    
+    def _record_request_error(self, ticket: str, started: float):
+        api_request_seconds.observe(time.monotonic() - started, platform=self.PLATFORM, status='error')
+        self.circuit_breaker.record_failure(ticket)
+    
+    def _record_response(self, ticket: str, started: float, status_code: int):
+        api_request_seconds.observe(
+            time.monotonic() - started, platform=self.PLATFORM, status=f"{status_code // 100}xx"
+        )
+        if status_code >= 500 or status_code == 429:
+            self.circuit_breaker.record_failure(ticket)
+        else:
+            self.circuit_breaker.record_success(ticket)
     
     @abstractmethod
     def get_user_profile(self) -> Dict:
@@ -51,14 +142,19 @@ class BaseSocialMediaClient(ABC):
         
         logger.error(f"{self.__class__.__name__} API Error ({context}): {response.status_code} - {error_data}")
         
-        if response.status_code == 401:
-            raise UnauthorizedError("Access token is invalid or expired")
-        elif response.status_code == 403:
-            raise ForbiddenError("Insufficient permissions")
-        elif response.status_code == 429:
-            raise RateLimitError("Rate limit exceeded")
+        raise self.api_error(response.status_code, error_data)
+    
+    @staticmethod
+    def api_error(status_code: int, error_data) -> 'APIError':
+        """Exception for an error status and its decoded error body"""
+        if status_code == 401:
+            return UnauthorizedError("Access token is invalid or expired")
+        elif status_code == 403:
+            return ForbiddenError("Insufficient permissions")
+        elif status_code == 429:
+            return RateLimitError("Rate limit exceeded")
         else:
-            raise APIError(f"API request failed: {error_data}")
+            return APIError(f"API request failed: {error_data}")
 
 
 class InstagramGraphAPIClient(BaseSocialMediaClient):
@@ -66,17 +162,23 @@ class InstagramGraphAPIClient(BaseSocialMediaClient):
     
     BASE_URL = "https://graph.instagram.com"
     GRAPH_URL = "https://graph.facebook.com/v18.0"
+    REFRESH_URL = f"{GRAPH_URL}/oauth/access_token"
+    PLATFORM = 'instagram'
+    
+    # Profile + recent media
+    SYNC_REQUEST_COUNT = 2
+    
+    # Upper bound on media pages read by one incremental sync
+    MAX_MEDIA_PAGES = 4
+    
+    # Sub-requests per Graph API batch call; each account takes two (profile + media)
+    BATCH_SIZE = 50
+    BATCH_ACCOUNTS = BATCH_SIZE // 2
     
     def get_user_profile(self) -> Dict:
         """Get Instagram user profile"""
         try:
-            url = f"{self.GRAPH_URL}/me"
-            params = {
-                'fields': 'id,username,name,profile_picture_url,followers_count,follows_count,media_count',
-                'access_token': self.access_token
-            }
-            
-            response = self.session.get(url, params=params, timeout=30)
+            response = self._request('GET', f"{self.GRAPH_URL}/me", params=self._profile_params(), timeout=30)
             
             if response.status_code != 200:
                 self.handle_api_error(response, "get_user_profile")
@@ -92,77 +194,206 @@ class InstagramGraphAPIClient(BaseSocialMediaClient):
         profile = self.get_user_profile()
         return profile.get('followers_count', 0)
     
-    def get_engagement_metrics(self) -> Dict:
-        """Get Instagram engagement metrics"""
+    def get_engagement_metrics(self, media_since: Optional[datetime] = None) -> Dict:
+        """
+        Get Instagram engagement metrics
+        
+        Without media_since the latest page of media is read. With it, only
+        media posted since then is fetched (following the paging cursors);
+        the fetched items are returned under 'media' for the caller to store.
+        """
         try:
             # Get user profile first
             profile = self.get_user_profile()
-            user_id = profile.get('id')
-            
-            # Get recent media
-            media_url = f"{self.GRAPH_URL}/{user_id}/media"
-            media_params = {
-                'fields': 'id,like_count,comments_count,timestamp',
-                'limit': 25,
-                'access_token': self.access_token
-            }
+            url = f"{self.GRAPH_URL}/{profile.get('id')}/media"
+            posts = self._read_media_pages(url, self._media_params(media_since), media_since, self.MAX_MEDIA_PAGES)
             
-            media_response = self.session.get(media_url, params=media_params, timeout=30)
+            return self._build_engagement_metrics(profile, posts)
+        
+        except requests.RequestException as e:
+            logger.error(f"Instagram engagement metrics request failed: {e}")
+            raise APIError(f"Failed to fetch Instagram engagement metrics: {e}")
+    
+    def _read_media_pages(self, url: str, params: Optional[Dict], media_since: Optional[datetime],
+                          max_pages: int) -> List[Dict]:
+        """Posts of up to max_pages media pages, starting at url"""
+        posts = []
+        
+        for _ in range(max_pages):
+            media_response = self._request('GET', url, params=params, timeout=30)
             
             if media_response.status_code != 200:
                 self.handle_api_error(media_response, "get_engagement_metrics")
             
-            media_data = media_response.json()
-            posts = media_data.get('data', [])
-            
-            # Calculate engagement
-            total_likes = sum(post.get('like_count', 0) for post in posts)
-            total_comments = sum(post.get('comments_count', 0) for post in posts)
-            total_engagement = total_likes + total_comments
-            
-            followers = profile.get('followers_count', 1)
-            posts_count = len(posts)
+            data = media_response.json()
+            posts.extend(data.get('data', []))
+            url = self._next_media_page(data, media_since)
+            if not url:
+                break
+            # The next page URL carries every query parameter
+            params = None
+        
+        return posts
+    
+    @classmethod
+    def get_engagement_metrics_batch(cls, fetches: List[Tuple['InstagramGraphAPIClient', Optional[datetime]]]
+                                     ) -> List[Union[Dict, 'APIError']]:
+        """
+        Engagement metrics of several accounts from one Graph API batch call.
+        
+        fetches holds (client, media_since) pairs, at most BATCH_ACCOUNTS
+        of them. Every account's profile and first media page are two
+        sub-requests, the media one depending on the profile's id, each
+        carrying the account's own token. Returns, in order, the metrics
+        of each account or the APIError its sub-requests ended with;
+        further media pages of incremental reads are fetched one by one.
+        Raises APIError when the batch call itself fails.
+        """
+        if len(fetches) > cls.BATCH_ACCOUNTS:
+            raise ValueError(f"At most {cls.BATCH_ACCOUNTS} accounts fit in one batch")
+        
+        batch = []
+        for index, (client, media_since) in enumerate(fetches):
+            batch.append({
+                'method': 'GET',
+                'name': f"profile{index}",
+                # Referenced responses are left out of the result unless asked for
+                'omit_response_on_success': False,
+                'relative_url': f"me?{urlencode(client._profile_params())}",
+            })
+            batch.append({
+                'method': 'GET',
+                'relative_url': f"{{result=profile{index}:$.id}}/media?{urlencode(client._media_params(media_since))}",
+            })
+        
+        first = fetches[0][0]
+        try:
+            response = first._request('POST', f"{cls.GRAPH_URL}/", data={
+                'access_token': first.access_token,
+                'batch': json.dumps(batch),
+                'include_headers': 'false',
+            }, timeout=60)
+        except requests.RequestException as e:
+            logger.error(f"Instagram batch request failed: {e}")
+            raise APIError(f"Failed to fetch Instagram batch: {e}")
+        
+        if response.status_code != 200:
+            first.handle_api_error(response, "get_engagement_metrics_batch")
+        
+        replies = response.json()
+        # Pad a short reply list so missing sub-responses read as failed
+        replies = list(replies) + [None] * (len(batch) - len(replies))
+        return [
+            client._batch_engagement_metrics(replies[2 * index], replies[2 * index + 1], media_since)
+            for index, (client, media_since) in enumerate(fetches)
+        ]
+    
+    def _batch_engagement_metrics(self, profile_reply: Optional[Dict], media_reply: Optional[Dict],
+                                  media_since: Optional[datetime]) -> Union[Dict, 'APIError']:
+        """Metrics, or the error, from an account's two batch replies"""
+        try:
+            profile = self._batch_reply_body(profile_reply)
+            data = self._batch_reply_body(media_reply)
+            posts = list(data.get('data', []))
             
-            engagement_rate = (total_engagement / (followers * posts_count) * 100) if posts_count > 0 else 0
+            url = self._next_media_page(data, media_since)
+            if url:
+                posts.extend(self._read_media_pages(url, None, media_since, self.MAX_MEDIA_PAGES - 1))
             
-            return {
-                'follower_count': followers,
-                'following_count': profile.get('follows_count', 0),
-                'posts_count': profile.get('media_count', 0),
-                'likes_count': total_likes,
-                'comments_count': total_comments,
-                'engagement_rate': round(engagement_rate, 2)
-            }
+            return self._build_engagement_metrics(profile, posts)
         
+        except APIError as e:
+            return e
         except requests.RequestException as e:
             logger.error(f"Instagram engagement metrics request failed: {e}")
-            raise APIError(f"Failed to fetch Instagram engagement metrics: {e}")
+            return APIError(f"Failed to fetch Instagram engagement metrics: {e}")
+    
+    def _batch_reply_body(self, reply: Optional[Dict]) -> Dict:
+        """Decoded body of a batch sub-response; raises the matching APIError for errors"""
+        # A sub-request whose dependency failed, or that timed out, has no reply
+        if reply is None:
+            raise APIError("No response for Instagram batch sub-request")
+        
+        try:
+            body = json.loads(reply.get('body') or '{}')
+        except ValueError:
+            body = {"error": reply.get('body')}
+        
+        if reply.get('code') != 200:
+            logger.error(f"{self.__class__.__name__} API Error (batch): {reply.get('code')} - {body}")
+            raise self.api_error(reply.get('code'), body)
+        return body
+    
+    def _profile_params(self) -> Dict:
+        return {
+            'fields': 'id,username,name,profile_picture_url,followers_count,follows_count,media_count',
+            'access_token': self.access_token
+        }
+    
+    def _media_params(self, media_since: Optional[datetime] = None) -> Dict:
+        params = {
+            'fields': 'id,like_count,comments_count,timestamp',
+            'limit': 25,
+            'access_token': self.access_token
+        }
+        if media_since is not None:
+            params['since'] = int(media_since.timestamp())
+        return params
+    
+    def _next_media_page(self, data: Dict, media_since: Optional[datetime]) -> Optional[str]:
+        """URL of the next media page; a full (non-incremental) read stops after one page"""
+        if media_since is None:
+            return None
+        return data.get('paging', {}).get('next')
+    
+    def _build_engagement_metrics(self, profile: Dict, posts: List[Dict]) -> Dict:
+        """Engagement metrics from the profile and its recent media"""
+        total_likes = sum(post.get('like_count', 0) for post in posts)
+        total_comments = sum(post.get('comments_count', 0) for post in posts)
+        total_engagement = total_likes + total_comments
+        
+        followers = profile.get('followers_count', 1)
+        posts_count = len(posts)
+        
+        engagement_rate = (total_engagement / (followers * posts_count) * 100) if posts_count > 0 else 0
+        
+        return {
+            'follower_count': followers,
+            'following_count': profile.get('follows_count', 0),
+            'posts_count': profile.get('media_count', 0),
+            'likes_count': total_likes,
+            'comments_count': total_comments,
+            'engagement_rate': round(engagement_rate, 2),
+            'media': posts
+        }
     
     def refresh_access_token(self) -> Tuple[str, str, datetime]:
         """Refresh Instagram access token (long-lived tokens)"""
         try:
-            url = f"{self.GRAPH_URL}/oauth/access_token"
-            params = {
-                'grant_type': 'ig_refresh_token',
-                'access_token': self.access_token
-            }
-            
-            response = self.session.get(url, params=params, timeout=30)
+            response = self._request('GET', self.REFRESH_URL, params=self._refresh_params(), timeout=30)
             
             if response.status_code != 200:
                 self.handle_api_error(response, "refresh_access_token")
             
-            data = response.json()
-            new_token = data.get('access_token')
-            expires_in = data.get('expires_in', 5184000)  # Default 60 days
-            
-            expires_at = timezone.now() + timedelta(seconds=expires_in)
-            
-            return new_token, "", expires_at
+            return self._parse_refreshed_token(response.json())
         
         except requests.RequestException as e:
             logger.error(f"Instagram token refresh failed: {e}")
             raise APIError(f"Failed to refresh Instagram token: {e}")
+    
+    def _refresh_params(self) -> Dict:
+        return {
+            'grant_type': 'ig_refresh_token',
+            'access_token': self.access_token
+        }
+    
+    def _parse_refreshed_token(self, data: Dict) -> Tuple[str, str, datetime]:
+        new_token = data.get('access_token')
+        expires_in = data.get('expires_in', 5184000)  # Default 60 days
+        
+        expires_at = timezone.now() + timedelta(seconds=expires_in)
+        
+        return new_token, "", expires_at
 
 
 class YouTubeAPIClient(BaseSocialMediaClient):
@@ -170,44 +401,81 @@ class YouTubeAPIClient(BaseSocialMediaClient):
     
     BASE_URL = "https://www.googleapis.com/youtube/v3"
     OAUTH_URL = "https://oauth2.googleapis.com/token"
+    PLATFORM = 'youtube'
+    
+    # channels.list + playlistItems.list + videos.list, 1 unit each
+    SYNC_REQUEST_COUNT = 3
+    SYNC_QUOTA_UNITS = 3
+    
+    QUOTA_COSTS = {
+        'channels': 1,
+        'playlistItems': 1,
+        'videos': 1,
+        'search': 100,
+    }
+    
+    # Recent uploads looked at for engagement
+    RECENT_VIDEOS = 10
+    
+    # Uploads playlist ids never change, keep them for a month
+    UPLOADS_PLAYLIST_TIMEOUT = 30 * 24 * 3600
     
     def get_user_profile(self) -> Dict:
         """Get YouTube channel information"""
         try:
-            url = f"{self.BASE_URL}/channels"
-            params = {
-                'part': 'snippet,statistics',
-                'mine': 'true',
-                'access_token': self.access_token
-            }
-            
-            response = self.session.get(url, params=params, timeout=30)
+            response = self._request('GET', f"{self.BASE_URL}/channels", params=self._profile_params(), timeout=30)
             
             if response.status_code != 200:
                 self.handle_api_error(response, "get_user_profile")
             
-            data = response.json()
-            
-            if not data.get('items'):
-                raise APIError("No YouTube channel found for this account")
-            
-            channel = data['items'][0]
-            
-            return {
-                'id': channel['id'],
-                'username': channel['snippet'].get('customUrl', ''),
-                'title': channel['snippet']['title'],
-                'description': channel['snippet']['description'],
-                'thumbnail': channel['snippet']['thumbnails']['default']['url'],
-                'subscriber_count': int(channel['statistics'].get('subscriberCount', 0)),
-                'video_count': int(channel['statistics'].get('videoCount', 0)),
-                'view_count': int(channel['statistics'].get('viewCount', 0))
-            }
+            return self._parse_profile(response.json())
         
         except requests.RequestException as e:
             logger.error(f"YouTube API request failed: {e}")
             raise APIError(f"Failed to fetch YouTube profile: {e}")
     
+    def _profile_params(self) -> Dict:
+        return {
+            # contentDetails carries the uploads playlist at no extra quota cost
+            'part': 'snippet,statistics,contentDetails',
+            'mine': 'true',
+            'access_token': self.access_token
+        }
+    
+    def _parse_profile(self, data: Dict) -> Dict:
+        if not data.get('items'):
+            raise APIError("No YouTube channel found for this account")
+        
+        channel = data['items'][0]
+        
+        return {
+            'id': channel['id'],
+            'username': channel['snippet'].get('customUrl', ''),
+            'title': channel['snippet']['title'],
+            'description': channel['snippet']['description'],
+            'thumbnail': channel['snippet']['thumbnails']['default']['url'],
+            'subscriber_count': int(channel['statistics'].get('subscriberCount', 0)),
+            'video_count': int(channel['statistics'].get('videoCount', 0)),
+            'view_count': int(channel['statistics'].get('viewCount', 0)),
+            'uploads_playlist_id': self._uploads_playlist_id(channel)
+        }
+    
+    def _uploads_playlist_id(self, channel: Dict) -> str:
+        """
+        Uploads playlist of a channel, cached per channel id.
+        
+        The id comes with the profile response; the cache only covers
+        responses that leave contentDetails out.
+        """
+        cache_key = f"youtube_uploads_playlist:{channel['id']}"
+        playlist_id = channel.get('contentDetails', {}).get('relatedPlaylists', {}).get('uploads')
+        if playlist_id:
+            cache.set(cache_key, playlist_id, self.UPLOADS_PLAYLIST_TIMEOUT)
+            return playlist_id
+        
+        # Every channel's uploads playlist is its id with the UC prefix swapped for UU
+        return cache.get(cache_key) or (f"UU{channel['id'][2:]}" if channel['id'].startswith('UC') else '')
+    
     def get_follower_count(self) -> int:
         """Get YouTube subscriber count"""
         profile = self.get_user_profile()
@@ -217,125 +485,142 @@ class YouTubeAPIClient(BaseSocialMediaClient):
         """Get YouTube engagement metrics"""
         try:
             profile = self.get_user_profile()
-            channel_id = profile['id']
-            
-            # Get recent videos
-            videos_url = f"{self.BASE_URL}/search"
-            videos_params = {
-                'part': 'id',
-                'channelId': channel_id,
-                'order': 'date',
-                'maxResults': 10,
-                'type': 'video',
-                'access_token': self.access_token
-            }
-            
-            videos_response = self.session.get(videos_url, params=videos_params, timeout=30)
             
-            if videos_response.status_code != 200:
-                self.handle_api_error(videos_response, "get_engagement_metrics")
+            # Recent uploads from the uploads playlist (1 unit, search.list costs 100)
+            videos_response = self._request(
+                'GET', f"{self.BASE_URL}/playlistItems",
+                params=self._playlist_items_params(profile['uploads_playlist_id']), timeout=30
+            )
             
-            videos_data = videos_response.json()
-            video_ids = [item['id']['videoId'] for item in videos_data.get('items', [])]
+            video_ids = self._parse_playlist_items(videos_response)
             
             if not video_ids:
-                return {
-                    'follower_count': profile['subscriber_count'],
-                    'following_count': 0,
-                    'posts_count': profile['video_count'],
-                    'likes_count': 0,
-                    'comments_count': 0,
-                    'views_count': profile['view_count'],
-                    'engagement_rate': 0
-                }
+                return self._build_engagement_metrics(profile, video_ids, [])
             
             # Get video statistics
-            stats_url = f"{self.BASE_URL}/videos"
-            stats_params = {
-                'part': 'statistics',
-                'id': ','.join(video_ids),
-                'access_token': self.access_token
-            }
-            
-            stats_response = self.session.get(stats_url, params=stats_params, timeout=30)
+            stats_response = self._request(
+                'GET', f"{self.BASE_URL}/videos", params=self._video_stats_params(video_ids), timeout=30
+            )
             
             if stats_response.status_code != 200:
                 self.handle_api_error(stats_response, "get_video_statistics")
             
-            stats_data = stats_response.json()
-            
-            total_likes = 0
-            total_comments = 0
-            total_views = 0
-            
-            for video in stats_data.get('items', []):
-                stats = video.get('statistics', {})
-                total_likes += int(stats.get('likeCount', 0))
-                total_comments += int(stats.get('commentCount', 0))
-                total_views += int(stats.get('viewCount', 0))
-            
-            # Calculate engagement rate
-            subscribers = profile['subscriber_count']
-            video_count = len(video_ids)
-            total_engagement = total_likes + total_comments
-            
-            engagement_rate = (total_engagement / (subscribers * video_count) * 100) if video_count > 0 and subscribers > 0 else 0
-            
+            return self._build_engagement_metrics(profile, video_ids, stats_response.json().get('items', []))
+        
+        except requests.RequestException as e:
+            logger.error(f"YouTube engagement metrics request failed: {e}")
+            raise APIError(f"Failed to fetch YouTube engagement metrics: {e}")
+    
+    def _playlist_items_params(self, playlist_id: str) -> Dict:
+        return {
+            'part': 'contentDetails',
+            'playlistId': playlist_id,
+            'maxResults': self.RECENT_VIDEOS,
+            'access_token': self.access_token
+        }
+    
+    def _parse_playlist_items(self, response) -> List[str]:
+        """Video ids of a playlistItems.list response, newest first"""
+        # A channel without uploads has no uploads playlist yet
+        if response.status_code == 404:
+            return []
+        if response.status_code != 200:
+            self.handle_api_error(response, "get_engagement_metrics")
+        
+        return [item['contentDetails']['videoId'] for item in response.json().get('items', [])]
+    
+    def _video_stats_params(self, video_ids: List[str]) -> Dict:
+        return {
+            'part': 'statistics',
+            'id': ','.join(video_ids),
+            'access_token': self.access_token
+        }
+    
+    def _build_engagement_metrics(self, profile: Dict, video_ids: List[str], videos: List[Dict]) -> Dict:
+        """Engagement metrics from the channel and the statistics of its recent videos"""
+        if not video_ids:
             return {
-                'follower_count': subscribers,
+                'follower_count': profile['subscriber_count'],
                 'following_count': 0,
                 'posts_count': profile['video_count'],
-                'likes_count': total_likes,
-                'comments_count': total_comments,
-                'views_count': total_views,
-                'engagement_rate': round(engagement_rate, 2)
+                'likes_count': 0,
+                'comments_count': 0,
+                'views_count': profile['view_count'],
+                'engagement_rate': 0
             }
         
-        except requests.RequestException as e:
-            logger.error(f"YouTube engagement metrics request failed: {e}")
-            raise APIError(f"Failed to fetch YouTube engagement metrics: {e}")
+        total_likes = 0
+        total_comments = 0
+        total_views = 0
+        
+        for video in videos:
+            stats = video.get('statistics', {})
+            total_likes += int(stats.get('likeCount', 0))
+            total_comments += int(stats.get('commentCount', 0))
+            total_views += int(stats.get('viewCount', 0))
+        
+        # Calculate engagement rate
+        subscribers = profile['subscriber_count']
+        video_count = len(video_ids)
+        total_engagement = total_likes + total_comments
+        
+        engagement_rate = (total_engagement / (subscribers * video_count) * 100) if video_count > 0 and subscribers > 0 else 0
+        
+        return {
+            'follower_count': subscribers,
+            'following_count': 0,
+            'posts_count': profile['video_count'],
+            'likes_count': total_likes,
+            'comments_count': total_comments,
+            'views_count': total_views,
+            'engagement_rate': round(engagement_rate, 2)
+        }
     
     def refresh_access_token(self) -> Tuple[str, str, datetime]:
         """Refresh YouTube/Google OAuth token"""
         try:
-            if not self.refresh_token:
-                raise APIError("No refresh token available")
-            
-            data = {
-                'client_id': settings.YOUTUBE_CLIENT_ID,
-                'client_secret': settings.YOUTUBE_CLIENT_SECRET,
-                'refresh_token': self.refresh_token,
-                'grant_type': 'refresh_token'
-            }
-            
-            response = self.session.post(self.OAUTH_URL, data=data, timeout=30)
+            response = self._request('POST', self.OAUTH_URL, data=self._refresh_data(), timeout=30)
             
             if response.status_code != 200:
                 self.handle_api_error(response, "refresh_access_token")
             
-            token_data = response.json()
-            new_access_token = token_data['access_token']
-            expires_in = token_data.get('expires_in', 3600)
-            
-            expires_at = timezone.now() + timedelta(seconds=expires_in)
-            
-            # Refresh token stays the same for Google OAuth
-            return new_access_token, self.refresh_token, expires_at
+            return self._parse_refreshed_token(response.json())
         
         except requests.RequestException as e:
             logger.error(f"YouTube token refresh failed: {e}")
             raise APIError(f"Failed to refresh YouTube token: {e}")
+    
+    def _refresh_data(self) -> Dict:
+        if not self.refresh_token:
+            raise APIError("No refresh token available")
+        
+        return {
+            'client_id': settings.YOUTUBE_CLIENT_ID,
+            'client_secret': settings.YOUTUBE_CLIENT_SECRET,
+            'refresh_token': self.refresh_token,
+            'grant_type': 'refresh_token'
+        }
+    
+    def _parse_refreshed_token(self, token_data: Dict) -> Tuple[str, str, datetime]:
+        new_access_token = token_data['access_token']
+        expires_in = token_data.get('expires_in', 3600)
+        
+        expires_at = timezone.now() + timedelta(seconds=expires_in)
+        
+        # Refresh token stays the same for Google OAuth
+        return new_access_token, self.refresh_token, expires_at
 
 
 # API Client Factory
+API_CLIENTS = {
+    'instagram': InstagramGraphAPIClient,
+    'youtube': YouTubeAPIClient,
+}
+
+
 def get_api_client(platform: str, access_token: str, refresh_token: Optional[str] = None) -> BaseSocialMediaClient:
     """Factory function to get the appropriate API client"""
-    clients = {
-        'instagram': InstagramGraphAPIClient,
-        'youtube': YouTubeAPIClient,
-    }
-    
-    client_class = clients.get(platform.lower())
+    client_class = API_CLIENTS.get(platform.lower())
     if not client_class:
         raise ValueError(f"Unsupported platform: {platform}")
     
@@ -361,3 +646,8 @@ class ForbiddenError(APIError):
 class RateLimitError(APIError):
     """Raised when rate limit is exceeded"""
     pass
+
+
+class CircuitOpenError(APIError):
+    """Raised without calling the API while a platform's circuit breaker is open"""
+    pass
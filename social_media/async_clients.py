@@ -0,0 +1,235 @@
+"""
+Async Social Media API Clients
+httpx/asyncio variants of the platform clients for driving many accounts from one event loop
+"""
+
+import asyncio
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+
+from .api_clients import APIError, InstagramGraphAPIClient, YouTubeAPIClient
+from .http import RETRY_STATUSES, get_http_config, httpx
+from .quota import quota_ledger
+from .response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncClientMixin:
+    """
+    Async transport for a BaseSocialMediaClient subclass.
+
+    The public methods keep their names and return values but are coroutines.
+    Requests go through the same circuit breaker, quota ledger and response
+    cache as the sync clients, whose cache calls run in worker threads so
+    they never block the event loop; idempotent requests are retried on
+    429/5xx with the SOCIAL_HTTP backoff settings.
+    """
+
+    def __init__(self, access_token: str, refresh_token: Optional[str] = None, http=None):
+        super().__init__(access_token, refresh_token)
+        # Not used by the async methods; the per-loop httpx client is
+        self.session = None
+        self.http = http
+
+    async def _arequest(self, method: str, url: str, **kwargs):
+        ticket = await sync_to_async(self._allow_request, thread_sensitive=False)()
+        await self._aspend_quota(url)
+        cache_key, cached = await sync_to_async(self._cached_response, thread_sensitive=False)(method, url, kwargs)
+        config = get_http_config()
+        retries = config.get('retries', 3) if method in ('GET', 'HEAD') else 0
+
+        started = time.monotonic()
+        for attempt in range(retries + 1):
+            try:
+                response = await self.http.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                await sync_to_async(self._record_request_error, thread_sensitive=False)(ticket, started)
+                raise
+
+            delay = self._retry_delay(response, attempt, config)
+            if attempt == retries or delay is None:
+                break
+            await asyncio.sleep(delay)
+
+        await sync_to_async(self._record_response, thread_sensitive=False)(ticket, started, response.status_code)
+
+        if response.status_code == 304 and cached:
+            await sync_to_async(self._revalidated, thread_sensitive=False)(cache_key)
+            return httpx.Response(200, headers=cached['headers'], content=cached['body'], request=response.request)
+        await sync_to_async(self._store_response, thread_sensitive=False)(cache_key, response)
+        return response
+
+    def _revalidated(self, cache_key: str):
+        response_cache.touch(cache_key)
+        response_cache.record(self.PLATFORM, 'hit')
+
+    def _store_response(self, cache_key: Optional[str], response):
+        if response_cache.save(cache_key, response.status_code, response.headers, response.content, response.encoding):
+            response_cache.record(self.PLATFORM, 'stored')
+
+    async def _aspend_quota(self, url: str):
+        """_spend_quota without blocking the event loop on the ledger's database read"""
+        units = self._quota_units(url)
+        if units:
+            await quota_ledger.aspend(self.PLATFORM, units)
+
+    def _retry_delay(self, response, attempt: int, config: Dict) -> Optional[float]:
+        """Seconds to wait before retrying, or None when the response is final"""
+        if response.status_code not in RETRY_STATUSES:
+            return None
+
+        retry_after = response.headers.get('Retry-After')
+        if retry_after and retry_after.isdigit():
+            # Same rule as the sync sessions: hand long waits back to the rate limiter
+            if int(retry_after) > config.get('max_retry_after', 30):
+                return None
+            return float(retry_after)
+
+        return min(config.get('backoff_factor', 0.5) * (2 ** attempt), config.get('backoff_max', 10))
+
+
+class AsyncInstagramGraphAPIClient(AsyncClientMixin, InstagramGraphAPIClient):
+    """Instagram Graph API client on httpx"""
+
+    async def get_user_profile(self) -> Dict:
+        try:
+            response = await self._arequest('GET', f"{self.GRAPH_URL}/me", params=self._profile_params())
+
+            if response.status_code != 200:
+                self.handle_api_error(response, "get_user_profile")
+
+            return response.json()
+
+        except httpx.HTTPError as e:
+            logger.error(f"Instagram API request failed: {e}")
+            raise APIError(f"Failed to fetch Instagram profile: {e}")
+
+    async def get_follower_count(self) -> int:
+        profile = await self.get_user_profile()
+        return profile.get('followers_count', 0)
+
+    async def get_engagement_metrics(self, media_since: Optional[datetime] = None) -> Dict:
+        try:
+            profile = await self.get_user_profile()
+            url = f"{self.GRAPH_URL}/{profile.get('id')}/media"
+            params = self._media_params(media_since)
+            posts = []
+
+            for _ in range(self.MAX_MEDIA_PAGES):
+                media_response = await self._arequest('GET', url, params=params)
+
+                if media_response.status_code != 200:
+                    self.handle_api_error(media_response, "get_engagement_metrics")
+
+                data = media_response.json()
+                posts.extend(data.get('data', []))
+                url = self._next_media_page(data, media_since)
+                if not url:
+                    break
+                params = None
+
+            return self._build_engagement_metrics(profile, posts)
+
+        except httpx.HTTPError as e:
+            logger.error(f"Instagram engagement metrics request failed: {e}")
+            raise APIError(f"Failed to fetch Instagram engagement metrics: {e}")
+
+    async def refresh_access_token(self) -> Tuple[str, str, datetime]:
+        try:
+            response = await self._arequest('GET', self.REFRESH_URL, params=self._refresh_params())
+
+            if response.status_code != 200:
+                self.handle_api_error(response, "refresh_access_token")
+
+            return self._parse_refreshed_token(response.json())
+
+        except httpx.HTTPError as e:
+            logger.error(f"Instagram token refresh failed: {e}")
+            raise APIError(f"Failed to refresh Instagram token: {e}")
+
+
+class AsyncYouTubeAPIClient(AsyncClientMixin, YouTubeAPIClient):
+    """YouTube Data API v3 client on httpx"""
+
+    async def get_user_profile(self) -> Dict:
+        try:
+            response = await self._arequest('GET', f"{self.BASE_URL}/channels", params=self._profile_params())
+
+            if response.status_code != 200:
+                self.handle_api_error(response, "get_user_profile")
+
+            # Caches the uploads playlist id
+            return await sync_to_async(self._parse_profile, thread_sensitive=False)(response.json())
+
+        except httpx.HTTPError as e:
+            logger.error(f"YouTube API request failed: {e}")
+            raise APIError(f"Failed to fetch YouTube profile: {e}")
+
+    async def get_follower_count(self) -> int:
+        profile = await self.get_user_profile()
+        return profile.get('subscriber_count', 0)
+
+    async def get_engagement_metrics(self) -> Dict:
+        try:
+            profile = await self.get_user_profile()
+
+            videos_response = await self._arequest(
+                'GET', f"{self.BASE_URL}/playlistItems",
+                params=self._playlist_items_params(profile['uploads_playlist_id'])
+            )
+
+            video_ids = self._parse_playlist_items(videos_response)
+            if not video_ids:
+                return self._build_engagement_metrics(profile, video_ids, [])
+
+            stats_response = await self._arequest(
+                'GET', f"{self.BASE_URL}/videos", params=self._video_stats_params(video_ids)
+            )
+
+            if stats_response.status_code != 200:
+                self.handle_api_error(stats_response, "get_video_statistics")
+
+            return self._build_engagement_metrics(profile, video_ids, stats_response.json().get('items', []))
+
+        except httpx.HTTPError as e:
+            logger.error(f"YouTube engagement metrics request failed: {e}")
+            raise APIError(f"Failed to fetch YouTube engagement metrics: {e}")
+
+    async def refresh_access_token(self) -> Tuple[str, str, datetime]:
+        try:
+            response = await self._arequest('POST', self.OAUTH_URL, data=self._refresh_data())
+
+            if response.status_code != 200:
+                self.handle_api_error(response, "refresh_access_token")
+
+            return self._parse_refreshed_token(response.json())
+
+        except httpx.HTTPError as e:
+            logger.error(f"YouTube token refresh failed: {e}")
+            raise APIError(f"Failed to refresh YouTube token: {e}")
+
+
+# Async API Client Factory
+ASYNC_API_CLIENTS = {
+    'instagram': AsyncInstagramGraphAPIClient,
+    'youtube': AsyncYouTubeAPIClient,
+}
+
+
+def async_clients_available() -> bool:
+    """The async clients need the optional httpx dependency"""
+    return httpx is not None
+
+
+def get_async_api_client(platform: str, access_token: str, refresh_token: Optional[str] = None, http=None):
+    """Factory function to get the async client for a platform, bound to an httpx.AsyncClient"""
+    client_class = ASYNC_API_CLIENTS.get(platform.lower())
+    if not client_class:
+        raise ValueError(f"Unsupported platform: {platform}")
+
+    return client_class(access_token, refresh_token, http=http)
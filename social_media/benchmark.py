@@ -0,0 +1,208 @@
+"""
+Sync Benchmark
+Runs sync sweeps over synthetic accounts against the fake platform APIs and measures them
+"""
+
+import logging
+import math
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak RSS is then left out
+    resource = None
+
+from cryptography.fernet import Fernet
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, teardown_databases
+
+from .models import SocialMediaAccount
+from .sync_service import SocialMediaSyncService
+from accounts.models import InfluencerProfile
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# Settings for an isolated run: private caches, every sweep refetches, no quota cut-off
+BENCHMARK_SETTINGS = {
+    'CACHES': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sync_benchmark',
+        },
+        'api_responses': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sync_benchmark_api_responses',
+            'OPTIONS': {'MAX_ENTRIES': 1_000_000},
+        },
+    },
+    'SOCIAL_SYNC_FRESHNESS_SECONDS': 0,
+    'SOCIAL_API_DAILY_QUOTA': {},
+}
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class BenchmarkSyncService(SocialMediaSyncService):
+    """Sync service that also keeps the fetch latency of every account and its skips"""
+
+    def __init__(self):
+        super().__init__()
+        self.latencies: List[float] = []
+        self.skips: Dict[str, int] = {}
+        self._samples_lock = threading.Lock()
+
+    def reset_samples(self):
+        with self._samples_lock:
+            self.latencies = []
+            self.skips = {}
+
+    def _record_latency(self, source: str, seconds: float):
+        super()._record_latency(source, seconds)
+        # Called from thread pool workers and the async loop thread
+        with self._samples_lock:
+            self.latencies.append(seconds)
+
+    def _record_skip(self, account: SocialMediaAccount, skip_reason: str, results: Optional[Dict] = None):
+        super()._record_skip(account, skip_reason, results)
+        with self._samples_lock:
+            self.skips[skip_reason] = self.skips.get(skip_reason, 0) + 1
+
+
+class QueryCounter:
+    """execute_wrapper counting the statements, and the writes among them, on one connection"""
+
+    def __init__(self):
+        self.queries = 0
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        if sql.lstrip().split(None, 1)[0].upper() in WRITE_STATEMENTS:
+            self.writes += 1
+        return execute(sql, params, many, context)
+
+
+def peak_rss_kb() -> Optional[int]:
+    """High-water mark of the process's resident memory so far"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of unsorted samples, 0 without any"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+@contextmanager
+def isolated_environment(verbosity: int = 0, extra_settings: Optional[Dict] = None):
+    """
+    Test databases and private caches for the duration of the block.
+
+    Nothing a benchmark writes reaches the configured database or the
+    shared cache, and the test databases are destroyed afterwards. The
+    synthetic tokens are encrypted with a throwaway key.
+    """
+    overrides = {
+        **BENCHMARK_SETTINGS,
+        'SOCIAL_MEDIA_ENCRYPTION_KEY': Fernet.generate_key().decode(),
+        **(extra_settings or {}),
+    }
+    old_config = setup_databases(verbosity, interactive=False)
+    try:
+        with override_settings(**overrides):
+            yield
+    finally:
+        teardown_databases(old_config, verbosity)
+
+
+def create_bench_accounts(count: int, platforms: Iterable[str], batch_size: int = 500):
+    """
+    Create count synthetic influencers, each with one OAuth account.
+
+    Platforms are assigned round-robin and account n holds the token
+    'bench-<n>', which the fake platform server turns into stable data.
+    Rows are bulk created, so no signals fire.
+    """
+    platforms = list(platforms)
+    password = make_password(None)
+
+    users = User.objects.bulk_create([
+        User(username=f"bench_user_{n}", email=f"bench_user_{n}@example.com",
+             password=password, user_type='influencer', is_approved=True, approval_status='approved')
+        for n in range(count)
+    ], batch_size=batch_size)
+    InfluencerProfile.objects.bulk_create(
+        [InfluencerProfile(user=user) for user in users], batch_size=batch_size
+    )
+
+    accounts = []
+    for n, user in enumerate(users):
+        platform = platforms[n % len(platforms)]
+        account = SocialMediaAccount(
+            user=user, platform=platform,
+            platform_user_id=f"bench-{platform}-{n}", username=f"bench_{platform}_{n}"
+        )
+        account.set_access_token(f"bench-{n}")
+        accounts.append(account)
+    SocialMediaAccount.objects.bulk_create(accounts, batch_size=batch_size)
+
+    # Same shape as the production sweeps, which log accounts (and so their users) off the DB thread
+    return SocialMediaAccount.objects.filter(username__startswith='bench_', status='active').select_related('user')
+
+
+def run_sweep(service: BenchmarkSyncService, accounts, chunk_size: Optional[int] = None,
+              trace_memory: bool = False) -> Dict:
+    """
+    One full sync sweep over a queryset of accounts, through the chunked production path.
+
+    Latency percentiles cover successful fetches. DB counts are statements
+    issued by this thread, which is where the sync service does all its
+    writes (write-behind inserts, when enabled, are not counted). Peak RSS
+    is the process high-water mark; trace_memory adds the peak of Python
+    allocations during the sweep, at a considerable cost in speed.
+    """
+    service.reset_samples()
+    counter = QueryCounter()
+    if trace_memory:
+        tracemalloc.start()
+
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(counter):
+            totals = service.sync_accounts_in_chunks(accounts, chunk_size)
+        elapsed = time.perf_counter() - started
+    finally:
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+
+    return {
+        'processed': totals['processed'],
+        'successful': totals['successful'],
+        'failed': totals['failed'],
+        'skipped': dict(service.skips),
+        'seconds': round(elapsed, 3),
+        'accounts_per_second': round(totals['processed'] / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(service.latencies, 0.50) * 1000, 1),
+        'p99_ms': round(percentile(service.latencies, 0.99) * 1000, 1),
+        'db_queries': counter.queries,
+        'db_writes': counter.writes,
+        'peak_rss_kb': peak_rss_kb(),
+        'peak_traced_kb': round(peak / 1024) if peak is not None else None,
+    }
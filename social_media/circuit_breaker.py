@@ -0,0 +1,120 @@
+"""
+Circuit Breaker
+Stops calling a social platform API while it is failing, shared by every worker
+"""
+
+import time
+import logging
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Cache-backed circuit breaker for one platform API.
+
+    Closed: requests flow and outcomes are counted per time window. Once a
+    window has enough requests and its error rate crosses the threshold the
+    circuit opens and every request is rejected without touching the network.
+    After the cool-down it is half-open: a single probe request is let
+    through, closing the circuit on success and re-opening it on failure.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    # Tickets handed out by allow_request()
+    TICKET_NORMAL = 'normal'
+    TICKET_PROBE = 'probe'
+
+    def __init__(self, name: str):
+        self.name = name
+        self.cache_prefix = f"social_api_circuit:{name}"
+
+    @property
+    def config(self) -> Dict:
+        return getattr(settings, 'SOCIAL_API_CIRCUIT_BREAKER', {})
+
+    def allow_request(self) -> Optional[str]:
+        """Return a ticket for the request, or None when the circuit rejects it"""
+        opened_at = cache.get(f"{self.cache_prefix}:opened_at")
+        if opened_at is None:
+            return self.TICKET_NORMAL
+
+        if time.time() - opened_at < self.config.get('open_seconds', 120):
+            return None
+
+        # Half-open: only one probe in flight across all workers
+        if cache.add(f"{self.cache_prefix}:probe", True, self.config.get('probe_timeout', 60)):
+            logger.info(f"Circuit for {self.name} is half-open, sending probe request")
+            return self.TICKET_PROBE
+        return None
+
+    def record_success(self, ticket: str):
+        if ticket == self.TICKET_PROBE:
+            self._close()
+            return
+        self._count(failed=False)
+
+    def record_failure(self, ticket: str):
+        if ticket == self.TICKET_PROBE:
+            self._open()
+            return
+
+        requests, failures = self._count(failed=True)
+        min_requests = self.config.get('min_requests', 10)
+        error_rate = self.config.get('error_rate', 0.5)
+
+        if requests >= min_requests and failures / requests >= error_rate:
+            self._open()
+
+    def get_state(self) -> str:
+        opened_at = cache.get(f"{self.cache_prefix}:opened_at")
+        if opened_at is None:
+            return self.CLOSED
+        if time.time() - opened_at < self.config.get('open_seconds', 120):
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def is_open(self) -> bool:
+        """True while requests are being rejected outright (not yet due for a probe)"""
+        return self.get_state() == self.OPEN
+
+    def _count(self, failed: bool):
+        """Increment this window's counters and return (requests, failures)"""
+        window = self.config.get('window_seconds', 60)
+        bucket = int(time.time() // window)
+        requests_key = f"{self.cache_prefix}:requests:{bucket}"
+        failures_key = f"{self.cache_prefix}:failures:{bucket}"
+
+        cache.add(requests_key, 0, window * 2)
+        cache.add(failures_key, 0, window * 2)
+        requests = cache.incr(requests_key)
+        failures = cache.incr(failures_key) if failed else cache.get(failures_key, 0)
+        return requests, failures
+
+    def _open(self):
+        open_seconds = self.config.get('open_seconds', 120)
+        # Expire the state eventually so a lost probe cannot wedge the circuit
+        cache.set(f"{self.cache_prefix}:opened_at", time.time(), open_seconds * 10)
+        cache.delete(f"{self.cache_prefix}:probe")
+        logger.warning(f"Circuit for {self.name} opened for {open_seconds} seconds")
+
+    def _close(self):
+        cache.delete_many([f"{self.cache_prefix}:opened_at", f"{self.cache_prefix}:probe"])
+        logger.info(f"Circuit for {self.name} closed, platform is healthy again")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    """Shared breaker for a platform (state itself lives in the cache)"""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
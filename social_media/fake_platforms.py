@@ -0,0 +1,419 @@
+"""
+Fake Platform APIs
+Local stand-ins for the Graph API and YouTube Data API, plus a recorder for replaying real responses offline
+"""
+
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from django.utils import timezone
+
+from .api_clients import BaseSocialMediaClient, InstagramGraphAPIClient, YouTubeAPIClient
+
+logger = logging.getLogger(__name__)
+
+# Client URL attributes pointed at the fake server by use_fake_platforms()
+CLIENT_URL_ATTRIBUTES = (
+    (InstagramGraphAPIClient, ('BASE_URL', 'GRAPH_URL', 'REFRESH_URL')),
+    (YouTubeAPIClient, ('BASE_URL', 'OAUTH_URL')),
+)
+
+# Query parameters that do not select a response: credentials, and cursors that move every day
+UNKEYED_PARAMS = ('access_token', 'key', 'since')
+
+# Hosts whose absolute URLs inside replayed bodies (paging links) are rewritten to the fake server
+PLATFORM_HOSTS = ('graph.facebook.com', 'graph.instagram.com', 'www.googleapis.com', 'oauth2.googleapis.com')
+
+REDACTED = 'REDACTED'
+
+# Graph API batch reference to a named sub-request's result, e.g. {result=profile0:$.id}
+BATCH_REFERENCE = re.compile(r'\{result=(\w+):\$\.id\}')
+
+
+def request_key(method: str, url: str, params: Optional[Dict] = None) -> str:
+    """
+    Key of a recorded response: method, host, path and the selecting query parameters.
+
+    Live URLs (https://graph.facebook.com/v18.0/me) and the same URL on the
+    fake server (http://127.0.0.1:port/graph.facebook.com/v18.0/me) share a key.
+    """
+    parts = urlsplit(url)
+    path = parts.path
+    if parts.hostname in ('127.0.0.1', 'localhost'):
+        host, _, path = path.lstrip('/').partition('/')
+        path = f"/{path}"
+    else:
+        host = parts.netloc
+
+    query = dict(parse_qsl(parts.query))
+    query.update(params or {})
+    selecting = sorted((name, str(value)) for name, value in query.items() if name not in UNKEYED_PARAMS)
+    return f"{method} {host}{path}?{urlencode(selecting)}"
+
+
+def account_index(access_token: str) -> int:
+    """Synthetic account behind a token; bench tokens are 'bench-<n>'"""
+    prefix, _, number = access_token.rpartition('-')
+    if prefix == 'bench' and number.isdigit():
+        return int(number)
+    return zlib.crc32(access_token.encode())
+
+
+class _ThreadingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The stdlib backlog of 5 would turn concurrent client connects into refusals
+    request_queue_size = 512
+
+
+class FakePlatformServer:
+    """
+    Threaded HTTP server answering the API calls made by the platform clients.
+
+    Paths are the live host followed by the live path, so one server stands
+    in for every platform. Responses are synthesised per access token and
+    are stable between requests (with an ETag, so conditional requests get
+    304s), unless a cassette recorded with record_responses() is loaded, in
+    which case recorded bodies are replayed instead.
+
+    latency (plus up to jitter) seconds is added to every response;
+    error_rate and rate_limit_rate are the fractions of requests answered
+    with a 500 and with a 429 carrying Retry-After.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: int = 1, media_per_account: int = 25,
+                 cassette: Optional[Dict[str, List[Dict]]] = None, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.media_per_account = media_per_account
+        self.cassette = cassette
+        self.requests_served = 0
+        self.status_counts: Dict[int, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host: str = '127.0.0.1', port: int = 0) -> 'FakePlatformServer':
+        self._httpd = _ThreadingServer((host, port), self._handler_class())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-platforms', daemon=True)
+        self._thread.start()
+        logger.info(f"Fake platform APIs listening on {self.url}")
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = None
+
+    def __enter__(self) -> 'FakePlatformServer':
+        return self.start() if self._httpd is None else self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fake_url(self, url: str) -> str:
+        """The fake server's URL for a live platform URL"""
+        parts = urlsplit(url)
+        return f"{self.url}/{parts.netloc}{parts.path}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(FakePlatformHandler):
+            platform_server = server
+
+        return Handler
+
+    def _draw_fault(self) -> Optional[int]:
+        with self._lock:
+            self.requests_served += 1
+            roll = self._random.random()
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if roll < self.error_rate:
+            return 500
+        if roll < self.error_rate + self.rate_limit_rate:
+            return 429
+        return None
+
+    def _count_status(self, status: int):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def respond(self, method: str, path: str, params: Dict, form: Dict) -> Tuple[int, Dict]:
+        """Status and JSON body of one request"""
+        fault = self._draw_fault()
+        if fault == 500:
+            return 500, {'error': {'message': 'An unexpected error has occurred', 'code': 1}}
+        if fault == 429:
+            return 429, {'error': {'message': 'Application request limit reached', 'code': 4}}
+
+        if method == 'POST' and 'batch' in form:
+            return 200, self._graph_batch(path, form)
+
+        if self.cassette is not None:
+            return self._replay(method, path, params)
+
+        host, _, endpoint = path.lstrip('/').partition('/')
+        token = params.get('access_token') or form.get('refresh_token') or 'bench-0'
+        try:
+            if host in ('graph.facebook.com', 'graph.instagram.com'):
+                return self._instagram(endpoint, params, token)
+            if host == 'www.googleapis.com':
+                return self._youtube(endpoint, params, token)
+            if host == 'oauth2.googleapis.com' and method == 'POST':
+                return 200, {'access_token': token, 'expires_in': 3600, 'token_type': 'Bearer'}
+        except (KeyError, ValueError) as e:
+            return 400, {'error': {'message': f"Invalid parameter: {e}", 'code': 100}}
+        return 404, {'error': {'message': f"Unknown endpoint {path}", 'code': 803}}
+
+    def _graph_batch(self, path: str, form: Dict) -> List[Optional[Dict]]:
+        """
+        Replies of a Graph API batch call: one {code, body} per sub-request.
+
+        Sub-requests are answered in order like separate GETs (latency and
+        faults apply to the batch call as a whole); a sub-request whose
+        referenced request failed gets None, as on the real API.
+        """
+        named = {}
+        replies = []
+        for sub_request in json.loads(form['batch']):
+            references = BATCH_REFERENCE.findall(sub_request['relative_url'])
+            if any(named.get(name) is None for name in references):
+                replies.append(None)
+                continue
+
+            relative_url = BATCH_REFERENCE.sub(lambda match: str(named[match.group(1)].get('id', '')),
+                                               sub_request['relative_url'])
+            relative_path, _, query = relative_url.partition('?')
+            params = dict(parse_qsl(query))
+            if self.cassette is not None:
+                status, body = self._replay('GET', f"{path.rstrip('/')}/{relative_path}", params)
+            else:
+                token = params.get('access_token') or form.get('access_token', '')
+                status, body = self._instagram(relative_path, params, token)
+
+            if sub_request.get('name'):
+                named[sub_request['name']] = body if status == 200 else None
+            replies.append({'code': status, 'body': json.dumps(body)})
+        return replies
+
+    def _replay(self, method: str, path: str, params: Dict) -> Tuple[int, Dict]:
+        entries = self.cassette.get(request_key(method, f"{self.url}{path}", params))
+        if not entries:
+            return 404, {'error': {'message': f"No recorded response for {method} {path}", 'code': 803}}
+
+        # Several recorded accounts share a key (/me); a token always gets the same one
+        entry = entries[account_index(params.get('access_token', '')) % len(entries)]
+        body = entry['body']
+        for host in PLATFORM_HOSTS:
+            body = body.replace(f"https://{host}", f"{self.url}/{host}")
+        return entry['status'], json.loads(body)
+
+    def _day_start(self):
+        # Timestamps only move once a day, so repeated reads return identical bodies
+        return timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def _instagram(self, endpoint: str, params: Dict, token: str) -> Tuple[int, Dict]:
+        segments = endpoint.strip('/').split('/')
+        if segments[-1] == 'access_token':
+            return 200, {'access_token': token, 'token_type': 'bearer', 'expires_in': 5184000}
+
+        n = account_index(token)
+        user_id = f"17841{n:010d}"
+        if segments[-1] == 'me':
+            return 200, {
+                'id': user_id,
+                'username': f"bench_ig_{n}",
+                'name': f"Bench Instagram {n}",
+                'profile_picture_url': f"https://example.com/ig/{n}.jpg",
+                'followers_count': 1000 + n % 100000,
+                'follows_count': 100 + n % 500,
+                'media_count': self.media_per_account,
+            }
+        if segments[-1] == 'media' and segments[-2] == user_id:
+            limit = int(params.get('limit', 25))
+            since = int(params['since']) if 'since' in params else None
+            posts = []
+            for i in range(min(limit, self.media_per_account)):
+                posted_at = self._day_start() - timedelta(hours=12 * (i + 1))
+                if since is not None and posted_at.timestamp() < since:
+                    break
+                posts.append({
+                    'id': f"{user_id}_{i}",
+                    'like_count': 50 + (n + i) % 200,
+                    'comments_count': (n + i) % 20,
+                    'timestamp': posted_at.strftime('%Y-%m-%dT%H:%M:%S+0000'),
+                })
+            return 200, {'data': posts, 'paging': {}}
+        return 404, {'error': {'message': f"Unsupported get request: {endpoint}", 'code': 100}}
+
+    def _youtube(self, endpoint: str, params: Dict, token: str) -> Tuple[int, Dict]:
+        resource = endpoint.rstrip('/').rsplit('/', 1)[-1]
+
+        if resource == 'channels':
+            if params.get('mine') == 'true':
+                indexes = [account_index(token)]
+            else:
+                indexes = [int(channel_id[2:]) for channel_id in params['id'].split(',') if channel_id]
+            return 200, {'items': [self._youtube_channel(n) for n in indexes]}
+
+        if resource == 'playlistItems':
+            n = int(params['playlistId'][2:])
+            count = min(int(params.get('maxResults', 5)), self.media_per_account)
+            return 200, {'items': [{'contentDetails': {'videoId': f"v{n}x{i}"}} for i in range(count)]}
+
+        if resource == 'videos':
+            items = []
+            for video_id in params['id'].split(','):
+                n, _, i = video_id[1:].partition('x')
+                seed = int(n) + int(i)
+                items.append({'id': video_id, 'statistics': {
+                    'viewCount': str(5000 + seed % 10000),
+                    'likeCount': str(200 + seed % 300),
+                    'commentCount': str(seed % 40),
+                }})
+            return 200, {'items': items}
+
+        return 404, {'error': {'message': f"Unknown resource {resource}", 'code': 404}}
+
+    def _youtube_channel(self, n: int) -> Dict:
+        return {
+            'id': f"UC{n:022d}",
+            'snippet': {
+                'title': f"Bench Channel {n}",
+                'description': '',
+                'customUrl': f"@bench{n}",
+                'thumbnails': {'default': {'url': f"https://example.com/yt/{n}.jpg"}},
+            },
+            'statistics': {
+                'subscriberCount': str(2000 + n % 100000),
+                'videoCount': str(self.media_per_account),
+                'viewCount': str(100000 + n),
+            },
+            'contentDetails': {'relatedPlaylists': {'uploads': f"UU{n:022d}"}},
+        }
+
+
+class FakePlatformHandler(BaseHTTPRequestHandler):
+    """Request handler of a FakePlatformServer; keeps connections alive like the real APIs"""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; Nagle would hold the body for a delayed ACK
+    disable_nagle_algorithm = True
+    platform_server: FakePlatformServer = None
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _handle(self, method: str):
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query))
+        form = {}
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            form = dict(parse_qsl(self.rfile.read(length).decode()))
+
+        status, payload = self.platform_server.respond(method, parts.path, params, form)
+        body = json.dumps(payload).encode()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        self.platform_server._count_status(status)
+
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', str(self.platform_server.retry_after))
+        if status in (200, 304):
+            self.send_header('ETag', etag)
+        if body:
+            self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+@contextmanager
+def use_fake_platforms(server: FakePlatformServer, clients: Iterable = CLIENT_URL_ATTRIBUTES):
+    """Point the API clients (sync and async) at a fake server for the duration of the block"""
+    originals = []
+    for client_class, attributes in clients:
+        for attribute in attributes:
+            value = client_class.__dict__[attribute]
+            originals.append((client_class, attribute, value))
+            setattr(client_class, attribute, server.fake_url(value))
+    try:
+        yield server
+    finally:
+        for client_class, attribute, value in reversed(originals):
+            setattr(client_class, attribute, value)
+
+
+def load_cassette(path: str) -> Dict[str, List[Dict]]:
+    with open(path) as f:
+        return json.load(f)
+
+
+@contextmanager
+def record_responses(path: str):
+    """
+    Record the successful GET responses of every sync API client call to a cassette file.
+
+    Access tokens are scrubbed from keys and bodies; token endpoints are not
+    recorded. The cassette is written when the block exits and can be
+    replayed with FakePlatformServer(cassette=load_cassette(path)).
+    """
+    cassette: Dict[str, List[Dict]] = {}
+    lock = threading.Lock()
+    original_request = BaseSocialMediaClient._request
+
+    def recording_request(client, method, url, **kwargs):
+        response = original_request(client, method, url, **kwargs)
+        if method == 'GET' and response.status_code == 200 and 'access_token' not in urlsplit(url).path:
+            body = response.text
+            if client.access_token:
+                body = body.replace(client.access_token, REDACTED)
+            key = request_key(method, url, kwargs.get('params'))
+            with lock:
+                entries = cassette.setdefault(key, [])
+                if not any(entry['body'] == body for entry in entries):
+                    entries.append({'status': 200, 'body': body})
+        return response
+
+    BaseSocialMediaClient._request = recording_request
+    try:
+        yield cassette
+    finally:
+        BaseSocialMediaClient._request = original_request
+        with open(path, 'w') as f:
+            json.dump(cassette, f, indent=2, sort_keys=True)
+        logger.info(f"Recorded {sum(len(entries) for entries in cassette.values())} responses to {path}")
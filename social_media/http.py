@@ -0,0 +1,156 @@
+"""
+Shared HTTP Sessions
+Pooled, keep-alive requests sessions with retry/backoff for every outbound client
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:
+    # Optional: only needed by the async API clients
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Transient statuses worth retrying; 403 quota errors are not among them
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CappedRetry(Retry):
+    """
+    Retry policy that gives up rather than sleeping through a long Retry-After.
+
+    A 429 asking to come back in minutes is returned to the caller straight
+    away, so the sync service's own rate limiting can take over instead of a
+    worker thread blocking on the header.
+    """
+
+    def __init__(self, *args, max_retry_after: Optional[float] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.max_retry_after = self.max_retry_after
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and self.max_retry_after is not None:
+            retry_after = self.get_retry_after(response)
+            if retry_after is not None and retry_after > self.max_retry_after:
+                raise MaxRetryError(_pool, url, ResponseError(f"Retry-After {retry_after:.0f}s exceeds limit"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+class PooledSession(requests.Session):
+    """Session with a default (connect, read) timeout applied to every request"""
+
+    def __init__(self, connect_timeout: float, read_timeout: float):
+        super().__init__()
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+    def request(self, method, url, **kwargs):
+        timeout = kwargs.get('timeout')
+        if timeout is None:
+            kwargs['timeout'] = (self.connect_timeout, self.read_timeout)
+        elif not isinstance(timeout, tuple):
+            # A bare number from the caller is the read timeout; connects stay short
+            kwargs['timeout'] = (min(self.connect_timeout, timeout), timeout)
+        return super().request(method, url, **kwargs)
+
+
+_sessions: Dict[Tuple[int, str], PooledSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_http_config() -> Dict:
+    return getattr(settings, 'SOCIAL_HTTP', {})
+
+
+def build_session(headers: Optional[Dict] = None) -> PooledSession:
+    """Create a session with pooled, retrying adapters for http and https"""
+    config = get_http_config()
+
+    session = PooledSession(
+        connect_timeout=config.get('connect_timeout', 5),
+        read_timeout=config.get('read_timeout', 30),
+    )
+    retry = CappedRetry(
+        total=config.get('retries', 3),
+        # A read timeout is not retried: a hung API already cost read_timeout
+        # seconds, and retrying would multiply that for every request
+        read=False,
+        backoff_factor=config.get('backoff_factor', 0.5),
+        backoff_max=config.get('backoff_max', 10),
+        status_forcelist=RETRY_STATUSES,
+        # Only idempotent methods are retried after a response; POSTs only on connect errors
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        respect_retry_after_header=True,
+        max_retry_after=config.get('max_retry_after', 30),
+        # Hand the final response back so clients keep their own error handling
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config.get('pool_connections', 10),
+        pool_maxsize=config.get('pool_maxsize', 16),
+        max_retries=retry,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+def get_session(name: str = 'default', headers: Optional[Dict] = None) -> PooledSession:
+    """
+    Process-wide session for a named client.
+
+    Sessions, and with them their keep-alive connection pools, are shared by
+    every caller using the same name. Headers only apply when the session is
+    first created. Pools are never shared across a fork.
+    """
+    key = (os.getpid(), name)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = build_session(headers)
+                _sessions[key] = session
+    return session
+
+
+def build_async_client():
+    """
+    httpx.AsyncClient with the same pool and timeout settings as the sync sessions.
+
+    An AsyncClient is bound to the event loop it was created on, so callers
+    create one per loop (``async with build_async_client() as http``) and
+    pass it to the async API clients. Connect errors are retried by the
+    transport; status retries are handled by the clients themselves.
+    """
+    if httpx is None:
+        raise ImportError("httpx is required for the async API clients")
+
+    config = get_http_config()
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(config.get('read_timeout', 30), connect=config.get('connect_timeout', 5)),
+        limits=httpx.Limits(
+            max_connections=config.get('async_max_connections', 100),
+            max_keepalive_connections=config.get('async_max_keepalive', 20),
+        ),
+        transport=httpx.AsyncHTTPTransport(retries=config.get('retries', 3)),
+    )
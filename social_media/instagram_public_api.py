@@ -12,6 +12,9 @@ from typing import Dict, Optional
 from django.core.cache import cache
 from django.conf import settings
 
+from .http import get_session
+from .metrics import lookup_cache_total
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,8 +24,7 @@ class InstagramPublicAPI:
     """
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = get_session('instagram_public', headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
@@ -45,8 +47,10 @@ class InstagramPublicAPI:
         try:
             cached_data = cache.get(cache_key)
             if cached_data:
+                lookup_cache_total.inc(service='instagram_public_api', result='hit')
                 logger.info(f"Returning cached data for @{username}")
                 return cached_data
+            lookup_cache_total.inc(service='instagram_public_api', result='miss')
         except Exception:
             logger.warning("Cache unavailable, proceeding without cache")
         
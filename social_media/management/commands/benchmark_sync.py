@@ -0,0 +1,194 @@
+"""
+Django management command to benchmark the sync service offline
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from social_media.benchmark import BenchmarkSyncService, create_bench_accounts, isolated_environment, run_sweep
+from social_media.fake_platforms import FakePlatformServer, load_cassette, use_fake_platforms
+
+MODES = {
+    'sequential': {'SOCIAL_SYNC_CONCURRENT': False, 'SOCIAL_SYNC_ASYNC': False},
+    'threads': {'SOCIAL_SYNC_CONCURRENT': True, 'SOCIAL_SYNC_ASYNC': False},
+    'async': {'SOCIAL_SYNC_ASYNC': True},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark sync sweeps of synthetic accounts against local fake Instagram/YouTube APIs. '
+        'Runs on throwaway test databases and private caches; nothing touches live platforms.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--accounts',
+            type=int,
+            default=100,
+            help='Number of synthetic accounts (default: 100)'
+        )
+
+        parser.add_argument(
+            '--platform',
+            choices=['instagram', 'youtube', 'both'],
+            default='both',
+            help='Platform of the synthetic accounts; both alternates them (default: both)'
+        )
+
+        parser.add_argument(
+            '--sweeps',
+            type=int,
+            default=3,
+            help='Number of full sweeps; later sweeps see warm caches and stored history (default: 3)'
+        )
+
+        parser.add_argument(
+            '--mode',
+            choices=sorted(MODES),
+            default='threads',
+            help='Fetch engine: sequential, per-platform thread pools, or asyncio (default: threads)'
+        )
+
+        parser.add_argument(
+            '--instagram-batch',
+            action='store_true',
+            help='Fetch Instagram accounts through Graph API batch requests (SOCIAL_SYNC_INSTAGRAM_BATCH)'
+        )
+
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Accounts per sync chunk (default: SOCIAL_SYNC_CHUNK_SIZE)'
+        )
+
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=50,
+            help='Milliseconds added to every fake API response (default: 50)'
+        )
+
+        parser.add_argument(
+            '--jitter',
+            type=float,
+            default=0,
+            help='Up to this many extra random milliseconds per response (default: 0)'
+        )
+
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0.0,
+            help='Fraction of requests answered with a 500 (default: 0)'
+        )
+
+        parser.add_argument(
+            '--rate-limit-rate',
+            type=float,
+            default=0.0,
+            help='Fraction of requests answered with a 429 (default: 0)'
+        )
+
+        parser.add_argument(
+            '--retry-after',
+            type=int,
+            default=1,
+            help='Retry-After seconds sent with 429 responses (default: 1)'
+        )
+
+        parser.add_argument(
+            '--replay',
+            metavar='CASSETTE',
+            help='Serve responses recorded with sync_social_accounts --record instead of synthetic data'
+        )
+
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Seed for the fake servers\' latency and fault draws'
+        )
+
+        parser.add_argument(
+            '--trace-memory',
+            action='store_true',
+            help='Also measure peak Python allocations per sweep with tracemalloc (slows the sync down)'
+        )
+
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the results as JSON'
+        )
+
+    def handle(self, *args, **options):
+        if options['accounts'] < 1 or options['sweeps'] < 1:
+            raise CommandError('--accounts and --sweeps must be at least 1')
+        for option in ('error_rate', 'rate_limit_rate'):
+            if not 0 <= options[option] <= 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be between 0 and 1")
+
+        platforms = ['instagram', 'youtube'] if options['platform'] == 'both' else [options['platform']]
+        server = FakePlatformServer(
+            latency=options['latency'] / 1000,
+            jitter=options['jitter'] / 1000,
+            error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'],
+            retry_after=options['retry_after'],
+            cassette=load_cassette(options['replay']) if options['replay'] else None,
+            seed=options['seed'],
+        )
+
+        engine = {**MODES[options['mode']], 'SOCIAL_SYNC_INSTAGRAM_BATCH': options['instagram_batch']}
+
+        with server, use_fake_platforms(server), isolated_environment(extra_settings=engine):
+            accounts = create_bench_accounts(options['accounts'], platforms)
+            service = BenchmarkSyncService()
+            sweeps = []
+            for number in range(1, options['sweeps'] + 1):
+                result = run_sweep(
+                    service, accounts, options['chunk_size'], trace_memory=options['trace_memory']
+                )
+                sweeps.append(result)
+                if not options['json']:
+                    self.print_sweep(number, result)
+
+        summary = {
+            'accounts': options['accounts'],
+            'platforms': platforms,
+            'mode': options['mode'],
+            'instagram_batch': options['instagram_batch'],
+            'requests_served': server.requests_served,
+            'responses_by_status': {str(status): count for status, count in sorted(server.status_counts.items())},
+            'sweeps': sweeps,
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2))
+            return
+
+        statuses = ', '.join(f'{count} x {status}' for status, count in summary['responses_by_status'].items())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Benchmark completed: {options['accounts']} {'/'.join(platforms)} accounts, "
+                f"{options['mode']} mode{' with Instagram batches' if options['instagram_batch'] else ''}, "
+                f"{server.requests_served} API requests ({statuses})"
+            )
+        )
+
+    def print_sweep(self, number, result):
+        """Print the measurements of one sweep"""
+        skipped = ', '.join(f'{count} {reason}' for reason, count in sorted(result['skipped'].items())) or 'none'
+        memory = f"{result['peak_rss_kb']} KiB RSS" if result['peak_rss_kb'] is not None else 'RSS unavailable'
+        if result['peak_traced_kb'] is not None:
+            memory += f", {result['peak_traced_kb']} KiB traced allocations"
+        self.stdout.write(f'Sweep {number}:')
+        self.stdout.write(
+            f"  Accounts: {result['processed']} ({result['successful']} successful, "
+            f"{result['failed']} failed, skipped: {skipped})"
+        )
+        self.stdout.write(f"  Throughput: {result['accounts_per_second']} accounts/s over {result['seconds']}s")
+        self.stdout.write(f"  Per-account latency: p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms")
+        self.stdout.write(f"  DB: {result['db_writes']} writes of {result['db_queries']} queries")
+        self.stdout.write(f'  Peak memory: {memory}')
@@ -2,10 +2,14 @@
 Django management command to sync social media accounts
 """
 
+from contextlib import nullcontext
+
 from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from social_media.fake_platforms import record_responses
 from social_media.sync_service import sync_service
-from social_media.models import SocialMediaAccount
+from social_media.sync_planner import sync_planner
+from social_media.models import SocialMediaAccount, SyncJob
 
 User = get_user_model()
 
@@ -39,42 +43,62 @@ class Command(BaseCommand):
             help='Sync a specific account ID'
         )
         
+        parser.add_argument(
+            '--resume',
+            type=str,
+            metavar='JOB_ID',
+            help='Resume an interrupted full sync job from its last checkpoint'
+        )
+        
         parser.add_argument(
             '--dry-run',
             action='store_true',
-            help='Show what would be synced without actually syncing'
+            help='Estimate HTTP calls, quota, skips and duration without actually syncing'
+        )
+        
+        parser.add_argument(
+            '--record',
+            type=str,
+            metavar='CASSETTE',
+            help='Record the API responses of an in-process sync (--platform, --account) for benchmark_sync --replay'
         )
     
     def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        
         if options['dry_run']:
             self.stdout.write(
                 self.style.WARNING('DRY RUN MODE - No actual syncing will be performed')
             )
         
-        try:
-            if options['all']:
-                self.sync_all_accounts(options['dry_run'])
-            elif options['user']:
-                self.sync_user_accounts(options['user'], options['dry_run'])
-            elif options['platform']:
-                self.sync_platform_accounts(options['platform'], options['dry_run'])
-            elif options['account']:
-                self.sync_single_account(options['account'], options['dry_run'])
-            else:
-                raise CommandError('Please specify --all, --user, --platform, or --account')
+        recording = record_responses(options['record']) if options['record'] else nullcontext()
         
-        except Exception as e:
-            raise CommandError(f'Sync failed: {e}')
+        with recording:
+            try:
+                if options['resume']:
+                    self.resume_sync_job(options['resume'], options['dry_run'])
+                elif options['all']:
+                    self.sync_all_accounts(options['dry_run'])
+                elif options['user']:
+                    self.sync_user_accounts(options['user'], options['dry_run'])
+                elif options['platform']:
+                    self.sync_platform_accounts(options['platform'], options['dry_run'])
+                elif options['account']:
+                    self.sync_single_account(options['account'], options['dry_run'])
+                else:
+                    raise CommandError('Please specify --all, --resume, --user, --platform, or --account')
+            
+            except Exception as e:
+                raise CommandError(f'Sync failed: {e}')
     
     def sync_all_accounts(self, dry_run=False):
         """Sync all active accounts"""
-        accounts = SocialMediaAccount.objects.filter(status='active')
+        accounts = SocialMediaAccount.objects.with_oauth_token().filter(status='active')
         
         self.stdout.write(f'Found {accounts.count()} active accounts to sync')
         
         if dry_run:
-            for account in accounts:
-                self.stdout.write(f'  Would sync: {account}')
+            self.print_plan(accounts)
             return
         
         job_id = sync_service.sync_all_accounts()
@@ -82,6 +106,37 @@ class Command(BaseCommand):
             self.style.SUCCESS(f'Started sync job: {job_id}')
         )
     
+    def resume_sync_job(self, job_id, dry_run=False):
+        """Resume a full sync job after its last checkpoint"""
+        try:
+            sync_job = SyncJob.objects.get(job_id=job_id, job_type='full_sync')
+        except SyncJob.DoesNotExist:
+            raise CommandError(f'Full sync job {job_id} not found')
+        
+        if sync_job.status == 'completed':
+            raise CommandError(f'Sync job {job_id} has already completed')
+        
+        if sync_job.shard_count:
+            raise CommandError(f'Sync job {job_id} was sharded; only unsharded full syncs can be resumed')
+        
+        accounts = SocialMediaAccount.objects.with_oauth_token().filter(status='active')
+        if sync_job.checkpoint_account_id:
+            accounts = accounts.filter(pk__gt=sync_job.checkpoint_account_id)
+        
+        self.stdout.write(
+            f'Resuming job {job_id}: {sync_job.accounts_processed} accounts already processed, '
+            f'{accounts.count()} remaining'
+        )
+        
+        if dry_run:
+            self.print_plan(accounts)
+            return
+        
+        job_id = sync_service.sync_all_accounts(resume_job_id=job_id)
+        self.stdout.write(
+            self.style.SUCCESS(f'Resumed sync job: {job_id}')
+        )
+    
     def sync_user_accounts(self, user_id, dry_run=False):
         """Sync accounts for a specific user"""
         try:
@@ -91,8 +146,7 @@ class Command(BaseCommand):
             self.stdout.write(f'Found {accounts.count()} active accounts for user {user.username}')
             
             if dry_run:
-                for account in accounts:
-                    self.stdout.write(f'  Would sync: {account}')
+                self.print_plan(accounts)
                 return
             
             job_id = sync_service.sync_user_accounts(user_id)
@@ -113,8 +167,7 @@ class Command(BaseCommand):
         self.stdout.write(f'Found {accounts.count()} active {platform} accounts to sync')
         
         if dry_run:
-            for account in accounts:
-                self.stdout.write(f'  Would sync: {account}')
+            self.print_plan(accounts)
             return
         
         successful = 0
@@ -145,7 +198,7 @@ class Command(BaseCommand):
             self.stdout.write(f'Account to sync: {account}')
             
             if dry_run:
-                self.stdout.write('  Would sync this account')
+                self.print_plan([account])
                 return
             
             success = sync_service.sync_single_account_by_id(account_id)
@@ -160,4 +213,45 @@ class Command(BaseCommand):
                 )
         
         except SocialMediaAccount.DoesNotExist:
-            raise CommandError(f'Account with ID {account_id} not found')
\ No newline at end of file
+            raise CommandError(f'Account with ID {account_id} not found')
+    
+    def print_plan(self, accounts):
+        """Print the estimated cost of syncing the given accounts"""
+        plan = sync_planner.plan(accounts)
+        
+        for source, entry in sorted(plan['sources'].items()):
+            skipped = entry['skipped']
+            self.stdout.write(f'{source}:')
+            self.stdout.write(f"  Accounts: {entry['accounts']} ({entry['to_sync']} to sync)")
+            self.stdout.write(f"  HTTP calls: {entry['http_calls']}")
+            if entry['batched'] > 1:
+                self.stdout.write(f"  Batched: {entry['batched']} accounts in {entry['batch_calls']} batch requests")
+            if entry['quota_units']:
+                self.stdout.write(f"  Quota units: {entry['quota_units']}")
+            self.stdout.write(
+                f"  Skipped: {len(skipped['fresh'])} fresh, {len(skipped['leased'])} leased, "
+                f"{len(skipped['rate_limited'])} rate limited, {len(skipped['circuit_open'])} circuit open, "
+                f"{len(skipped['quota_exhausted'])} over quota"
+            )
+            if entry['unsupported']:
+                self.stdout.write(f"  Unsupported platform: {entry['unsupported']}")
+            latency_note = (
+                f"{entry['latency_samples']} samples" if entry['latency_samples'] else 'no samples, default'
+            )
+            self.stdout.write(
+                f"  Estimated time: {entry['estimated_seconds']}s with {entry['workers']} workers "
+                f"at {entry['avg_seconds_per_account']}s/account ({latency_note})"
+            )
+            
+            if self.verbosity > 1:
+                for reason, account_ids in skipped.items():
+                    for account_id in account_ids:
+                        self.stdout.write(f'    Would skip account {account_id}: {reason}')
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Plan: {plan['total_accounts']} accounts, {plan['total_http_calls']} HTTP calls, "
+                f"{plan['total_quota_units']} YouTube quota units, "
+                f"~{plan['estimated_seconds']}s ({'concurrent' if plan['concurrent'] else 'sequential'})"
+            )
+        )
@@ -0,0 +1,284 @@
+"""
+Metrics Registry
+Prometheus-style counters and histograms shared by gunicorn and Celery processes
+"""
+
+import asyncio
+import atexit
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _in_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _incr(key: str, amount: int = 1) -> int:
+    if cache.add(key, amount, None):
+        return amount
+    return cache.incr(key, amount)
+
+
+class Metric:
+    """
+    A named metric whose series are stored as integer counters in the cache.
+
+    Each process only increments cache keys, so with a shared cache (Redis)
+    every gunicorn and Celery worker contributes to the same series and any
+    process can render the totals. Samples are buffered per process and
+    written by the registry's flush, so recording one costs no cache round
+    trip. Metric updates never raise: if the cache is unavailable the
+    samples are dropped.
+
+    The label combinations of a metric are indexed in numbered slots: a
+    process claims a slot with an atomic incr, so concurrent registrations
+    from different processes never overwrite each other. Each process
+    re-checks its registrations every REGISTRATION_SECONDS, so series come
+    back after a cache flush.
+    """
+
+    type_name = None
+
+    REGISTRATION_SECONDS = 300
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str, labels: Tuple[str, ...]):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.cache_prefix = f"{registry.cache_prefix}:{name}"
+        # Series this process has registered (with when), so samples skip the registration round trip
+        self._registered: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _series(self, label_values: Dict) -> Tuple[str, ...]:
+        return tuple(str(label_values.get(label, '')) for label in self.labels)
+
+    def _series_key(self, series: Tuple[str, ...]) -> str:
+        return "|".join(series)
+
+    def _register(self, series: Tuple[str, ...]):
+        """Add a label combination to the metric's index the first time it is seen"""
+        now = time.monotonic()
+        if now - self._registered.get(series, float('-inf')) < self.REGISTRATION_SECONDS:
+            return
+        with self._lock:
+            if now - self._registered.get(series, float('-inf')) < self.REGISTRATION_SECONDS:
+                return
+            # Only the process that creates the marker indexes the series
+            if cache.add(f"{self.cache_prefix}:registered:{self._series_key(series)}", True, None):
+                slot = _incr(f"{self.cache_prefix}:index:slots")
+                cache.set(f"{self.cache_prefix}:index:{slot}", list(series), None)
+            self._registered[series] = now
+
+    def forget_registrations(self):
+        with self._lock:
+            self._registered.clear()
+
+    def get_series(self) -> List[Tuple[str, ...]]:
+        slots = cache.get(f"{self.cache_prefix}:index:slots") or 0
+        entries = cache.get_many([f"{self.cache_prefix}:index:{slot}" for slot in range(1, slots + 1)])
+        return list(dict.fromkeys(tuple(series) for series in entries.values()))
+
+    def _format_labels(self, series: Tuple[str, ...], extra: Optional[Dict] = None) -> str:
+        pairs = list(zip(self.labels, series)) + list((extra or {}).items())
+        if not pairs:
+            return ''
+        return "{" + ",".join(f'{label}="{_escape_label_value(value)}"' for label, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonic counter"""
+
+    type_name = 'counter'
+
+    def inc(self, amount: int = 1, **label_values):
+        try:
+            series = self._series(label_values)
+            self.registry.record(self, series, {f"{self.cache_prefix}:{self._series_key(series)}": amount})
+        except Exception as e:
+            logger.debug(f"Dropped sample for {self.name}: {e}")
+
+    def _render_samples(self) -> List[str]:
+        series_list = self.get_series()
+        values = cache.get_many([f"{self.cache_prefix}:{self._series_key(s)}" for s in series_list])
+        return [
+            f"{self.name}{self._format_labels(series)} "
+            f"{values.get(f'{self.cache_prefix}:{self._series_key(series)}', 0)}"
+            for series in series_list
+        ]
+
+
+class Histogram(Metric):
+    """
+    Histogram with fixed upper bounds.
+
+    Only the bucket a sample falls into, the count and the sum are
+    incremented; cumulative bucket counts are computed when rendering.
+    """
+
+    type_name = 'histogram'
+
+    DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    # Sums are stored as integer microseconds so they can use cache.incr
+    SUM_SCALE = 1_000_000
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **label_values):
+        try:
+            series = self._series(label_values)
+            base = f"{self.cache_prefix}:{self._series_key(series)}"
+
+            bucket = next((str(bound) for bound in self.buckets if value <= bound), '+Inf')
+            self.registry.record(self, series, {
+                f"{base}:bucket:{bucket}": 1,
+                f"{base}:count": 1,
+                f"{base}:sum": int(value * self.SUM_SCALE),
+            })
+        except Exception as e:
+            logger.debug(f"Dropped sample for {self.name}: {e}")
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+
+        for series in self.get_series():
+            base = f"{self.cache_prefix}:{self._series_key(series)}"
+            keys = [f"{base}:bucket:{bound}" for bound in bounds] + [f"{base}:count", f"{base}:sum"]
+            values = cache.get_many(keys)
+
+            cumulative = 0
+            for bound in bounds:
+                cumulative += values.get(f"{base}:bucket:{bound}", 0)
+                lines.append(f"{self.name}_bucket{self._format_labels(series, {'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(series)} {values.get(f'{base}:sum', 0) / self.SUM_SCALE}")
+            lines.append(f"{self.name}_count{self._format_labels(series)} {values.get(f'{base}:count', 0)}")
+
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds metric definitions and renders them in the Prometheus text format.
+
+    Samples are summed in a per-process buffer that is written to the cache
+    at most every FLUSH_SECONDS (by whichever sample finds it due, unless it
+    is recorded on an event loop), before rendering and at exit, so a
+    request pays for the cache round trips only once per interval rather
+    than on every observation.
+    """
+
+    FLUSH_SECONDS = 5
+
+    def __init__(self, cache_prefix: str = "social_metrics"):
+        self.cache_prefix = cache_prefix
+        self.metrics: Dict[str, Metric] = {}
+        self._pending: Dict[str, int] = {}
+        self._pending_series: Set[Tuple[Metric, Tuple[str, ...]]] = set()
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(self, name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (), **kwargs) -> Histogram:
+        return self._add(Histogram(self, name, documentation, labels, **kwargs))
+
+    def _add(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def forget_registrations(self):
+        """Make every metric re-register its series, e.g. right after the cache was cleared"""
+        for metric in self.metrics.values():
+            metric.forget_registrations()
+
+    def record(self, metric: Metric, series: Tuple[str, ...], increments: Dict[str, int]):
+        """Add a sample's counter increments to the buffer, flushing it when due"""
+        with self._lock:
+            self._pending_series.add((metric, series))
+            for key, amount in increments.items():
+                self._pending[key] = self._pending.get(key, 0) + amount
+            due = time.monotonic() - self._flushed_at >= self.FLUSH_SECONDS
+        if due and not _in_event_loop():
+            self.flush()
+
+    def flush(self):
+        """Write the buffered samples of this process to the cache"""
+        with self._lock:
+            pending, pending_series = self._pending, self._pending_series
+            self._pending, self._pending_series = {}, set()
+            self._flushed_at = time.monotonic()
+
+        for metric, series in pending_series:
+            try:
+                metric._register(series)
+            except Exception as e:
+                logger.debug(f"Could not register a series of {metric.name}: {e}")
+        for key, amount in pending.items():
+            try:
+                _incr(key, amount)
+            except Exception as e:
+                logger.debug(f"Dropped samples for {key}: {e}")
+
+    def render(self) -> str:
+        self.flush()
+        lines = []
+        for metric in self.metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                logger.error(f"Could not render metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+# Global registry and the metrics recorded by the sync layer
+registry = MetricsRegistry()
+atexit.register(registry.flush)
+
+api_request_seconds = registry.histogram(
+    'social_api_request_seconds',
+    'Latency of social platform API requests',
+    labels=('platform', 'status'),
+)
+sync_outcomes_total = registry.counter(
+    'social_sync_outcomes_total',
+    'Account sync outcomes, including skips',
+    labels=('platform', 'outcome'),
+)
+lookup_cache_total = registry.counter(
+    'social_lookup_cache_total',
+    'Cache lookups made by the public lookup services',
+    labels=('service', 'result'),
+)
+http_request_seconds = registry.histogram(
+    'http_request_duration_seconds',
+    'Latency of HTTP requests per view',
+    labels=('view', 'method', 'status'),
+)
@@ -0,0 +1,31 @@
+"""
+Request metrics middleware
+Records per-view request latency in the shared metrics registry
+"""
+
+import time
+
+from .metrics import http_request_seconds
+
+
+class RequestMetricsMiddleware:
+    """Observe how long each request takes, labelled by resolved view"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.monotonic()
+        response = self.get_response(request)
+
+        # Label by view name rather than path to keep the number of series bounded
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match.route) if match else 'unmatched'
+
+        http_request_seconds.observe(
+            time.monotonic() - started,
+            view=view,
+            method=request.method,
+            status=f"{response.status_code // 100}xx",
+        )
+        return response
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-16 20:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_media', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncjob',
+            name='checkpoint_account_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='syncjob',
+            name='checkpointed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-16 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_media', '0002_syncjob_checkpoint_account_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='syncjob',
+            name='job_type',
+            field=models.CharField(choices=[('full_sync', 'Full Sync'), ('user_sync', 'User Sync'), ('platform_sync', 'Platform Sync'), ('single_account', 'Single Account'), ('scheduled_sync', 'Scheduled Sync')], max_length=20),
+        ),
+    ]
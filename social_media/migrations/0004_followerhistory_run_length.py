@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-16 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_media', '0003_syncjob_scheduled_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='followerhistory',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='followerhistory',
+            name='sample_count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
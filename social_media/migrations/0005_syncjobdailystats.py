@@ -0,0 +1,64 @@
+# Generated by Django 5.1.5 on 2026-10-16 20:58
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """Roll up the finished jobs that already exist"""
+    SyncJob = apps.get_model('social_media', 'SyncJob')
+    SyncJobDailyStats = apps.get_model('social_media', 'SyncJobDailyStats')
+
+    rows = SyncJob.objects.filter(
+        status__in=['completed', 'failed', 'cancelled']
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values('day', 'job_type', 'status').annotate(
+        job_count=Count('id'),
+        processed=Sum('accounts_processed'),
+        successful=Sum('accounts_successful'),
+        failed=Sum('accounts_failed')
+    ).order_by()
+
+    SyncJobDailyStats.objects.bulk_create([
+        SyncJobDailyStats(
+            date=row['day'],
+            job_type=row['job_type'],
+            status=row['status'],
+            job_count=row['job_count'],
+            accounts_processed=row['processed'] or 0,
+            accounts_successful=row['successful'] or 0,
+            accounts_failed=row['failed'] or 0,
+        )
+        for row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_media', '0004_followerhistory_run_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncJobDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('job_type', models.CharField(choices=[('full_sync', 'Full Sync'), ('user_sync', 'User Sync'), ('platform_sync', 'Platform Sync'), ('single_account', 'Single Account'), ('scheduled_sync', 'Scheduled Sync')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('job_count', models.IntegerField(default=0)),
+                ('accounts_processed', models.IntegerField(default=0)),
+                ('accounts_successful', models.IntegerField(default=0)),
+                ('accounts_failed', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('date', 'job_type', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-16 21:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_media', '0005_syncjobdailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIQuotaUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('api', models.CharField(max_length=30)),
+                ('units_used', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('date', 'api')},
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.5 on 2026-10-16 21:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_media', '0006_apiquotausage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InstagramMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('media_id', models.CharField(max_length=50)),
+                ('posted_at', models.DateTimeField()),
+                ('like_count', models.PositiveIntegerField(default=0)),
+                ('comments_count', models.PositiveIntegerField(default=0)),
+                ('first_seen_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('social_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='instagram_media', to='social_media.socialmediaaccount')),
+            ],
+            options={
+                'ordering': ['-posted_at'],
+                'indexes': [models.Index(fields=['social_account', '-posted_at'], name='social_medi_social__eaf29b_idx')],
+                'unique_together': {('social_account', 'media_id')},
+            },
+        ),
+    ]
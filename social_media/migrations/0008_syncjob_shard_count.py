@@ -0,0 +1,18 @@
+# Generated by Django 5.1.5 on 2026-10-16 22:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('social_media', '0007_instagrammedia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='syncjob',
+            name='shard_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
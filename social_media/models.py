@@ -1,15 +1,39 @@
-from django.db import models
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db import models, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from cryptography.fernet import Fernet
 from django.conf import settings
 import json
 
+from .progress import publish_progress
+
 User = get_user_model()
+logger = logging.getLogger(__name__)
+
+class SocialMediaAccountQuerySet(models.QuerySet):
+    """Split accounts by how their data can be fetched"""
+    
+    def with_oauth_token(self):
+        """Accounts connected through OAuth, synced with the platform APIs"""
+        return self.exclude(encrypted_access_token__in=SocialMediaAccount.PLACEHOLDER_TOKENS)
+    
+    def handle_only(self):
+        """Accounts created from a handle, refreshed from public data"""
+        return self.filter(encrypted_access_token__in=SocialMediaAccount.PLACEHOLDER_TOKENS)
+
 
 class SocialMediaAccount(models.Model):
     """Model to store social media account connections"""
     
+    # Placeholder stored for accounts created from a handle without OAuth
+    AUTO_CREATED_TOKEN = 'auto_created'
+    PLACEHOLDER_TOKENS = [AUTO_CREATED_TOKEN, '']
+    
     PLATFORM_CHOICES = (
         ('instagram', 'Instagram'),
         ('youtube', 'YouTube'),
@@ -48,6 +72,8 @@ class SocialMediaAccount(models.Model):
     connected_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = SocialMediaAccountQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['user', 'platform']
         indexes = [
@@ -93,31 +119,65 @@ class SocialMediaAccount(models.Model):
         """Get and decrypt the refresh token"""
         return self.decrypt_token(self.encrypted_refresh_token)
     
+    def has_oauth_token(self):
+        """Check if the account holds a real (encrypted) OAuth token"""
+        return self.encrypted_access_token not in self.PLACEHOLDER_TOKENS
+    
     def is_token_expired(self):
         """Check if the access token is expired"""
         if not self.token_expires_at:
             return False
         return timezone.now() >= self.token_expires_at
     
-    def mark_error(self, error_message):
+    def mark_error(self, error_message, commit=True):
         """Mark account as having an error"""
         self.sync_error_count += 1
         self.last_error = error_message
         if self.sync_error_count >= 5:  # After 5 consecutive errors, mark as error status
             self.status = 'error'
-        self.save()
+        if commit:
+            self.save()
     
-    def reset_error_count(self):
+    def reset_error_count(self, commit=True):
         """Reset error count after successful sync"""
         self.sync_error_count = 0
         self.last_error = ""
         if self.status == 'error':
             self.status = 'active'
-        self.save()
+        if commit:
+            self.save()
+
+
+class FollowerHistoryQuerySet(models.QuerySet):
+    """Queries that understand run-length encoded history rows"""
+    
+    def with_valid_until(self):
+        """Annotate the end of each row's validity window"""
+        return self.annotate(valid_until=Coalesce('last_seen_at', 'recorded_at'))
+    
+    def valid_during(self, start, end):
+        """Rows whose validity window overlaps [start, end)"""
+        return self.with_valid_until().filter(recorded_at__lt=end, valid_until__gte=start)
+    
+    def expired_before(self, cutoff):
+        """Rows that stopped being valid before cutoff"""
+        return self.with_valid_until().filter(valid_until__lt=cutoff)
 
 
 class FollowerHistory(models.Model):
-    """Model to track follower count history"""
+    """
+    Model to track follower count history
+    
+    With change detection enabled, a row covers every identical snapshot
+    from recorded_at until last_seen_at; sample_count is how many syncs it
+    stands for.
+    """
+    
+    # Metrics that must all match for a snapshot to extend the previous row
+    SNAPSHOT_FIELDS = [
+        'follower_count', 'following_count', 'posts_count', 'engagement_rate',
+        'likes_count', 'comments_count', 'shares_count', 'views_count',
+    ]
     
     social_account = models.ForeignKey(SocialMediaAccount, on_delete=models.CASCADE, related_name='follower_history')
     follower_count = models.PositiveIntegerField()
@@ -135,6 +195,12 @@ class FollowerHistory(models.Model):
     recorded_at = models.DateTimeField(auto_now_add=True)
     sync_source = models.CharField(max_length=50, default='api')  # 'api', 'manual', 'webhook'
     
+    # Run-length encoding of identical snapshots
+    last_seen_at = models.DateTimeField(null=True, blank=True)
+    sample_count = models.PositiveIntegerField(default=1)
+    
+    objects = FollowerHistoryQuerySet.as_manager()
+    
     class Meta:
         indexes = [
             models.Index(fields=['social_account', 'recorded_at']),
@@ -144,6 +210,113 @@ class FollowerHistory(models.Model):
     
     def __str__(self):
         return f"{self.social_account} - {self.follower_count} followers at {self.recorded_at}"
+    
+    @property
+    def last_confirmed_at(self):
+        """When these values were last observed: the end of the run, or recorded_at for a single sample"""
+        return self.last_seen_at or self.recorded_at
+    
+    @property
+    def valid_until(self):
+        """Last time this snapshot was observed"""
+        return self.last_seen_at or self.recorded_at
+    
+    def matches_snapshot(self, snapshot):
+        """Check whether another snapshot (FollowerHistory) carries identical metrics"""
+        for field in self.SNAPSHOT_FIELDS:
+            mine, theirs = getattr(self, field), getattr(snapshot, field)
+            if field == 'engagement_rate':
+                # Unsaved rows hold the raw float from the API
+                mine = Decimal(str(mine)).quantize(Decimal('0.01'))
+                theirs = Decimal(str(theirs)).quantize(Decimal('0.01'))
+            if mine != theirs:
+                return False
+        return self.sync_source == snapshot.sync_source
+    
+    def extend(self, seen_at=None):
+        """Record another identical sample at seen_at"""
+        self.last_seen_at = seen_at or timezone.now()
+        self.sample_count += 1
+
+
+
+class InstagramMedia(models.Model):
+    """
+    Per-post counters of an Instagram account
+    
+    Rows are ingested incrementally by the sync: only posts newer than the
+    newest stored one, plus posts still inside the recency window, are
+    fetched again. Engagement is computed from the newest stored posts.
+    """
+    
+    # Engagement is measured over this many of the newest posts
+    ENGAGEMENT_POSTS = 25
+    
+    social_account = models.ForeignKey(SocialMediaAccount, on_delete=models.CASCADE, related_name='instagram_media')
+    media_id = models.CharField(max_length=50)
+    posted_at = models.DateTimeField()
+    like_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    
+    first_seen_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['social_account', 'media_id']
+        indexes = [
+            models.Index(fields=['social_account', '-posted_at']),
+        ]
+        ordering = ['-posted_at']
+    
+    def __str__(self):
+        return f"{self.social_account} - {self.media_id} ({self.like_count} likes)"
+    
+    @classmethod
+    def from_api(cls, social_account, post):
+        """Unsaved row from one Graph API media item, or None without a timestamp"""
+        if not post.get('id') or not post.get('timestamp'):
+            return None
+        
+        return cls(
+            social_account=social_account,
+            media_id=post['id'],
+            # Graph API timestamps look like 2024-05-01T12:00:00+0000
+            posted_at=datetime.strptime(post['timestamp'], '%Y-%m-%dT%H:%M:%S%z'),
+            like_count=post.get('like_count', 0),
+            comments_count=post.get('comments_count', 0),
+        )
+    
+    @classmethod
+    def fetch_since(cls, newest_posted_at):
+        """
+        Oldest post time the next sync has to fetch, or None for a full first page
+        
+        Covers every post newer than the newest stored one and every post
+        whose counts are still moving (inside the recency window).
+        """
+        if newest_posted_at is None:
+            return None
+        
+        window = timedelta(days=getattr(settings, 'INSTAGRAM_MEDIA_RECENCY_DAYS', 7))
+        # Whole days keep the request identical between ticks, so ETag revalidation can hit
+        window_start = (timezone.now() - window).replace(hour=0, minute=0, second=0, microsecond=0)
+        return min(newest_posted_at, window_start)
+    
+    @staticmethod
+    def summarize(posts, followers):
+        """Likes, comments and engagement rate over a list of posts"""
+        total_likes = sum(post.like_count for post in posts)
+        total_comments = sum(post.comments_count for post in posts)
+        
+        engagement_rate = 0
+        if posts and followers:
+            engagement_rate = (total_likes + total_comments) / (followers * len(posts)) * 100
+        
+        return {
+            'likes_count': total_likes,
+            'comments_count': total_comments,
+            'engagement_rate': round(engagement_rate, 2),
+        }
 
 
 class SyncJob(models.Model):
@@ -162,6 +335,7 @@ class SyncJob(models.Model):
         ('user_sync', 'User Sync'),
         ('platform_sync', 'Platform Sync'),
         ('single_account', 'Single Account'),
+        ('scheduled_sync', 'Scheduled Sync'),
     )
     
     job_id = models.CharField(max_length=100, unique=True)
@@ -179,6 +353,13 @@ class SyncJob(models.Model):
     accounts_failed = models.IntegerField(default=0)
     error_details = models.JSONField(default=dict)
     
+    # Resume point for long running sweeps
+    checkpoint_account_id = models.BigIntegerField(null=True, blank=True)
+    checkpointed_at = models.DateTimeField(null=True, blank=True)
+    
+    # Number of Celery shards a distributed sweep was split into (0 when run in one task)
+    shard_count = models.PositiveIntegerField(default=0)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     started_at = models.DateTimeField(null=True, blank=True)
@@ -205,13 +386,47 @@ class SyncJob(models.Model):
         """Mark job as started"""
         self.status = 'running'
         self.started_at = timezone.now()
-        self.save()
+        self._save_status()
+    
+    def _save_status(self):
+        """
+        Save a status change and move the job's counts in the daily rollup.
+        
+        The job row is locked while its previous status is read, so two
+        processes finishing the same job cannot both count it. A rollup
+        error is logged and never undoes or changes the job's own status.
+        """
+        with transaction.atomic():
+            previous = SyncJob.objects.select_for_update().filter(pk=self.pk).values(
+                'status', *SyncJobDailyStats.COUNTERS
+            ).first()
+            self.save()
+            try:
+                with transaction.atomic():
+                    SyncJobDailyStats.record_job(self, previous)
+            except Exception as e:
+                logger.error(f"Could not update daily statistics for sync job {self.job_id}: {e}")
+        publish_progress(self)
+    
+    def save_checkpoint(self, last_account_id, processed, successful, failed, error_details):
+        """Record progress so an interrupted sweep can resume after last_account_id"""
+        self.checkpoint_account_id = last_account_id
+        self.checkpointed_at = timezone.now()
+        self.accounts_processed = processed
+        self.accounts_successful = successful
+        self.accounts_failed = failed
+        self.error_details = error_details
+        self.save(update_fields=[
+            'checkpoint_account_id', 'checkpointed_at', 'accounts_processed',
+            'accounts_successful', 'accounts_failed', 'error_details'
+        ])
+        publish_progress(self)
     
     def mark_completed(self):
         """Mark job as completed"""
         self.status = 'completed'
         self.completed_at = timezone.now()
-        self.save()
+        self._save_status()
     
     def mark_failed(self, error_details=None):
         """Mark job as failed"""
@@ -219,7 +434,80 @@ class SyncJob(models.Model):
         self.completed_at = timezone.now()
         if error_details:
             self.error_details = error_details
-        self.save()
+        self._save_status()
+
+
+class SyncJobDailyStats(models.Model):
+    """Finished sync jobs rolled up per day, job type and status"""
+    
+    FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+    COUNTERS = ('accounts_processed', 'accounts_successful', 'accounts_failed')
+    
+    date = models.DateField()
+    job_type = models.CharField(max_length=20, choices=SyncJob.JOB_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=SyncJob.STATUS_CHOICES)
+    
+    job_count = models.IntegerField(default=0)
+    accounts_processed = models.IntegerField(default=0)
+    accounts_successful = models.IntegerField(default=0)
+    accounts_failed = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['date', 'job_type', 'status']
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.date} {self.job_type} {self.status}: {self.job_count} jobs"
+    
+    @classmethod
+    def record_job(cls, sync_job, previous=None):
+        """
+        Count a job that changed status in its day's rollup.
+        
+        previous holds the status and counters the job had before (as read
+        from the database). A job that finished before, e.g. a failed job
+        that is resumed and completes, first has that contribution taken
+        back, so each job is counted once, under its latest outcome. The
+        rows are changed with F() increments, so jobs finishing at the same
+        time never overwrite each other's counts.
+        """
+        day = timezone.localdate(sync_job.created_at)
+        if previous and previous['status'] in cls.FINISHED_STATUSES:
+            cls._increment(day, sync_job.job_type, previous['status'], previous, -1)
+        if sync_job.status in cls.FINISHED_STATUSES:
+            counters = {field: getattr(sync_job, field) for field in cls.COUNTERS}
+            cls._increment(day, sync_job.job_type, sync_job.status, counters, 1)
+    
+    @classmethod
+    def _increment(cls, day, job_type, status, counters, sign):
+        key = {'date': day, 'job_type': job_type, 'status': status}
+        cls.objects.get_or_create(**key)
+        cls.objects.filter(**key).update(
+            job_count=F('job_count') + sign,
+            updated_at=timezone.now(),
+            **{field: F(field) + sign * (counters[field] or 0) for field in cls.COUNTERS}
+        )
+        if sign < 0:
+            cls.objects.filter(job_count__lte=0, **key).delete()
+
+
+class APIQuotaUsage(models.Model):
+    """Quota units spent per metered API and quota day"""
+    
+    date = models.DateField()
+    api = models.CharField(max_length=30)
+    units_used = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['date', 'api']
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.date} {self.api}: {self.units_used} units"
 
 
 class WebhookEvent(models.Model):
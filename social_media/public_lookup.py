@@ -3,13 +3,15 @@ Public Social Media Lookup Service
 Fetches public information about social media accounts without requiring OAuth
 """
 
-import requests
 import logging
 from typing import Dict, Optional
 from django.conf import settings
 from django.core.cache import cache
 import time
 
+from .http import get_session
+from .metrics import lookup_cache_total
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,8 +41,10 @@ class PublicInstagramLookup:
             try:
                 cached_data = cache.get(cache_key)
                 if cached_data:
+                    lookup_cache_total.inc(service='public_instagram_lookup', result='hit')
                     logger.info(f"Returning cached data for @{username}")
                     return cached_data
+                lookup_cache_total.inc(service='public_instagram_lookup', result='miss')
             except Exception:
                 logger.warning("Cache unavailable, proceeding without cache")
             
@@ -129,8 +133,7 @@ class InstagramScrapingService:
     """
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = get_session('instagram_scraping', headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         self.cache_timeout = 1800  # 30 minutes cache
@@ -149,7 +152,9 @@ class InstagramScrapingService:
             try:
                 cached_data = cache.get(cache_key)
                 if cached_data:
+                    lookup_cache_total.inc(service='instagram_scraping', result='hit')
                     return cached_data
+                lookup_cache_total.inc(service='instagram_scraping', result='miss')
             except Exception:
                 logger.warning("Cache unavailable, proceeding without cache")
             
@@ -0,0 +1,221 @@
+"""
+Public Metrics Sources
+Fetch follower metrics for handle-only accounts that have no OAuth token
+"""
+
+import re
+import time
+import logging
+from typing import Dict, List, Optional
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from .api_clients import APIError, CircuitOpenError, RateLimitError
+from .circuit_breaker import get_circuit_breaker
+from .http import get_session
+from .instagram_public_api import instagram_public_api
+from .metrics import api_request_seconds
+from .quota import quota_ledger
+from .models import SocialMediaAccount
+
+logger = logging.getLogger(__name__)
+
+
+class PublicMetricsSource:
+    """Base class for public (token-less) metrics sources"""
+
+    sync_source = 'public'
+
+    # Cost of one get_engagement_metrics() call, used by the sync planner
+    SYNC_REQUEST_COUNT = 1
+    SYNC_QUOTA_UNITS = 0
+
+    # Key of the shared circuit breaker guarding this source
+    circuit_name = None
+
+    def get_engagement_metrics(self, account: SocialMediaAccount) -> Dict:
+        """Return metrics in the same shape as the API clients"""
+        raise NotImplementedError
+
+    def prefetch(self, accounts: List[SocialMediaAccount]) -> int:
+        """Warm up a batch of accounts in fewer requests; returns how many were fetched"""
+        return 0
+
+    def _allow_request(self) -> str:
+        """Ticket from the source's circuit breaker; fails fast while it is open"""
+        ticket = get_circuit_breaker(self.circuit_name).allow_request()
+        if ticket is None:
+            raise CircuitOpenError(f"{self.circuit_name} circuit is open, skipping request")
+        return ticket
+
+    def _previous_engagement_rate(self, account: SocialMediaAccount) -> float:
+        """Public sources expose no engagement data, so carry the last known rate forward"""
+        latest = account.follower_history.order_by('-recorded_at').values_list('engagement_rate', flat=True).first()
+        return float(latest) if latest is not None else 0.0
+
+
+class InstagramPublicSource(PublicMetricsSource):
+    """Instagram profile counters scraped through instagram_public_api"""
+
+    circuit_name = 'instagram_public'
+
+    def get_engagement_metrics(self, account: SocialMediaAccount) -> Dict:
+        if instagram_public_api._is_rate_limited():
+            raise RateLimitError("Instagram public lookup rate limit reached")
+
+        ticket = self._allow_request()
+        breaker = get_circuit_breaker(self.circuit_name)
+        data = instagram_public_api.get_user_data(account.username)
+
+        # The fallback payload is a placeholder with zero counts, never store it
+        if not data or data.get('data_source') == 'fallback':
+            breaker.record_failure(ticket)
+            raise APIError(f"No public Instagram data available for @{account.username}")
+        breaker.record_success(ticket)
+
+        return {
+            'follower_count': data.get('follower_count', 0),
+            'following_count': data.get('following_count', 0),
+            'posts_count': data.get('posts_count', 0),
+            'engagement_rate': self._previous_engagement_rate(account),
+            'sync_source': self.sync_source,
+        }
+
+
+class YouTubePublicSource(PublicMetricsSource):
+    """YouTube channel statistics read with the server API key"""
+
+    BASE_URL = "https://www.googleapis.com/youtube/v3"
+    SYNC_QUOTA_UNITS = 1
+    circuit_name = 'youtube_public'
+    CHANNEL_ID_PATTERN = re.compile(r'^UC[\w-]{22}$')
+
+    # channels.list accepts up to 50 ids per call
+    BATCH_SIZE = 50
+
+    # Statistics fetched in a batch are served from the cache for this long
+    STATISTICS_TIMEOUT = 300
+
+    # Channel ids behind @handles do not change, keep them for a month
+    CHANNEL_ID_TIMEOUT = 30 * 24 * 3600
+
+    def get_engagement_metrics(self, account: SocialMediaAccount) -> Dict:
+        channel_id = self._resolve_channel_id(account)
+        statistics = cache.get(self._statistics_key(channel_id)) if channel_id else None
+
+        if statistics is None:
+            items = self._list_channels({'id': channel_id} if channel_id else self._channel_lookup(account))
+            if not items:
+                raise APIError(f"YouTube channel {account.platform_user_id} not found")
+            self._remember_channel_id(account, items[0].get('id'))
+            statistics = items[0].get('statistics', {})
+
+        return {
+            'follower_count': int(statistics.get('subscriberCount', 0)),
+            'following_count': 0,
+            'posts_count': int(statistics.get('videoCount', 0)),
+            'views_count': int(statistics.get('viewCount', 0)),
+            'engagement_rate': self._previous_engagement_rate(account),
+            'sync_source': self.sync_source,
+        }
+
+    def prefetch(self, accounts: List[SocialMediaAccount]) -> int:
+        """
+        Fetch the statistics of a batch of accounts, 50 channels per request.
+
+        Only accounts whose channel id is known can be batched; handles that
+        were never resolved are fetched one by one and batched from then on.
+        """
+        channel_ids = list(dict.fromkeys(filter(None, (self._resolve_channel_id(account) for account in accounts))))
+        # A single channel costs the same request either way
+        if len(channel_ids) < 2:
+            return 0
+        return len(self.fetch_channel_statistics(channel_ids))
+
+    def fetch_channel_statistics(self, channel_ids: List[str]) -> Dict[str, Dict]:
+        """Statistics per channel id, cached briefly for get_engagement_metrics"""
+        statistics = {}
+        for start in range(0, len(channel_ids), self.BATCH_SIZE):
+            batch = channel_ids[start:start + self.BATCH_SIZE]
+            for channel in self._list_channels({'id': ','.join(batch), 'maxResults': self.BATCH_SIZE}):
+                statistics[channel['id']] = channel.get('statistics', {})
+                cache.set(self._statistics_key(channel['id']), statistics[channel['id']], self.STATISTICS_TIMEOUT)
+
+        logger.info(f"Fetched statistics of {len(statistics)}/{len(channel_ids)} YouTube channels in batches")
+        return statistics
+
+    def _list_channels(self, lookup: Dict) -> List[Dict]:
+        """One channels.list call (1 quota unit, however many ids)"""
+        api_key = getattr(settings, 'YOUTUBE_API_KEY', '')
+        if not api_key:
+            raise APIError("YOUTUBE_API_KEY is not configured")
+
+        params = {'part': 'statistics', 'key': api_key}
+        params.update(lookup)
+
+        ticket = self._allow_request()
+        breaker = get_circuit_breaker(self.circuit_name)
+        # The API key draws on the same project quota as the OAuth client
+        quota_ledger.spend('youtube', self.SYNC_QUOTA_UNITS)
+        started = time.monotonic()
+        try:
+            response = get_session('youtube_api').get(f"{self.BASE_URL}/channels", params=params, timeout=15)
+        except requests.RequestException as e:
+            api_request_seconds.observe(time.monotonic() - started, platform=self.circuit_name, status='error')
+            breaker.record_failure(ticket)
+            raise APIError(f"YouTube public lookup failed: {e}")
+
+        api_request_seconds.observe(
+            time.monotonic() - started, platform=self.circuit_name, status=f"{response.status_code // 100}xx"
+        )
+
+        if response.status_code >= 500:
+            breaker.record_failure(ticket)
+        else:
+            breaker.record_success(ticket)
+
+        if response.status_code == 403:
+            # quotaExceeded and rateLimitExceeded both come back as 403
+            raise RateLimitError(f"YouTube API key quota exhausted: {response.text[:200]}")
+        if response.status_code != 200:
+            raise APIError(f"YouTube public lookup failed: {response.status_code} - {response.text[:200]}")
+
+        return response.json().get('items') or []
+
+    def _channel_lookup(self, account: SocialMediaAccount) -> Dict:
+        """Query parameters selecting the channel by id or by @handle"""
+        identifier = account.platform_user_id or account.username
+        if self.CHANNEL_ID_PATTERN.match(identifier):
+            return {'id': identifier}
+        return {'forHandle': f"@{identifier.lstrip('@')}"}
+
+    def _resolve_channel_id(self, account: SocialMediaAccount) -> Optional[str]:
+        """Channel id of an account, from the account itself or an earlier handle lookup"""
+        identifier = account.platform_user_id or account.username
+        if self.CHANNEL_ID_PATTERN.match(identifier):
+            return identifier
+        return cache.get(self._channel_id_key(identifier))
+
+    def _remember_channel_id(self, account: SocialMediaAccount, channel_id: Optional[str]):
+        identifier = account.platform_user_id or account.username
+        if channel_id and identifier != channel_id:
+            cache.set(self._channel_id_key(identifier), channel_id, self.CHANNEL_ID_TIMEOUT)
+
+    def _channel_id_key(self, identifier: str) -> str:
+        return f"youtube_channel_id:{identifier.lstrip('@').lower()}"
+
+    def _statistics_key(self, channel_id: str) -> str:
+        return f"youtube_channel_statistics:{channel_id}"
+
+
+PUBLIC_SOURCES = {
+    'instagram': InstagramPublicSource(),
+    'youtube': YouTubePublicSource(),
+}
+
+
+def get_public_source(platform: str) -> Optional[PublicMetricsSource]:
+    """Public metrics source for a platform, or None when there is none"""
+    return PUBLIC_SOURCES.get(platform)
@@ -0,0 +1,174 @@
+"""
+API Quota Ledger
+Tracks daily quota units spent against metered platform APIs
+"""
+
+import logging
+from datetime import date
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+api_quota_units_total = registry.counter(
+    'api_quota_units_total',
+    'Quota units spent against metered platform APIs',
+    labels=('api',),
+)
+
+# Timezone each API's daily quota resets in
+QUOTA_RESET_TIMEZONES = {
+    'youtube': 'America/Los_Angeles',
+}
+
+# Spent units stay in the cache a little longer than the day they belong to
+QUOTA_CACHE_TIMEOUT = 2 * 24 * 3600
+
+
+class QuotaLedger:
+    """
+    Units spent per API and quota day.
+
+    Every metered request adds its cost to a shared cache counter, so all
+    workers see the same total without a database read or write per request.
+    persist() copies the counters to APIQuotaUsage after each sync batch;
+    a counter that is missing from the cache (restart, flush) is seeded
+    from the stored row, so the ledger survives both.
+    """
+
+    def __init__(self):
+        self.cache_prefix = "social_api_quota"
+
+    def get_limit(self, api: str) -> Optional[int]:
+        """Daily quota of an API, or None when it is not metered"""
+        return getattr(settings, 'SOCIAL_API_DAILY_QUOTA', {}).get(api)
+
+    def get_reserve(self, api: str) -> int:
+        """Units kept back for interactive requests once scheduled syncs stop"""
+        limit = self.get_limit(api) or 0
+        return int(limit * getattr(settings, 'SOCIAL_API_QUOTA_RESERVE', 0.1))
+
+    def quota_day(self, api: str) -> date:
+        """The quota day that is current for an API"""
+        zone = QUOTA_RESET_TIMEZONES.get(api)
+        now = timezone.now()
+        return now.astimezone(ZoneInfo(zone)).date() if zone else now.date()
+
+    def spend(self, api: str, units: int):
+        """Add units spent by one request to today's counter"""
+        if units <= 0 or self.get_limit(api) is None:
+            return
+
+        day = self.quota_day(api)
+        try:
+            if not self._incr(api, day, units):
+                # Missing counter (new day, restart, flush): seed it from the stored row
+                self._seed(api, day, units, self._stored_units(api, day))
+        except Exception as e:
+            logger.warning(f"Could not record {units} {api} quota units: {e}")
+        api_quota_units_total.inc(units, api=api)
+
+    async def aspend(self, api: str, units: int):
+        """spend() for the async clients; the counter and (on a cache miss) the stored row are read off the event loop"""
+        if units <= 0 or self.get_limit(api) is None:
+            return
+
+        day = self.quota_day(api)
+        try:
+            if not await sync_to_async(self._incr, thread_sensitive=False)(api, day, units):
+                stored = await sync_to_async(self._stored_units)(api, day)
+                await sync_to_async(self._seed, thread_sensitive=False)(api, day, units, stored)
+        except Exception as e:
+            logger.warning(f"Could not record {units} {api} quota units: {e}")
+        api_quota_units_total.inc(units, api=api)
+
+    def get_used(self, api: str, day: Optional[date] = None) -> int:
+        """Units spent on a quota day (today by default)"""
+        day = day or self.quota_day(api)
+        used = cache.get(self._cache_key(api, day))
+        if used is None:
+            used = self._stored_units(api, day)
+        return used
+
+    def get_remaining(self, api: str) -> Optional[int]:
+        """Units scheduled syncs may still spend today, or None when unmetered"""
+        limit = self.get_limit(api)
+        if limit is None:
+            return None
+        return max(0, limit - self.get_reserve(api) - self.get_used(api))
+
+    def affordable(self, api: str, units_each: int) -> Optional[int]:
+        """How many operations costing units_each still fit today, or None when unlimited"""
+        remaining = self.get_remaining(api)
+        if remaining is None or units_each <= 0:
+            return None
+        return remaining // units_each
+
+    def can_afford(self, api: str, units: int) -> bool:
+        remaining = self.get_remaining(api)
+        return remaining is None or remaining >= units
+
+    def persist(self) -> Dict[str, int]:
+        """Store today's counters of every metered API; returns the units written"""
+        from .models import APIQuotaUsage
+
+        written = {}
+        for api in getattr(settings, 'SOCIAL_API_DAILY_QUOTA', {}):
+            day = self.quota_day(api)
+            used = cache.get(self._cache_key(api, day))
+            if used is None:
+                continue
+            try:
+                APIQuotaUsage.objects.update_or_create(date=day, api=api, defaults={'units_used': used})
+            except Exception as e:
+                logger.warning(f"Could not persist {api} quota usage: {e}")
+                continue
+            written[api] = used
+        return written
+
+    def get_usage(self) -> Dict[str, Dict]:
+        """Today's usage of every metered API, for reports"""
+        return {
+            api: {
+                'date': self.quota_day(api).isoformat(),
+                'units_used': self.get_used(api),
+                'daily_limit': limit,
+                'remaining_for_sync': self.get_remaining(api),
+            }
+            for api, limit in getattr(settings, 'SOCIAL_API_DAILY_QUOTA', {}).items()
+        }
+
+    def _incr(self, api: str, day: date, units: int) -> bool:
+        """Add to an existing counter; False when there is none yet"""
+        try:
+            cache.incr(self._cache_key(api, day), units)
+        except ValueError:
+            return False
+        return True
+
+    def _seed(self, api: str, day: date, units: int, stored: int):
+        """Create a missing counter, unless another worker created it meanwhile"""
+        key = self._cache_key(api, day)
+        if cache.add(key, stored + units, QUOTA_CACHE_TIMEOUT) or self._incr(api, day, units):
+            return
+        # The counter expired again between add() and incr()
+        cache.set(key, stored + units, QUOTA_CACHE_TIMEOUT)
+
+    def _stored_units(self, api: str, day: date) -> int:
+        from .models import APIQuotaUsage
+
+        return APIQuotaUsage.objects.filter(date=day, api=api).values_list('units_used', flat=True).first() or 0
+
+    def _cache_key(self, api: str, day: date) -> str:
+        return f"{self.cache_prefix}:{api}:{day.isoformat()}"
+
+
+# Global ledger instance
+quota_ledger = QuotaLedger()
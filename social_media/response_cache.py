@@ -0,0 +1,146 @@
+"""
+Conditional Response Cache
+Stores ETags and bodies of platform API responses and revalidates them with If-None-Match
+"""
+
+import hashlib
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+import requests
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from requests.structures import CaseInsensitiveDict
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+api_response_cache_total = registry.counter(
+    'api_response_cache_total',
+    'Conditional API requests by outcome (hit = 304 served from the cache)',
+    labels=('platform', 'result'),
+)
+
+# Response headers worth replaying with a cached body
+KEPT_HEADERS = ('Content-Type', 'ETag')
+
+
+class ConditionalResponseCache:
+    """
+    ETag-validated cache of GET responses, shared by all workers.
+
+    Entries are keyed by method, URL and query parameters. The parameters
+    include the access token, so a response is only ever replayed to
+    the token (and with it the scope) that fetched it; keys are hashed,
+    so tokens never reach the cache. Entries live in the dedicated
+    ``api_responses`` cache and expire after the configured timeout, which
+    each hit refreshes. The number of entries is bounded by a ring of
+    max_entries slots in the same cache: every stored response claims the
+    next slot and evicts the entry that held it before, so the bound holds
+    on any backend without relying on its eviction policy.
+    """
+
+    CACHE_ALIAS = 'api_responses'
+
+    def __init__(self):
+        self.cache_prefix = "social_api_response"
+
+    @property
+    def config(self) -> Dict:
+        return getattr(settings, 'SOCIAL_API_RESPONSE_CACHE', {})
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.get('enabled', True)
+
+    @property
+    def store(self):
+        try:
+            return caches[self.CACHE_ALIAS]
+        except InvalidCacheBackendError:
+            return caches['default']
+
+    def key_for(self, method: str, url: str, params: Optional[Dict] = None) -> Optional[str]:
+        """Cache key of a request, or None when it must not be cached"""
+        if not self.enabled or method != 'GET':
+            return None
+
+        query = urlencode(sorted((params or {}).items()), doseq=True)
+        digest = hashlib.sha256(f"{url}?{query}".encode()).hexdigest()
+        return f"{self.cache_prefix}:{digest}"
+
+    def get(self, key: Optional[str]) -> Optional[Dict]:
+        if key is None:
+            return None
+        try:
+            return self.store.get(key)
+        except Exception as e:
+            logger.warning(f"API response cache read failed: {e}")
+            return None
+
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict:
+        """Headers turning a request into a conditional one"""
+        return {'If-None-Match': entry['etag']} if entry else {}
+
+    def save(self, key: Optional[str], status_code: int, headers, body: bytes, encoding: Optional[str] = None) -> bool:
+        """Keep a 200 response that carries an ETag; returns whether it was stored"""
+        etag = headers.get('ETag')
+        if key is None or status_code != 200 or not etag:
+            return False
+        if len(body) > self.config.get('max_body_bytes', 256 * 1024):
+            return False
+
+        entry = {
+            'etag': etag,
+            'body': body,
+            'headers': {name: headers[name] for name in KEPT_HEADERS if name in headers},
+            'encoding': encoding,
+        }
+        try:
+            self.store.set(key, entry, self.config.get('timeout', 24 * 3600))
+            self._claim_slot(key)
+        except Exception as e:
+            logger.warning(f"API response cache write failed: {e}")
+            return False
+        return True
+
+    def _claim_slot(self, key: str):
+        """Index a stored entry in the next slot, deleting the oldest entry that held it"""
+        counter_key = f"{self.cache_prefix}:slots"
+        try:
+            position = self.store.incr(counter_key)
+        except ValueError:
+            self.store.add(counter_key, 0, None)
+            position = self.store.incr(counter_key)
+
+        slot_key = f"{self.cache_prefix}:slot:{position % self.config.get('max_entries', 5000)}"
+        evicted = self.store.get(slot_key)
+        if evicted and evicted != key:
+            self.store.delete(evicted)
+        self.store.set(slot_key, key, None)
+
+    def touch(self, key: str):
+        """Keep a revalidated entry around for another full timeout"""
+        try:
+            self.store.touch(key, self.config.get('timeout', 24 * 3600))
+        except Exception as e:
+            logger.warning(f"API response cache touch failed: {e}")
+
+    def to_response(self, entry: Dict, url: str) -> requests.Response:
+        """A 200 requests.Response rebuilt from a cached entry"""
+        response = requests.Response()
+        response.status_code = 200
+        response._content = entry['body']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry.get('encoding')
+        response.url = url
+        return response
+
+    def record(self, platform: str, result: str):
+        api_response_cache_total.inc(platform=platform, result=result)
+
+
+# Global cache instance
+response_cache = ConditionalResponseCache()
@@ -0,0 +1,201 @@
+"""
+Adaptive Sync Scheduler
+Decides which social media accounts to refresh on each periodic tick
+"""
+
+import heapq
+import logging
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, Max, Min, OuterRef, Q
+from django.utils import timezone
+
+from collaborations.models import Collaboration
+from .api_clients import API_CLIENTS
+from .models import SocialMediaAccount, FollowerHistory
+from .quota import quota_ledger
+from .sync_service import queryset_chunks
+
+logger = logging.getLogger(__name__)
+
+
+class SyncScheduler:
+    """
+    Ranks active accounts by how much a refresh is worth and hands out a
+    per-platform API budget each tick.
+
+    The score grows with time since the last sync and is amplified by recent
+    follower volatility and by an active collaboration, so hot accounts are
+    refreshed every few ticks while dormant ones wait until they are stale.
+    """
+
+    # Collaboration statuses that mean a brand is currently watching the numbers
+    ACTIVE_COLLABORATION_STATUSES = ['in_progress', 'submitted']
+
+    # Score multipliers
+    VOLATILITY_WEIGHT = 10.0
+    COLLABORATION_BOOST = 3.0
+
+    # Accounts that were never synced count as this stale, and staleness is capped
+    # here so volatility and collaborations still decide the order of old accounts
+    MAX_STALENESS_HOURS = 168.0
+
+    # Follower history window used to measure volatility
+    VOLATILITY_WINDOW_DAYS = 7
+
+    # schedule_follower_updates plans for this many periodic_follower_sync ticks
+    # and the plan is discarded once the next planning run is due
+    PLAN_TICKS = 2
+    PLAN_TIMEOUT = 1800
+
+    def __init__(self):
+        self.plan_cache_key = "social_sync_plan"
+
+    def get_tick_budget(self, platform: str) -> int:
+        """Number of accounts a single tick may dispatch for a platform"""
+        budgets = getattr(settings, 'SOCIAL_SYNC_TICK_BUDGET', {})
+        return budgets.get(platform, budgets.get('default', 50))
+
+    def get_dispatch_budget(self, platform: str) -> int:
+        """
+        Tick budget capped by the platform's remaining daily quota.
+
+        Scheduled syncs stop once what is left (minus the reserve kept for
+        interactive requests) no longer covers a full account sync.
+        """
+        budget = self.get_tick_budget(platform)
+        client_class = API_CLIENTS.get(platform)
+        if client_class is None:
+            return budget
+
+        affordable = quota_ledger.affordable(platform, client_class.SYNC_QUOTA_UNITS)
+        if affordable is not None and affordable < budget:
+            logger.info(f"{platform} quota leaves room for {affordable} accounts this tick")
+            return affordable
+        return budget
+
+    def score_account(self, last_sync, volatility: float, has_collaboration: bool, now=None) -> float:
+        """Priority score for one account; higher is refreshed sooner"""
+        now = now or timezone.now()
+
+        if last_sync is None:
+            staleness = self.MAX_STALENESS_HOURS
+        else:
+            staleness = min((now - last_sync).total_seconds() / 3600, self.MAX_STALENESS_HOURS)
+
+        score = staleness * (1 + self.VOLATILITY_WEIGHT * volatility)
+        if has_collaboration:
+            score *= self.COLLABORATION_BOOST
+        return score
+
+    def build_plan(self, ticks: int = 1) -> Dict[str, List[int]]:
+        """
+        Rank every due account and keep the best ones per platform.
+
+        Accounts are streamed in chunks and only a bounded heap per platform
+        is kept, so memory stays proportional to the budget rather than the
+        number of accounts.
+        """
+        now = timezone.now()
+        fresh_before = now - timedelta(seconds=getattr(settings, 'SOCIAL_SYNC_FRESHNESS_SECONDS', 600))
+        volatility_since = now - timedelta(days=self.VOLATILITY_WINDOW_DAYS)
+        chunk_size = getattr(settings, 'SOCIAL_SYNC_CHUNK_SIZE', 500)
+
+        accounts = SocialMediaAccount.objects.with_oauth_token().filter(
+            status='active'
+        ).filter(
+            Q(last_sync__isnull=True) | Q(last_sync__lt=fresh_before)
+        ).annotate(
+            has_collaboration=self._active_collaboration_exists()
+        ).only('id', 'platform', 'last_sync')
+
+        heaps: Dict[str, list] = {}
+
+        for chunk in queryset_chunks(accounts, chunk_size):
+            volatility = self._get_volatility([account.id for account in chunk], volatility_since)
+
+            for account in chunk:
+                score = self.score_account(
+                    account.last_sync, volatility.get(account.id, 0.0), account.has_collaboration, now
+                )
+                capacity = self.get_tick_budget(account.platform) * ticks
+                heap = heaps.setdefault(account.platform, [])
+
+                if len(heap) < capacity:
+                    heapq.heappush(heap, (score, account.id))
+                elif capacity and score > heap[0][0]:
+                    heapq.heapreplace(heap, (score, account.id))
+
+        return {
+            platform: [account_id for _, account_id in sorted(heap, reverse=True)]
+            for platform, heap in heaps.items()
+        }
+
+    def refresh_plan(self) -> Dict[str, List[int]]:
+        """Rebuild the ranked plan and store it for the following ticks"""
+        plan = self.build_plan(ticks=self.PLAN_TICKS)
+        cache.set(self.plan_cache_key, plan, timeout=self.PLAN_TIMEOUT)
+        logger.info(
+            "Scheduled follower updates: " +
+            ", ".join(f"{platform}={len(ids)}" for platform, ids in plan.items())
+        )
+        return plan
+
+    def next_batch(self) -> List[int]:
+        """
+        Take this tick's budget of account ids off the plan.
+
+        Falls back to ranking on the spot when no plan is cached (first tick,
+        cache flush or a cache that is not shared between processes).
+        Accounts held back by the daily quota stay on the plan.
+        """
+        plan: Optional[Dict[str, List[int]]] = cache.get(self.plan_cache_key)
+        if not plan:
+            plan = self.build_plan(ticks=1)
+
+        batch = []
+        remaining = {}
+        for platform, account_ids in plan.items():
+            budget = self.get_dispatch_budget(platform)
+            batch.extend(account_ids[:budget])
+            if account_ids[budget:]:
+                remaining[platform] = account_ids[budget:]
+
+        if remaining:
+            cache.set(self.plan_cache_key, remaining, timeout=self.PLAN_TIMEOUT)
+        else:
+            cache.delete(self.plan_cache_key)
+
+        return batch
+
+    def _active_collaboration_exists(self) -> Exists:
+        """Correlated EXISTS for an ongoing campaign or direct collaboration"""
+        return Exists(
+            Collaboration.objects.filter(
+                status__in=self.ACTIVE_COLLABORATION_STATUSES
+            ).filter(
+                Q(request__influencer_id=OuterRef('user_id')) |
+                Q(direct_request__influencer_id=OuterRef('user_id'))
+            )
+        )
+
+    def _get_volatility(self, account_ids: List[int], since) -> Dict[int, float]:
+        """Relative follower swing ((max - min) / max) per account since a point in time"""
+        rows = FollowerHistory.objects.valid_during(since, timezone.now()).filter(
+            social_account_id__in=account_ids
+        ).values('social_account_id').annotate(
+            high=Max('follower_count'),
+            low=Min('follower_count')
+        )
+
+        return {
+            row['social_account_id']: (row['high'] - row['low']) / row['high'] if row['high'] else 0.0
+            for row in rows
+        }
+
+
+# Global scheduler instance
+sync_scheduler = SyncScheduler()
@@ -93,15 +93,18 @@ class FollowerHistorySerializer(serializers.ModelSerializer):
     platform = serializers.CharField(source='social_account.platform', read_only=True)
     username = serializers.CharField(source='social_account.username', read_only=True)
     change_from_previous = serializers.SerializerMethodField()
+    # Unchanged snapshots are folded into one row; expose the end of its window
+    last_seen_at = serializers.DateTimeField(source='valid_until', read_only=True)
     
     class Meta:
         model = FollowerHistory
         fields = [
             'id', 'follower_count', 'following_count', 'posts_count', 'engagement_rate',
             'likes_count', 'comments_count', 'shares_count', 'views_count',
-            'recorded_at', 'sync_source', 'platform', 'username', 'change_from_previous'
+            'recorded_at', 'last_seen_at', 'sample_count', 'sync_source',
+            'platform', 'username', 'change_from_previous'
         ]
-        read_only_fields = ['id', 'recorded_at']
+        read_only_fields = ['id', 'recorded_at', 'last_seen_at', 'sample_count']
     
     def get_change_from_previous(self, obj):
         """Calculate change from previous record"""
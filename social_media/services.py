@@ -4,7 +4,10 @@ from googleapiclient.discovery import build
 from django.conf import settings
 import logging
 import re
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+
+from .api_clients import APIError
+from .public_sync import get_public_source
 
 logger = logging.getLogger(__name__)
 
@@ -81,6 +84,42 @@ class SocialMediaService:
             logger.error(f"Error fetching YouTube subscribers for {channel_identifier}: {str(e)}")
             return None
     
+    @staticmethod
+    def get_youtube_subscribers_batch(channel_identifiers: List[str]) -> Dict[str, Optional[int]]:
+        """
+        Get subscriber counts for many channels at once
+        Channel ids are fetched 50 per channels.list call; other identifiers fall back to get_youtube_subscribers
+        """
+        source = get_public_source('youtube')
+        channel_ids = {
+            identifier: SocialMediaService._extract_youtube_channel_id(identifier)
+            for identifier in channel_identifiers
+        }
+        batchable = list(dict.fromkeys(
+            channel_id for channel_id in channel_ids.values()
+            if channel_id and source.CHANNEL_ID_PATTERN.match(channel_id)
+        ))
+        
+        statistics = {}
+        if batchable:
+            try:
+                statistics = source.fetch_channel_statistics(batchable)
+            except APIError as e:
+                logger.error(f"Batched YouTube subscriber fetch failed: {e}")
+        
+        results = {}
+        for identifier, channel_id in channel_ids.items():
+            if channel_id in statistics:
+                subscriber_count = statistics[channel_id].get('subscriberCount')
+                results[identifier] = int(subscriber_count) if subscriber_count else None
+            elif channel_id in batchable:
+                # Unknown channel, or the batch failed; one request per channel would not do better
+                results[identifier] = None
+            else:
+                results[identifier] = SocialMediaService.get_youtube_subscribers(identifier)
+        
+        return results
+    
     @staticmethod
     def _extract_youtube_channel_id(url_or_id: str) -> Optional[str]:
         """Extract YouTube channel ID from various URL formats"""
@@ -104,9 +143,11 @@ class SocialMediaService:
         return None
     
     @staticmethod
-    def update_follower_counts(influencer_profile) -> Dict[str, Any]:
+    def update_follower_counts(influencer_profile,
+                               youtube_subscribers: Optional[Dict[str, Optional[int]]] = None) -> Dict[str, Any]:
         """
         Update follower counts for an influencer profile
+        youtube_subscribers holds counts already fetched with get_youtube_subscribers_batch
         Returns a dictionary with update results
         """
         results = {
@@ -140,9 +181,12 @@ class SocialMediaService:
         # Update YouTube subscribers
         if influencer_profile.youtube_channel:
             try:
-                subscribers = SocialMediaService.get_youtube_subscribers(
-                    influencer_profile.youtube_channel
-                )
+                if youtube_subscribers is not None and influencer_profile.youtube_channel in youtube_subscribers:
+                    subscribers = youtube_subscribers[influencer_profile.youtube_channel]
+                else:
+                    subscribers = SocialMediaService.get_youtube_subscribers(
+                        influencer_profile.youtube_channel
+                    )
                 if subscribers is not None:
                     # If YouTube is the primary platform or only platform, update main followers_count
                     if 'youtube' in influencer_profile.preferred_platforms:
@@ -28,13 +28,13 @@ def track_handle_changes(sender, instance, **kwargs):
 def update_followers_on_handle_change_signal(sender, instance, created, **kwargs):
     """Trigger follower update when social media handles change"""
     # Import here to avoid circular imports
-    from .tasks import sync_user_social_accounts
+    from .tasks import schedule_debounced_user_sync
     
     if created:
         # New profile created with handles - update followers
         if instance.instagram_handle or instance.youtube_channel:
             logger.info(f"New profile created for {instance.user.username}, triggering sync")
-            sync_user_social_accounts.delay(instance.user.id)
+            schedule_debounced_user_sync(instance.user.id)
     else:
         # Existing profile updated - check for handle changes
         instagram_changed = (
@@ -51,4 +51,4 @@ def update_followers_on_handle_change_signal(sender, instance, created, **kwargs
         
         if instagram_changed or youtube_changed:
             logger.info(f"Social media handles changed for {instance.user.username}, triggering sync")
-            sync_user_social_accounts.delay(instance.user.id)
\ No newline at end of file
+            schedule_debounced_user_sync(instance.user.id)
\ No newline at end of file
@@ -3,17 +3,36 @@ Social Media Sync Service
 Handles automatic follower count updates and social media data synchronization
 """
 
+import time
 import uuid
+import queue
+import asyncio
 import logging
-from typing import List, Dict, Optional
+import threading
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Iterable, Optional, Tuple
 from datetime import datetime, timedelta
+from django.conf import settings
 from django.utils import timezone
-from django.db import transaction
+from django.db import connections, transaction
+from django.db.models import Avg, Count, F, OuterRef, Q, Subquery, Sum, Window
+from django.db.models.functions import RowNumber
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 
-from .models import SocialMediaAccount, FollowerHistory, SyncJob
-from .api_clients import get_api_client, APIError, UnauthorizedError, RateLimitError
+from .models import SocialMediaAccount, FollowerHistory, InstagramMedia, SyncJob, SyncJobDailyStats
+from .api_clients import (
+    API_CLIENTS, get_api_client, APIError, CircuitOpenError, InstagramGraphAPIClient, UnauthorizedError, RateLimitError
+)
+from .async_clients import ASYNC_API_CLIENTS, async_clients_available, get_async_api_client
+from .circuit_breaker import get_circuit_breaker
+from .http import build_async_client
+from .metrics import sync_outcomes_total
+from .progress import SyncProgressReporter
+from .public_sync import get_public_source
+from .quota import quota_ledger
+from .write_behind import write_behind
 from accounts.models import InfluencerProfile
 
 User = get_user_model()
@@ -23,129 +42,142 @@ logger = logging.getLogger(__name__)
 class SocialMediaSyncService:
     """Service class for synchronizing social media data"""
     
+    SKIP_RATE_LIMITED = 'rate_limited'
+    SKIP_FRESH = 'fresh'
+    SKIP_LEASED = 'leased'
+    SKIP_CIRCUIT_OPEN = 'circuit_open'
+    SKIP_QUOTA_EXHAUSTED = 'quota_exhausted'
+    
+    # Weight of the newest sample in the moving-average fetch latency
+    LATENCY_SMOOTHING = 0.2
+    
     def __init__(self):
         self.rate_limit_cache_prefix = "social_sync_rate_limit"
+        self.lease_cache_prefix = "social_sync_lease"
+        self.fresh_cache_prefix = "social_sync_fresh"
+        self.latency_cache_prefix = "social_sync_latency"
         self.max_retries = 3
         self.retry_delay = 300  # 5 minutes
     
-    def sync_all_accounts(self) -> str:
-        """Sync all active social media accounts"""
-        job_id = str(uuid.uuid4())
+    def sync_all_accounts(self, resume_job_id: Optional[str] = None, resume: bool = False) -> str:
+        """
+        Sync all active social media accounts.
+        
+        Progress is checkpointed on the SyncJob after every chunk. Pass
+        resume_job_id to continue a specific interrupted job, or resume=True
+        to pick up the most recent full sync that stopped reporting progress.
+        
+        Only sweeps run in one task (SOCIAL_SYNC_SHARDED off) checkpoint;
+        sharded sweeps recover per shard through Celery redelivery and
+        retries, and are never resumed here.
+        """
+        sync_job = None
         
         try:
-            # Create sync job
-            sync_job = SyncJob.objects.create(
-                job_id=job_id,
-                job_type='full_sync',
-                status='pending'
-            )
+            if resume_job_id:
+                sync_job = SyncJob.objects.get(job_id=resume_job_id, job_type='full_sync')
+                if sync_job.status == 'completed':
+                    raise ValueError(f"Sync job {resume_job_id} has already completed")
+                if sync_job.shard_count:
+                    raise ValueError(f"Sync job {resume_job_id} was sharded and has no checkpoint to resume from")
+            elif resume:
+                sync_job = self._find_interrupted_full_sync()
+            
+            if sync_job:
+                logger.info(
+                    f"Resuming sync job {sync_job.job_id} after account "
+                    f"{sync_job.checkpoint_account_id} ({sync_job.accounts_processed} already processed)"
+                )
+            else:
+                # Create sync job
+                sync_job = SyncJob.objects.create(
+                    job_id=str(uuid.uuid4()),
+                    job_type='full_sync',
+                    status='pending'
+                )
             
-            # Get all active accounts
-            accounts = SocialMediaAccount.objects.filter(
+            # Get all active OAuth accounts (handle-only accounts have their own pipeline)
+            accounts = SocialMediaAccount.objects.with_oauth_token().filter(
                 status='active'
             ).select_related('user')
             
             sync_job.mark_started()
             
-            successful_syncs = 0
-            failed_syncs = 0
-            error_details = {}
-            
-            for account in accounts:
-                try:
-                    # Check rate limits
-                    if self._is_rate_limited(account.platform):
-                        logger.warning(f"Rate limited for {account.platform}, skipping {account}")
-                        continue
-                    
-                    # Sync individual account
-                    success = self._sync_single_account(account)
-                    
-                    if success:
-                        successful_syncs += 1
-                        account.reset_error_count()
-                    else:
-                        failed_syncs += 1
-                
-                except Exception as e:
-                    logger.error(f"Failed to sync account {account}: {e}")
-                    account.mark_error(str(e))
-                    failed_syncs += 1
-                    error_details[str(account.id)] = str(e)
+            # Streams accounts chunk by chunk, updating the affected influencer
+            # profiles and the job checkpoint after each chunk
+            results = self.sync_accounts_in_chunks(accounts, sync_job=sync_job)
             
             # Update job results
-            sync_job.accounts_processed = len(accounts)
-            sync_job.accounts_successful = successful_syncs
-            sync_job.accounts_failed = failed_syncs
-            sync_job.error_details = error_details
-            
-            # Update all affected influencer profiles
-            affected_users = set(acc.user for acc in accounts if acc.user.user_type == 'influencer')
-            for user in affected_users:
-                if hasattr(user, 'influencer_profile'):
-                    self._update_influencer_profile(user.influencer_profile)
+            sync_job.accounts_processed = results['processed']
+            sync_job.accounts_successful = results['successful']
+            sync_job.accounts_failed = results['failed']
+            sync_job.error_details = results['error_details']
             
             sync_job.mark_completed()
             
-            logger.info(f"Sync job {job_id} completed: {successful_syncs} successful, {failed_syncs} failed")
+            logger.info(f"Sync job {sync_job.job_id} completed: {results['successful']} successful, {results['failed']} failed")
             
-            return job_id
+            return sync_job.job_id
         
         except Exception as e:
-            logger.error(f"Sync job {job_id} failed: {e}")
-            if 'sync_job' in locals():
-                sync_job.mark_failed({'error': str(e)})
+            logger.error(f"Full sync job failed: {e}")
+            if sync_job is not None:
+                # Keep the checkpoint so the job can be resumed later
+                sync_job.mark_failed({**sync_job.error_details, 'error': str(e)})
             raise
     
-    def sync_user_accounts(self, user_id: int) -> str:
-        """Sync all accounts for a specific user"""
-        job_id = str(uuid.uuid4())
+    def _find_interrupted_full_sync(self) -> Optional[SyncJob]:
+        """Latest unsharded full sync that died mid-run (running without recent progress, or failed with a checkpoint)"""
+        stale_after = getattr(settings, 'SOCIAL_SYNC_STALE_JOB_SECONDS', 1800)
+        stale_before = timezone.now() - timedelta(seconds=stale_after)
+        
+        # Sharded parents stay running until their chord callback fires and never checkpoint
+        candidates = SyncJob.objects.filter(job_type='full_sync', shard_count=0).filter(
+            Q(status='running') | Q(status='failed', checkpoint_account_id__isnull=False)
+        ).order_by('-created_at')
+        
+        latest = candidates.first()
+        if latest is None:
+            return None
+        
+        last_progress = latest.checkpointed_at or latest.started_at or latest.created_at
+        if latest.status == 'running' and last_progress > stale_before:
+            # Still reporting progress, most likely alive on another worker
+            return None
+        
+        return latest
+    
+    def sync_user_accounts(self, user_id: int, job_id: Optional[str] = None) -> str:
+        """
+        Sync all accounts for a specific user.
+        
+        Callers that stream progress pass the job_id they handed to the
+        client; the job is created here if it does not exist yet.
+        """
+        job_id = job_id or str(uuid.uuid4())
         
         try:
             user = User.objects.get(id=user_id)
             
-            sync_job = SyncJob.objects.create(
+            sync_job, _ = SyncJob.objects.get_or_create(
                 job_id=job_id,
-                job_type='user_sync',
-                user=user,
-                status='pending'
+                defaults={'job_type': 'user_sync', 'user': user, 'status': 'pending'}
             )
             
             accounts = user.social_accounts.filter(status='active')
             sync_job.mark_started()
             
-            successful_syncs = 0
-            failed_syncs = 0
-            error_details = {}
+            progress = SyncProgressReporter(sync_job, accounts.count())
+            results = self._sync_accounts(accounts, progress=progress)
             
-            for account in accounts:
-                try:
-                    if self._is_rate_limited(account.platform):
-                        continue
-                    
-                    success = self._sync_single_account(account)
-                    
-                    if success:
-                        successful_syncs += 1
-                        account.reset_error_count()
-                    else:
-                        failed_syncs += 1
-                
-                except Exception as e:
-                    logger.error(f"Failed to sync account {account}: {e}")
-                    account.mark_error(str(e))
-                    failed_syncs += 1
-                    error_details[str(account.id)] = str(e)
-            
-            sync_job.accounts_processed = len(accounts)
-            sync_job.accounts_successful = successful_syncs
-            sync_job.accounts_failed = failed_syncs
-            sync_job.error_details = error_details
+            sync_job.accounts_processed = results['processed']
+            sync_job.accounts_successful = results['successful']
+            sync_job.accounts_failed = results['failed']
+            sync_job.error_details = results['error_details']
             sync_job.mark_completed()
             
             # Update user's influencer profile if exists
-            if hasattr(user, 'influencer_profile'):
-                self._update_influencer_profile(user.influencer_profile)
+            self._update_influencer_profiles([user.id])
             
             return job_id
         
@@ -158,6 +190,119 @@ class SocialMediaSyncService:
                 sync_job.mark_failed({'error': str(e)})
             raise
     
+    def sync_accounts_in_chunks(self, accounts, chunk_size: Optional[int] = None,
+                                sync_job: Optional[SyncJob] = None) -> Dict:
+        """
+        Sync a queryset of accounts in fixed-size keyset chunks.
+        
+        Only one chunk of accounts is held in memory at a time and the
+        affected influencer profiles are rolled up after each chunk, so peak
+        memory does not grow with the total number of accounts.
+        
+        With a sync_job, iteration starts after its checkpoint and the
+        checkpoint plus partial counters are saved after every chunk.
+        """
+        chunk_size = chunk_size or getattr(settings, 'SOCIAL_SYNC_CHUNK_SIZE', 500)
+        totals = {
+            'processed': 0,
+            'successful': 0,
+            'failed': 0,
+            'error_details': {},
+        }
+        
+        progress = None
+        if sync_job is not None:
+            progress = SyncProgressReporter(sync_job, accounts.count())
+        
+        if sync_job is not None and sync_job.checkpoint_account_id:
+            accounts = accounts.filter(pk__gt=sync_job.checkpoint_account_id)
+            totals['processed'] = sync_job.accounts_processed
+            totals['successful'] = sync_job.accounts_successful
+            totals['failed'] = sync_job.accounts_failed
+            totals['error_details'] = {
+                key: value for key, value in sync_job.error_details.items() if key != 'error'
+            }
+        
+        for chunk in queryset_chunks(accounts, chunk_size):
+            if progress is not None:
+                progress.begin_batch(totals)
+            results = self._sync_accounts(chunk, progress=progress)
+            self._update_influencer_profiles(results['user_ids'])
+            
+            totals['processed'] += results['processed']
+            totals['successful'] += results['successful']
+            totals['failed'] += results['failed']
+            totals['error_details'].update(results['error_details'])
+            
+            if sync_job is not None:
+                sync_job.save_checkpoint(
+                    chunk[-1].pk,
+                    totals['processed'],
+                    totals['successful'],
+                    totals['failed'],
+                    totals['error_details'],
+                )
+        
+        return totals
+    
+    def sync_account_ids(self, account_ids: List[int]) -> Dict:
+        """
+        Sync one shard of a distributed full sync.
+        
+        Returns JSON-serialisable counters so the shard results can be merged
+        into the parent SyncJob by a chord callback.
+        """
+        accounts = SocialMediaAccount.objects.filter(
+            id__in=account_ids,
+            status='active'
+        ).select_related('user')
+        
+        results = self._sync_accounts(accounts)
+        self._update_influencer_profiles(results['user_ids'])
+        
+        return {
+            'processed': results['processed'],
+            'successful': results['successful'],
+            'failed': results['failed'],
+            'error_details': results['error_details'],
+        }
+    
+    def merge_shard_results(self, job_id: str, shard_results: List[Dict]) -> SyncJob:
+        """Aggregate shard results into the parent full sync job and complete it"""
+        sync_job = SyncJob.objects.get(job_id=job_id)
+        
+        processed = 0
+        successful = 0
+        failed = 0
+        error_details = {}
+        
+        for shard in shard_results:
+            if shard.get('status') == 'failed':
+                # The whole shard gave up after its retries
+                account_ids = shard.get('account_ids', [])
+                processed += len(account_ids)
+                failed += len(account_ids)
+                for account_id in account_ids:
+                    error_details[str(account_id)] = shard.get('error', 'Shard failed')
+                continue
+            
+            processed += shard.get('processed', 0)
+            successful += shard.get('successful', 0)
+            failed += shard.get('failed', 0)
+            error_details.update(shard.get('error_details', {}))
+        
+        sync_job.accounts_processed = processed
+        sync_job.accounts_successful = successful
+        sync_job.accounts_failed = failed
+        sync_job.error_details = error_details
+        sync_job.mark_completed()
+        
+        logger.info(
+            f"Sharded sync job {job_id} completed across {len(shard_results)} shards: "
+            f"{successful} successful, {failed} failed"
+        )
+        return sync_job
+    
     def sync_single_account_by_id(self, account_id: int) -> bool:
         """Sync a single social media account by ID"""
         try:
@@ -167,72 +312,610 @@ class SocialMediaSyncService:
             logger.error(f"Social media account {account_id} not found")
             return False
     
-    def _sync_single_account(self, account: SocialMediaAccount) -> bool:
-        """Sync a single social media account"""
+    def _sync_accounts(self, accounts: Iterable[SocialMediaAccount],
+                       progress: Optional[SyncProgressReporter] = None) -> Dict:
+        """
+        Sync a batch of accounts and return the aggregated outcome.
+        
+        API calls run on per-platform thread pools when concurrent sync is
+        enabled, or on one event loop for OAuth accounts when async sync is
+        enabled; all database writes stay on the calling thread. With
+        Instagram batching enabled, Instagram OAuth accounts are fetched
+        through Graph API batch requests first. A progress reporter is told
+        about every finished account.
+        """
+        results = {
+            'processed': 0,
+            'successful': 0,
+            'failed': 0,
+            'error_details': {},
+            'user_ids': set(),
+        }
+        started = time.monotonic()
+        buffer = SyncResultBuffer()
+        accounts = list(accounts)
+        buffer.load_latest_history([account.pk for account in accounts])
+        buffer.load_recent_media(accounts)
+        self._prefetch_public_metrics(accounts)
+        
         try:
-            logger.info(f"Syncing account: {account}")
-            
-            # Check if token is expired and try to refresh
-            if account.is_token_expired():
-                logger.info(f"Token expired for {account}, attempting refresh")
-                if not self._refresh_account_token(account):
-                    logger.error(f"Failed to refresh token for {account}")
-                    return False
+            accounts = self._sync_batched_accounts(accounts, results, buffer, progress)
             
-            # Get API client
-            client = get_api_client(
-                account.platform,
-                account.get_access_token(),
-                account.get_refresh_token()
-            )
-            
-            # Fetch engagement metrics
-            metrics = client.get_engagement_metrics()
-            
-            # Create follower history record
-            with transaction.atomic():
-                follower_history = FollowerHistory.objects.create(
-                    social_account=account,
-                    follower_count=metrics['follower_count'],
-                    following_count=metrics.get('following_count', 0),
-                    posts_count=metrics.get('posts_count', 0),
-                    engagement_rate=metrics.get('engagement_rate', 0),
-                    likes_count=metrics.get('likes_count', 0),
-                    comments_count=metrics.get('comments_count', 0),
-                    shares_count=metrics.get('shares_count', 0),
-                    views_count=metrics.get('views_count', 0),
-                    sync_source='api'
-                )
+            if self._use_async_clients():
+                self._sync_accounts_async(accounts, results, buffer, progress)
+            elif getattr(settings, 'SOCIAL_SYNC_CONCURRENT', True):
+                self._sync_accounts_concurrently(accounts, results, buffer, progress)
+            else:
+                for account in accounts:
+                    results['processed'] += 1
+                    
+                    # Check rate limits, freshness and concurrent syncs
+                    lease, skip_reason = self._claim_account(account)
+                    if skip_reason:
+                        self._record_skip(account, skip_reason, results)
+                    else:
+                        try:
+                            metrics = self._fetch_account_metrics(account, buffer.fetch_options(account))
+                        except Exception as e:
+                            self._handle_sync_error(account, e, buffer, results)
+                        else:
+                            self._record_sync_result(account, metrics, buffer, results)
+                        finally:
+                            self._release_lease(account, lease)
+                    
+                    if progress is not None:
+                        progress.account_done(account, results)
+        finally:
+            buffer.finish()
+            quota_ledger.persist()
+        
+        logger.info(
+            f"Synced {results['processed']} accounts in {time.monotonic() - started:.1f}s: "
+            f"{results['successful']} successful, {results['failed']} failed"
+        )
+        return results
+    
+    def _sync_accounts_concurrently(self, accounts: Iterable[SocialMediaAccount], results: Dict,
+                                    buffer: 'SyncResultBuffer',
+                                    progress: Optional[SyncProgressReporter] = None):
+        """Fan API calls out to one bounded thread pool per platform"""
+        executors = {}
+        futures = {}
+        
+        try:
+            for account in accounts:
+                results['processed'] += 1
                 
-                # Update account last sync time
-                account.last_sync = timezone.now()
-                account.save()
+                executor = executors.get(account.platform)
+                if executor is None:
+                    executor = ThreadPoolExecutor(
+                        max_workers=self._get_platform_concurrency(account.platform),
+                        thread_name_prefix=f"social-sync-{account.platform}"
+                    )
+                    executors[account.platform] = executor
                 
-                logger.info(f"Successfully synced {account}: {metrics['follower_count']} followers")
+                future = executor.submit(self._fetch_account_metrics_in_worker, account, buffer.fetch_options(account))
+                futures[future] = account
             
-            return True
+            for future in as_completed(futures):
+                account = futures[future]
+                try:
+                    self._record_future_result(account, future, buffer, results)
+                finally:
+                    if progress is not None:
+                        progress.account_done(account, results)
         
-        except UnauthorizedError as e:
-            logger.error(f"Unauthorized error for {account}: {e}")
-            account.status = 'expired'
-            account.mark_error(str(e))
-            return False
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+    
+    def is_batchable(self, account: SocialMediaAccount) -> bool:
+        """Whether sweeps fetch the account through Instagram Graph API batch requests"""
+        return (
+            getattr(settings, 'SOCIAL_SYNC_INSTAGRAM_BATCH', False)
+            and account.platform == 'instagram'
+            and account.has_oauth_token()
+            # An expired token is refreshed on the regular path first
+            and not account.is_token_expired()
+        )
+    
+    def _sync_batched_accounts(self, accounts: List[SocialMediaAccount], results: Dict,
+                               buffer: 'SyncResultBuffer',
+                               progress: Optional[SyncProgressReporter] = None) -> List[SocialMediaAccount]:
+        """
+        Sync batchable Instagram accounts, up to BATCH_ACCOUNTS per HTTP call.
         
-        except RateLimitError as e:
-            logger.warning(f"Rate limit hit for {account}: {e}")
-            self._set_rate_limit(account.platform)
-            account.mark_error(str(e))
-            return False
+        Accounts are claimed here and their batches run on a pool sized like
+        the Instagram thread pool. Returns the accounts left for the regular
+        engines: those that cannot be batched, plus the accounts of batches
+        whose call failed for a reason other than rate limits or an open
+        circuit (their leases are released first).
+        """
+        batchable = [account for account in accounts if self.is_batchable(account)]
+        # A single account costs the same two requests either way
+        if len(batchable) < 2:
+            return accounts
+        
+        batchable_ids = {account.pk for account in batchable}
+        remaining = [account for account in accounts if account.pk not in batchable_ids]
+        
+        claimed = []
+        for account in batchable:
+            lease, skip_reason = self._claim_account(account)
+            if skip_reason:
+                results['processed'] += 1
+                self._record_skip(account, skip_reason, results)
+                if progress is not None:
+                    progress.account_done(account, results)
+            else:
+                claimed.append((account, lease))
         
-        except APIError as e:
-            logger.error(f"API error for {account}: {e}")
-            account.mark_error(str(e))
+        size = InstagramGraphAPIClient.BATCH_ACCOUNTS
+        batches = [claimed[start:start + size] for start in range(0, len(claimed), size)]
+        if not batches:
+            return remaining
+        
+        with ThreadPoolExecutor(
+            max_workers=self._get_platform_concurrency('instagram'),
+            thread_name_prefix="social-sync-instagram-batch"
+        ) as executor:
+            futures = {
+                executor.submit(
+                    self._fetch_batch_in_worker, batch,
+                    {account.pk: buffer.fetch_options(account) for account, _ in batch}
+                ): batch
+                for batch in batches
+            }
+            
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    outcomes = future.result()
+                except (RateLimitError, CircuitOpenError) as e:
+                    # Syncing the accounts one by one would run into the same limit
+                    outcomes = [e] * len(batch)
+                except Exception as e:
+                    logger.warning(f"Instagram batch of {len(batch)} accounts failed, syncing them one by one: {e}")
+                    for account, lease in batch:
+                        self._release_lease(account, lease)
+                        remaining.append(account)
+                    continue
+                
+                for (account, lease), outcome in zip(batch, outcomes):
+                    results['processed'] += 1
+                    try:
+                        if isinstance(outcome, Exception):
+                            self._handle_sync_error(account, outcome, buffer, results)
+                        else:
+                            self._record_sync_result(account, outcome, buffer, results)
+                    finally:
+                        self._release_lease(account, lease)
+                        if progress is not None:
+                            progress.account_done(account, results)
+        
+        return remaining
+    
+    def _fetch_batch_in_worker(self, batch: List[Tuple[SocialMediaAccount, str]],
+                               fetch_options: Dict[int, Dict]) -> List:
+        """Thread pool entry point; metrics or an exception per account of one batch"""
+        try:
+            started = time.monotonic()
+            fetches = [
+                (
+                    get_api_client(account.platform, account.get_access_token(), account.get_refresh_token()),
+                    fetch_options.get(account.pk, {}).get('media_since')
+                )
+                for account, _ in batch
+            ]
+            outcomes = InstagramGraphAPIClient.get_engagement_metrics_batch(fetches)
+            
+            # Latency stats are per account (the planner divides work by them), so each gets its share
+            share = (time.monotonic() - started) / len(batch)
+            for outcome in outcomes:
+                if not isinstance(outcome, Exception):
+                    self._record_latency('instagram', share)
+            return outcomes
+        finally:
+            connections.close_all()
+    
+    def _use_async_clients(self) -> bool:
+        if not getattr(settings, 'SOCIAL_SYNC_ASYNC', False):
             return False
+        if not async_clients_available():
+            logger.warning("SOCIAL_SYNC_ASYNC is set but httpx is not installed, using thread pools")
+            return False
+        return True
+    
+    def _sync_accounts_async(self, accounts: List[SocialMediaAccount], results: Dict,
+                             buffer: 'SyncResultBuffer',
+                             progress: Optional[SyncProgressReporter] = None):
+        """
+        Fetch OAuth accounts concurrently from one event loop.
+        
+        Claims and token refreshes (which write the account) happen here
+        before the loop starts. The loop runs on a helper thread and hands
+        each finished account back through a queue, so results are recorded
+        on this thread as they arrive. Accounts without an async client
+        (handle-only accounts) go through the thread pools as before.
+        """
+        async_accounts = [
+            account for account in accounts
+            if account.has_oauth_token() and account.platform in ASYNC_API_CLIENTS
+        ]
+        async_ids = {account.pk for account in async_accounts}
+        other_accounts = [account for account in accounts if account.pk not in async_ids]
+        if other_accounts:
+            self._sync_accounts_concurrently(other_accounts, results, buffer, progress)
+        
+        claimed = []
+        for account in async_accounts:
+            results['processed'] += 1
+            
+            lease, skip_reason = self._claim_account(account)
+            if skip_reason:
+                self._record_skip(account, skip_reason, results)
+            elif account.is_token_expired() and not self._refresh_account_token(account):
+                self._handle_sync_error(
+                    account, UnauthorizedError(f"Failed to refresh token for {account}"), buffer, results
+                )
+                self._release_lease(account, lease)
+            else:
+                claimed.append((account, lease))
+                continue
+            
+            if progress is not None:
+                progress.account_done(account, results)
+        
+        if not claimed:
+            return
+        
+        fetch_options = {account.pk: buffer.fetch_options(account) for account, _ in claimed}
+        finished = queue.Queue()
+        loop_thread = threading.Thread(
+            target=self._run_fetch_loop, args=(claimed, finished, fetch_options),
+            name='social-sync-async', daemon=True
+        )
+        loop_thread.start()
+        
+        for _ in claimed:
+            account, lease, metrics, error = finished.get()
+            try:
+                if error is not None:
+                    self._handle_sync_error(account, error, buffer, results)
+                else:
+                    self._record_sync_result(account, metrics, buffer, results)
+            finally:
+                self._release_lease(account, lease)
+                if progress is not None:
+                    progress.account_done(account, results)
+        
+        loop_thread.join()
+    
+    def _run_fetch_loop(self, claimed: List[Tuple[SocialMediaAccount, str]], finished: queue.Queue,
+                        fetch_options: Optional[Dict[int, Dict]] = None):
+        """Event loop thread entry point; reports every claimed account exactly once"""
+        reported = set()
+        
+        def report(account, lease, metrics, error):
+            reported.add(account.pk)
+            finished.put((account, lease, metrics, error))
+        
+        try:
+            asyncio.run(self._fetch_metrics_async(claimed, report, fetch_options or {}))
+        except Exception as e:
+            logger.error(f"Async sync loop failed: {e}")
+            for account, lease in claimed:
+                if account.pk not in reported:
+                    report(account, lease, None, e)
+    
+    async def _fetch_metrics_async(self, claimed: List[Tuple[SocialMediaAccount, str]], report,
+                                   fetch_options: Dict[int, Dict]):
+        """Fetch metrics for all claimed accounts, bounded per platform"""
+        semaphores = {
+            platform: asyncio.Semaphore(self._get_async_concurrency(platform))
+            for platform in {account.platform for account, _ in claimed}
+        }
+        
+        async with build_async_client() as http:
+            async def fetch(account, lease):
+                async with semaphores[account.platform]:
+                    logger.info(f"Syncing account: {account}")
+                    started = time.monotonic()
+                    try:
+                        client = get_async_api_client(
+                            account.platform,
+                            account.get_access_token(),
+                            account.get_refresh_token(),
+                            http=http
+                        )
+                        metrics = await client.get_engagement_metrics(**fetch_options.get(account.pk, {}))
+                    except Exception as e:
+                        report(account, lease, None, e)
+                    else:
+                        self._record_latency(self._source_key(account), time.monotonic() - started)
+                        report(account, lease, metrics, None)
+            
+            await asyncio.gather(*(fetch(account, lease) for account, lease in claimed))
+    
+    def _get_async_concurrency(self, platform: str) -> int:
+        """Maximum number of in-flight async syncs for a platform"""
+        limits = getattr(settings, 'SOCIAL_SYNC_ASYNC_CONCURRENCY', {})
+        return max(1, int(limits.get(platform, limits.get('default', 50))))
+    
+    def _record_future_result(self, account: SocialMediaAccount, future, buffer: 'SyncResultBuffer', results: Dict):
+        """Record the outcome of one thread pool sync on the calling thread"""
+        try:
+            lease, metrics, skip_reason = future.result()
+        except Exception as e:
+            self._handle_sync_error(account, e, buffer, results)
+            return
+        
+        if skip_reason:
+            self._record_skip(account, skip_reason, results)
+            return
+        
+        try:
+            self._record_sync_result(account, metrics, buffer, results)
+        finally:
+            self._release_lease(account, lease)
+    
+    def _fetch_account_metrics_in_worker(self, account: SocialMediaAccount, options: Optional[Dict] = None
+                                         ) -> Tuple[Optional[str], Optional[Dict], Optional[str]]:
+        """
+        Thread pool entry point.
+        
+        Returns (lease, metrics, skip_reason); the lease is released by the
+        caller once the result has been recorded.
+        """
+        try:
+            lease, skip_reason = self._claim_account(account)
+            if skip_reason:
+                return None, None, skip_reason
+            
+            try:
+                return lease, self._fetch_account_metrics(account, options), None
+            except Exception:
+                self._release_lease(account, lease)
+                raise
+        finally:
+            # Token refreshes may have opened a connection on this worker thread
+            connections.close_all()
+    
+    def _get_platform_concurrency(self, platform: str) -> int:
+        """Maximum number of in-flight API syncs for a platform"""
+        limits = getattr(settings, 'SOCIAL_SYNC_PLATFORM_CONCURRENCY', {})
+        return max(1, int(limits.get(platform, limits.get('default', 2))))
+    
+    def _sync_single_account(self, account: SocialMediaAccount) -> bool:
+        """Sync a single social media account"""
+        lease, skip_reason = self._claim_account(account)
+        if skip_reason:
+            self._record_skip(account, skip_reason)
+            # A fresh or in-flight sync already provides the latest data
+            return skip_reason not in (self.SKIP_RATE_LIMITED, self.SKIP_CIRCUIT_OPEN, self.SKIP_QUOTA_EXHAUSTED)
+        
+        buffer = SyncResultBuffer()
         
+        try:
+            metrics = self._fetch_account_metrics(account, buffer.fetch_options(account))
         except Exception as e:
-            logger.error(f"Unexpected error syncing {account}: {e}")
-            account.mark_error(str(e))
+            self._handle_sync_error(account, e, buffer)
+            buffer.finish()
+            return False
+        else:
+            self._record_sync_result(account, metrics, buffer)
+            buffer.finish()
+            return True
+        finally:
+            self._release_lease(account, lease)
+    
+    def _claim_account(self, account: SocialMediaAccount) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Decide whether an account should be synced right now.
+        
+        Returns (lease, None) when the caller holds the account's sync lease,
+        or (None, skip_reason) when the platform is rate limited, its circuit
+        is open or its daily quota is spent, the last result is still fresh,
+        or another process is already syncing it.
+        """
+        if self._is_rate_limited(self._source_key(account)):
+            return None, self.SKIP_RATE_LIMITED
+        
+        if get_circuit_breaker(self._source_key(account)).is_open():
+            return None, self.SKIP_CIRCUIT_OPEN
+        
+        if not quota_ledger.can_afford(account.platform, self.get_quota_units(account)):
+            return None, self.SKIP_QUOTA_EXHAUSTED
+        
+        if self._is_fresh(account):
+            return None, self.SKIP_FRESH
+        
+        lease = self._acquire_lease(account)
+        if lease is None:
+            return None, self.SKIP_LEASED
+        
+        return lease, None
+    
+    def _record_skip(self, account: SocialMediaAccount, skip_reason: str, results: Optional[Dict] = None):
+        """Log a skipped account; a fresh result counts as a successful sync"""
+        sync_outcomes_total.inc(platform=self._source_key(account), outcome=f"skipped_{skip_reason}")
+        
+        if skip_reason == self.SKIP_RATE_LIMITED:
+            logger.warning(f"Rate limited for {account.platform}, skipping {account}")
+        elif skip_reason == self.SKIP_CIRCUIT_OPEN:
+            logger.warning(f"Circuit open for {account.platform}, skipping {account}")
+        elif skip_reason == self.SKIP_QUOTA_EXHAUSTED:
+            logger.warning(f"Daily {account.platform} quota used up, skipping {account}")
+        elif skip_reason == self.SKIP_FRESH:
+            logger.info(f"{account} was synced recently, reusing last result")
+            if results is not None:
+                results['successful'] += 1
+        else:
+            logger.info(f"{account} is already being synced elsewhere, skipping")
+    
+    def _is_fresh(self, account: SocialMediaAccount) -> bool:
+        """Check if the account was synced within the freshness window"""
+        freshness = getattr(settings, 'SOCIAL_SYNC_FRESHNESS_SECONDS', 600)
+        if freshness <= 0:
             return False
+        
+        # Another process may have synced it after this instance was loaded
+        if cache.get(f"{self.fresh_cache_prefix}:{account.id}"):
+            return True
+        
+        return bool(account.last_sync and timezone.now() - account.last_sync < timedelta(seconds=freshness))
+    
+    def _mark_fresh(self, account: SocialMediaAccount):
+        freshness = getattr(settings, 'SOCIAL_SYNC_FRESHNESS_SECONDS', 600)
+        if freshness > 0:
+            cache.set(f"{self.fresh_cache_prefix}:{account.id}", True, freshness)
+    
+    def _acquire_lease(self, account: SocialMediaAccount) -> Optional[str]:
+        """Atomically claim the account's sync lease in the shared cache"""
+        token = uuid.uuid4().hex
+        timeout = getattr(settings, 'SOCIAL_SYNC_LEASE_SECONDS', 300)
+        if cache.add(f"{self.lease_cache_prefix}:{account.id}", token, timeout):
+            return token
+        return None
+    
+    def _release_lease(self, account: SocialMediaAccount, lease: Optional[str]):
+        """Release a lease, unless it expired and was taken over by someone else"""
+        if not lease:
+            return
+        key = f"{self.lease_cache_prefix}:{account.id}"
+        if cache.get(key) == lease:
+            cache.delete(key)
+    
+    def _fetch_account_metrics(self, account: SocialMediaAccount, options: Optional[Dict] = None) -> Dict:
+        """Fetch engagement metrics for an account and record how long it took"""
+        logger.info(f"Syncing account: {account}")
+        
+        started = time.monotonic()
+        metrics = self._request_account_metrics(account, options)
+        self._record_latency(self._source_key(account), time.monotonic() - started)
+        return metrics
+    
+    def _prefetch_public_metrics(self, accounts: List[SocialMediaAccount]):
+        """
+        Let public sources fetch a whole batch up front in as few requests as possible.
+        
+        The per-account fetch then reads the prefetched data; if the batch
+        fails, every account falls back to its own request.
+        """
+        by_platform = {}
+        for account in accounts:
+            if not account.has_oauth_token() and not self._is_fresh(account):
+                by_platform.setdefault(account.platform, []).append(account)
+        
+        for platform, platform_accounts in by_platform.items():
+            source = get_public_source(platform)
+            if source is None or self._is_rate_limited(self._source_key(platform_accounts[0])):
+                continue
+            try:
+                source.prefetch(platform_accounts)
+            except APIError as e:
+                logger.warning(f"Batched {platform} public fetch failed, fetching accounts one by one: {e}")
+    
+    def _request_account_metrics(self, account: SocialMediaAccount, options: Optional[Dict] = None) -> Dict:
+        """
+        Fetch engagement metrics from the platform API or public source.
+        
+        options are extra get_engagement_metrics arguments for the API
+        client, such as the Instagram media cursor.
+        """
+        # Handle-only accounts have no token to decrypt; read public data instead
+        if not account.has_oauth_token():
+            source = get_public_source(account.platform)
+            if source is None:
+                raise APIError(f"No public data source for {account.platform}")
+            return source.get_engagement_metrics(account)
+        
+        # Check if token is expired and try to refresh
+        if account.is_token_expired():
+            logger.info(f"Token expired for {account}, attempting refresh")
+            if not self._refresh_account_token(account):
+                raise UnauthorizedError(f"Failed to refresh token for {account}")
+        
+        # Get API client
+        client = get_api_client(
+            account.platform,
+            account.get_access_token(),
+            account.get_refresh_token()
+        )
+        
+        # Fetch engagement metrics
+        return client.get_engagement_metrics(**(options or {}))
+    
+    def _record_sync_result(self, account: SocialMediaAccount, metrics: Dict,
+                            buffer: 'SyncResultBuffer', results: Optional[Dict] = None):
+        """Queue fetched metrics for storage and mark the account as healthy"""
+        if 'media' in metrics:
+            metrics = self._apply_stored_media(account, metrics, buffer)
+        
+        # Create follower history record (or extend the previous identical one)
+        buffer.add_snapshot(FollowerHistory(
+            social_account=account,
+            follower_count=metrics['follower_count'],
+            following_count=metrics.get('following_count', 0),
+            posts_count=metrics.get('posts_count', 0),
+            engagement_rate=metrics.get('engagement_rate', 0),
+            likes_count=metrics.get('likes_count', 0),
+            comments_count=metrics.get('comments_count', 0),
+            shares_count=metrics.get('shares_count', 0),
+            views_count=metrics.get('views_count', 0),
+            sync_source=metrics.get('sync_source', 'api')
+        ))
+        
+        # Update account last sync time
+        account.last_sync = timezone.now()
+        account.reset_error_count(commit=False)
+        buffer.add_account(account)
+        self._mark_fresh(account)
+        
+        sync_outcomes_total.inc(platform=self._source_key(account), outcome='success')
+        logger.info(f"Successfully synced {account}: {metrics['follower_count']} followers")
+        
+        if results is not None:
+            results['successful'] += 1
+            results['user_ids'].add(account.user_id)
+    
+    def _apply_stored_media(self, account: SocialMediaAccount, metrics: Dict, buffer: 'SyncResultBuffer') -> Dict:
+        """Queue the fetched posts and take engagement from the account's newest stored posts"""
+        metrics = dict(metrics)
+        posts = buffer.add_media(account, metrics.pop('media'))
+        metrics.update(InstagramMedia.summarize(posts, metrics['follower_count']))
+        return metrics
+    
+    def _handle_sync_error(self, account: SocialMediaAccount, error: Exception,
+                           buffer: 'SyncResultBuffer', results: Optional[Dict] = None):
+        """Record a failed sync on the account"""
+        if isinstance(error, CircuitOpenError):
+            # The platform is down, not the account; leave its error count alone
+            sync_outcomes_total.inc(platform=self._source_key(account), outcome='skipped_circuit_open')
+            logger.warning(f"Skipped {account}: {error}")
+            if results is not None:
+                results['failed'] += 1
+                results['error_details'][str(account.id)] = str(error)
+            return
+        
+        if isinstance(error, UnauthorizedError):
+            logger.error(f"Unauthorized error for {account}: {error}")
+            account.status = 'expired'
+        elif isinstance(error, RateLimitError):
+            logger.warning(f"Rate limit hit for {account}: {error}")
+            self._set_rate_limit(self._source_key(account))
+        elif isinstance(error, APIError):
+            logger.error(f"API error for {account}: {error}")
+        else:
+            logger.error(f"Unexpected error syncing {account}: {error}")
+        
+        sync_outcomes_total.inc(platform=self._source_key(account), outcome=f"failed_{type(error).__name__}")
+        account.mark_error(str(error), commit=False)
+        buffer.add_account(account)
+        
+        if results is not None:
+            results['failed'] += 1
+            results['error_details'][str(account.id)] = str(error)
     
     def _refresh_account_token(self, account: SocialMediaAccount) -> bool:
         """Refresh access token for an account"""
@@ -266,51 +949,150 @@ class SocialMediaSyncService:
             account.save()
             return False
     
-    def _update_influencer_profile(self, profile: InfluencerProfile):
-        """Update influencer profile with latest social media data"""
-        try:
-            # Get all social accounts for this user
-            accounts = profile.user.social_accounts.filter(status='active')
+    def record_follower_counts(self, follower_counts: Dict[int, int], sync_source: str = 'public'):
+        """
+        Store follower counts fetched outside a sweep, keyed by account id.
+        
+        The other metrics carry over from each account's latest history row,
+        so an unchanged count only extends that row through add_snapshot.
+        """
+        if not follower_counts:
+            return
+        
+        buffer = SyncResultBuffer()
+        buffer.load_latest_history(list(follower_counts))
+        for account_id, follower_count in follower_counts.items():
+            previous = buffer.latest_history.get(account_id)
+            carried = {field: getattr(previous, field) for field in FollowerHistory.SNAPSHOT_FIELDS} if previous else {}
+            buffer.add_snapshot(FollowerHistory(
+                social_account_id=account_id,
+                **{**carried, 'follower_count': follower_count},
+                sync_source=sync_source
+            ))
+        buffer.finish()
+    
+    PROFILE_ROLLUP_FIELDS = [
+        'followers_count',
+        'engagement_rate',
+        'latest_product_review_likes',
+        'latest_product_review_views',
+        'most_viewed_content_views',
+        'most_viewed_content_likes',
+        'updated_at',
+    ]
+    
+    def _update_influencer_profiles(self, user_ids: Iterable[int], chunk_size: int = 500):
+        """
+        Refresh the influencer profiles owned by the given users.
+        
+        Totals are computed set-based from each active account's latest
+        history row and written back with bulk_update, so the cost is a few
+        queries per chunk of users instead of several per account.
+        """
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), chunk_size):
+            try:
+                self._rollup_influencer_profiles(user_ids[start:start + chunk_size])
+            except Exception as e:
+                logger.error(f"Failed to update influencer profiles for users {user_ids[start:start + chunk_size]}: {e}")
+    
+    def _rollup_influencer_profiles(self, user_ids: List[int]):
+        """Aggregate latest account metrics per user and update their profiles"""
+        latest_history = FollowerHistory.objects.filter(
+            social_account=OuterRef('pk')
+        ).order_by('-recorded_at')
+        
+        rollups = SocialMediaAccount.objects.filter(
+            user_id__in=user_ids,
+            status='active'
+        ).annotate(
+            latest_followers=Subquery(latest_history.values('follower_count')[:1]),
+            latest_engagement=Subquery(latest_history.values('engagement_rate')[:1]),
+            latest_likes=Subquery(latest_history.values('likes_count')[:1]),
+            latest_views=Subquery(latest_history.values('views_count')[:1]),
+        ).filter(
+            latest_followers__isnull=False
+        ).order_by().values('user_id').annotate(
+            total_followers=Sum('latest_followers'),
+            average_engagement=Avg('latest_engagement'),
+            total_likes=Sum('latest_likes'),
+            total_views=Sum('latest_views'),
+        )
+        rollups = {row['user_id']: row for row in rollups}
+        
+        if not rollups:
+            return
+        
+        now = timezone.now()
+        changed_profiles = []
+        
+        for profile in InfluencerProfile.objects.filter(user_id__in=list(rollups)):
+            rollup = rollups[profile.user_id]
+            before = [getattr(profile, field) for field in self.PROFILE_ROLLUP_FIELDS[:-1]]
             
-            total_followers = 0
-            total_engagement = 0
-            total_likes = 0
-            total_views = 0
-            account_count = 0
+            profile.followers_count = rollup['total_followers']
+            profile.engagement_rate = Decimal(str(round(float(rollup['average_engagement'] or 0), 2)))
             
-            for account in accounts:
-                # Get latest follower history
-                latest_history = account.follower_history.first()
-                if latest_history:
-                    total_followers += latest_history.follower_count
-                    total_engagement += float(latest_history.engagement_rate)
-                    total_likes += latest_history.likes_count
-                    total_views += latest_history.views_count
-                    account_count += 1
-            
-            # Update profile
-            if account_count > 0:
-                profile.followers_count = total_followers
-                profile.engagement_rate = total_engagement / account_count
-                
-                # Update latest product review stats if they are currently 0 or we have new data
-                # This ensures the dashboard highlights show recent activity from the connected accounts
-                if total_likes > 0:
-                    profile.latest_product_review_likes = total_likes
-                if total_views > 0:
-                    profile.latest_product_review_views = total_views
-                
-                # Also update most viewed if it's lower than current latest (or just keep it in sync)
-                if profile.most_viewed_content_views < profile.latest_product_review_views:
-                    profile.most_viewed_content_views = profile.latest_product_review_views
-                    profile.most_viewed_content_likes = profile.latest_product_review_likes
-                
-                profile.save()
-                
-                logger.info(f"Updated influencer profile for {profile.user}: {total_followers} followers, {total_likes} likes")
+            # Update latest product review stats if they are currently 0 or we have new data
+            # This ensures the dashboard highlights show recent activity from the connected accounts
+            if rollup['total_likes']:
+                profile.latest_product_review_likes = rollup['total_likes']
+            if rollup['total_views']:
+                profile.latest_product_review_views = rollup['total_views']
+            
+            # Also update most viewed if it's lower than current latest (or just keep it in sync)
+            if profile.most_viewed_content_views < profile.latest_product_review_views:
+                profile.most_viewed_content_views = profile.latest_product_review_views
+                profile.most_viewed_content_likes = profile.latest_product_review_likes
+            
+            if [getattr(profile, field) for field in self.PROFILE_ROLLUP_FIELDS[:-1]] != before:
+                # bulk_update bypasses auto_now
+                profile.updated_at = now
+                changed_profiles.append(profile)
         
-        except Exception as e:
-            logger.error(f"Failed to update influencer profile {profile}: {e}")
+        if changed_profiles:
+            InfluencerProfile.objects.bulk_update(changed_profiles, self.PROFILE_ROLLUP_FIELDS, batch_size=100)
+        
+        logger.info(f"Rolled up {len(rollups)} influencer profiles, {len(changed_profiles)} changed")
+    
+    def _update_influencer_profile(self, profile: InfluencerProfile):
+        """Update influencer profile with latest social media data"""
+        self._update_influencer_profiles([profile.user_id])
+    
+    def get_cost_model(self, account: SocialMediaAccount):
+        """Client class (or public source) carrying SYNC_REQUEST_COUNT and SYNC_QUOTA_UNITS"""
+        if account.has_oauth_token():
+            return API_CLIENTS.get(account.platform)
+        return get_public_source(account.platform)
+    
+    def get_quota_units(self, account: SocialMediaAccount) -> int:
+        """Quota units one sync of the account spends"""
+        cost = self.get_cost_model(account)
+        return cost.SYNC_QUOTA_UNITS if cost is not None else 0
+    
+    def _source_key(self, account: SocialMediaAccount) -> str:
+        """API an account is synced through; public lookups are throttled and timed separately"""
+        if account.has_oauth_token():
+            return account.platform
+        return f"{account.platform}_public"
+    
+    def _record_latency(self, source: str, seconds: float):
+        """Fold one successful fetch into the source's moving-average latency"""
+        key = f"{self.latency_cache_prefix}:{source}"
+        stats = cache.get(key) or {'avg_seconds': seconds, 'max_seconds': seconds, 'samples': 0}
+        
+        stats['avg_seconds'] += self.LATENCY_SMOOTHING * (seconds - stats['avg_seconds'])
+        stats['max_seconds'] = max(stats['max_seconds'], seconds)
+        stats['samples'] += 1
+        cache.set(key, stats, None)
+    
+    def get_latency_stats(self, source: str) -> Optional[Dict]:
+        """Recorded fetch latency for a source (platform, or platform_public)"""
+        return cache.get(f"{self.latency_cache_prefix}:{source}")
+    
+    def _is_leased(self, account: SocialMediaAccount) -> bool:
+        """Check if another process currently holds the account's sync lease"""
+        return cache.get(f"{self.lease_cache_prefix}:{account.id}") is not None
     
     def _is_rate_limited(self, platform: str) -> bool:
         """Check if platform is currently rate limited"""
@@ -324,20 +1106,50 @@ class SocialMediaSyncService:
         logger.warning(f"Rate limit set for {platform} for {duration} seconds")
     
     def get_sync_statistics(self, days: int = 7) -> Dict:
-        """Get sync statistics for the last N days"""
+        """
+        Get sync statistics for the last N days.
+        
+        Finished jobs are read from the daily rollup (whole calendar days);
+        only pending and running jobs are aggregated from SyncJob itself.
+        """
         since = timezone.now() - timedelta(days=days)
         
-        jobs = SyncJob.objects.filter(created_at__gte=since)
+        finished = SyncJobDailyStats.objects.filter(
+            date__gte=timezone.localdate(since)
+        ).values('status').annotate(
+            jobs=Sum('job_count'),
+            processed=Sum('accounts_processed'),
+            successful=Sum('accounts_successful'),
+            failed=Sum('accounts_failed')
+        ).order_by()
+        
+        unfinished = SyncJob.objects.filter(
+            created_at__gte=since,
+            status__in=['pending', 'running']
+        ).values('status').annotate(
+            jobs=Count('id'),
+            processed=Sum('accounts_processed'),
+            successful=Sum('accounts_successful'),
+            failed=Sum('accounts_failed')
+        ).order_by()
+        
+        by_status = {row['status']: row for row in list(finished) + list(unfinished)}
+        
+        def total(field, statuses=None):
+            return sum(
+                row[field] or 0 for status, row in by_status.items()
+                if statuses is None or status in statuses
+            )
         
         stats = {
-            'total_jobs': jobs.count(),
-            'completed_jobs': jobs.filter(status='completed').count(),
-            'failed_jobs': jobs.filter(status='failed').count(),
-            'pending_jobs': jobs.filter(status='pending').count(),
-            'running_jobs': jobs.filter(status='running').count(),
-            'total_accounts_processed': sum(job.accounts_processed for job in jobs),
-            'total_accounts_successful': sum(job.accounts_successful for job in jobs),
-            'total_accounts_failed': sum(job.accounts_failed for job in jobs),
+            'total_jobs': total('jobs'),
+            'completed_jobs': total('jobs', ['completed']),
+            'failed_jobs': total('jobs', ['failed']),
+            'pending_jobs': total('jobs', ['pending']),
+            'running_jobs': total('jobs', ['running']),
+            'total_accounts_processed': total('processed'),
+            'total_accounts_successful': total('successful'),
+            'total_accounts_failed': total('failed'),
         }
         
         # Calculate success rate
@@ -348,6 +1160,30 @@ class SocialMediaSyncService:
         
         return stats
     
+    def get_daily_sync_statistics(self, days: int = 7) -> List[Dict]:
+        """Finished-job totals per day, newest first, straight from the rollup"""
+        since = timezone.localdate() - timedelta(days=days)
+        
+        rows = SyncJobDailyStats.objects.filter(date__gte=since).values('date').annotate(
+            jobs=Sum('job_count'),
+            failed_jobs=Sum('job_count', filter=Q(status='failed')),
+            processed=Sum('accounts_processed'),
+            successful=Sum('accounts_successful'),
+            failed=Sum('accounts_failed')
+        ).order_by('-date')
+        
+        return [
+            {
+                'date': row['date'].isoformat(),
+                'total_jobs': row['jobs'],
+                'failed_jobs': row['failed_jobs'] or 0,
+                'total_accounts_processed': row['processed'],
+                'total_accounts_successful': row['successful'],
+                'total_accounts_failed': row['failed'],
+            }
+            for row in rows
+        ]
+    
     def get_account_sync_history(self, account_id: int, limit: int = 50) -> List[Dict]:
         """Get sync history for a specific account"""
         try:
@@ -357,6 +1193,8 @@ class SocialMediaSyncService:
             return [
                 {
                     'recorded_at': record.recorded_at,
+                    'last_seen_at': record.valid_until,
+                    'sample_count': record.sample_count,
                     'follower_count': record.follower_count,
                     'following_count': record.following_count,
                     'posts_count': record.posts_count,
@@ -376,17 +1214,16 @@ class SocialMediaSyncService:
         cutoff_date = timezone.now() - timedelta(days=days)
         
         # Delete old follower history (keep recent data)
-        old_history = FollowerHistory.objects.filter(recorded_at__lt=cutoff_date)
-        deleted_count = old_history.count()
-        old_history.delete()
+        # Encoded rows stay while their validity window reaches into the retention period
+        old_history = FollowerHistory.objects.expired_before(cutoff_date)
+        deleted_count = self._delete_in_chunks(old_history)
         
         # Delete old completed sync jobs
         old_jobs = SyncJob.objects.filter(
             created_at__lt=cutoff_date,
             status__in=['completed', 'failed', 'cancelled']
         )
-        deleted_jobs = old_jobs.count()
-        old_jobs.delete()
+        deleted_jobs = self._delete_in_chunks(old_jobs)
         
         logger.info(f"Cleaned up {deleted_count} old follower history records and {deleted_jobs} old sync jobs")
         
@@ -394,6 +1231,223 @@ class SocialMediaSyncService:
             'deleted_history_records': deleted_count,
             'deleted_sync_jobs': deleted_jobs
         }
+    
+    def _delete_in_chunks(self, queryset, chunk_size: int = 1000) -> int:
+        """Delete matching rows a bounded batch of ids at a time"""
+        model = queryset.model
+        deleted = 0
+        
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                return deleted
+            
+            _, per_model = model.objects.filter(pk__in=ids).delete()
+            deleted += per_model.get(model._meta.label, 0)
+
+
+def queryset_chunks(queryset, chunk_size: int = 500):
+    """
+    Yield lists of objects from a queryset, one primary-key page at a time.
+    
+    Uses keyset pagination (pk > last seen pk) so every page is a cheap
+    indexed query and rows are never all loaded at once.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+class SyncResultBuffer:
+    """
+    Collects the writes produced by a sweep and flushes them in batches.
+    
+    History rows go through bulk_create and account updates through
+    bulk_update restricted to the sync bookkeeping columns, so a batch of
+    accounts costs one transaction instead of several commits per account.
+    With WRITE_BEHIND_ENABLED new history rows are handed to the
+    write-behind queue instead of being inserted in that transaction;
+    finish() waits until they are written, so profile rollups and the next
+    sweep's change detection read them from the database.
+    
+    With change detection on, a snapshot identical to the account's latest
+    row only extends that row's validity window.
+    
+    Instagram posts are upserted per (account, media id); the newest stored
+    posts of each account are loaded up front so the sync can fetch only
+    what is new and still compute engagement over the full set.
+    """
+    
+    ACCOUNT_FIELDS = ['status', 'last_sync', 'sync_error_count', 'last_error', 'updated_at']
+    EXTENDED_HISTORY_FIELDS = ['last_seen_at', 'sample_count']
+    
+    def __init__(self, batch_size: Optional[int] = None):
+        self.batch_size = batch_size or getattr(settings, 'SOCIAL_SYNC_WRITE_BATCH_SIZE', 200)
+        self.change_detection = getattr(settings, 'SOCIAL_SYNC_CHANGE_DETECTION', True)
+        self.history = []
+        self.extended_history = {}
+        self.accounts = {}
+        self.latest_history = {}
+        self.media = {}
+        self.recent_media = {}
+    
+    def load_latest_history(self, account_ids: List[int]):
+        """Fetch the latest history row of each account in one query"""
+        if not self.change_detection or not account_ids:
+            return
+        
+        latest_ids = SocialMediaAccount.objects.filter(pk__in=account_ids).annotate(
+            latest_id=Subquery(
+                FollowerHistory.objects.filter(
+                    social_account_id=OuterRef('pk')
+                ).order_by('-recorded_at', '-pk').values('pk')[:1]
+            )
+        ).values('latest_id')
+        
+        self.latest_history.update({account_id: None for account_id in account_ids})
+        for record in FollowerHistory.objects.filter(pk__in=latest_ids):
+            self.latest_history[record.social_account_id] = record
+    
+    def load_recent_media(self, accounts: Iterable[SocialMediaAccount]):
+        """Fetch the newest stored posts of each OAuth Instagram account in one query"""
+        account_ids = [
+            account.pk for account in accounts
+            if account.platform == 'instagram' and account.has_oauth_token()
+        ]
+        if not account_ids:
+            return
+        
+        rows = InstagramMedia.objects.filter(social_account_id__in=account_ids).annotate(
+            position=Window(RowNumber(), partition_by=F('social_account_id'), order_by=F('posted_at').desc())
+        ).filter(position__lte=InstagramMedia.ENGAGEMENT_POSTS).order_by('social_account_id', '-posted_at')
+        
+        self.recent_media.update({account_id: [] for account_id in account_ids})
+        for row in rows:
+            self.recent_media[row.social_account_id].append(row)
+    
+    def fetch_options(self, account: SocialMediaAccount) -> Dict:
+        """Extra get_engagement_metrics arguments: Instagram only fetches posts past its cursor"""
+        if account.platform != 'instagram' or not account.has_oauth_token():
+            return {}
+        
+        if account.pk not in self.recent_media:
+            self.load_recent_media([account])
+        posts = self.recent_media[account.pk]
+        return {'media_since': InstagramMedia.fetch_since(posts[0].posted_at if posts else None)}
+    
+    def add_media(self, account: SocialMediaAccount, posts: List[Dict]) -> List[InstagramMedia]:
+        """Queue fetched posts for upsert; returns the account's newest posts including them"""
+        if account.pk not in self.recent_media:
+            self.load_recent_media([account])
+        
+        fetched = [row for row in (InstagramMedia.from_api(account, post) for post in posts) if row is not None]
+        merged = {row.media_id: row for row in self.recent_media.get(account.pk, [])}
+        for row in fetched:
+            merged[row.media_id] = row
+            self.media[(account.pk, row.media_id)] = row
+        
+        newest = sorted(merged.values(), key=lambda row: row.posted_at, reverse=True)
+        self.recent_media[account.pk] = newest[:InstagramMedia.ENGAGEMENT_POSTS]
+        self._flush_if_full()
+        return self.recent_media[account.pk]
+    
+    def add_snapshot(self, record: FollowerHistory):
+        """Queue a snapshot, extending the previous row when nothing changed"""
+        if not self.change_detection:
+            self.add_history(record)
+            return
+        
+        account_id = record.social_account_id
+        if account_id not in self.latest_history:
+            # The account's latest row may still be in the write-behind queue
+            write_behind.flush()
+            self.latest_history[account_id] = FollowerHistory.objects.filter(
+                social_account_id=account_id
+            ).order_by('-recorded_at', '-pk').first()
+        
+        previous = self.latest_history[account_id]
+        if previous is not None and previous.matches_snapshot(record):
+            previous.extend()
+            if previous.pk:
+                self.extended_history[previous.pk] = previous
+                self._flush_if_full()
+            # Unsaved rows are still queued and get inserted with the new window
+            return
+        
+        self.latest_history[account_id] = record
+        self.add_history(record)
+    
+    def add_history(self, record: FollowerHistory):
+        self.history.append(record)
+        self._flush_if_full()
+    
+    def add_account(self, account: SocialMediaAccount):
+        self.accounts[account.pk] = account
+        self._flush_if_full()
+    
+    def _flush_if_full(self):
+        if (len(self.history) >= self.batch_size or len(self.accounts) >= self.batch_size
+                or len(self.extended_history) >= self.batch_size or len(self.media) >= self.batch_size):
+            self.flush()
+    
+    def flush(self):
+        """Write all pending rows in a single transaction"""
+        if not self.history and not self.accounts and not self.extended_history and not self.media:
+            return
+        
+        # bulk_update bypasses auto_now, so stamp updated_at ourselves
+        now = timezone.now()
+        accounts = list(self.accounts.values())
+        for account in accounts:
+            account.updated_at = now
+        
+        defer_history = write_behind.enabled
+        
+        with transaction.atomic():
+            if self.history and not defer_history:
+                FollowerHistory.objects.bulk_create(self.history, batch_size=self.batch_size)
+            if self.extended_history:
+                FollowerHistory.objects.bulk_update(
+                    self.extended_history.values(), self.EXTENDED_HISTORY_FIELDS, batch_size=100
+                )
+            if accounts:
+                SocialMediaAccount.objects.bulk_update(accounts, self.ACCOUNT_FIELDS, batch_size=100)
+            if self.media:
+                InstagramMedia.objects.bulk_create(
+                    self.media.values(), batch_size=self.batch_size,
+                    update_conflicts=True, unique_fields=['social_account', 'media_id'],
+                    update_fields=['like_count', 'comments_count', 'updated_at']
+                )
+        
+        if self.history and defer_history:
+            write_behind.bulk_create(self.history)
+            # Queued rows are written by another thread: never extend them in place,
+            # reload the account's latest row once they are in the database
+            for record in self.history:
+                self.latest_history.pop(record.social_account_id, None)
+        
+        logger.debug(
+            f"Flushed {len(self.history)} history records, {len(self.extended_history)} extended "
+            f"records, {len(self.media)} media rows and {len(accounts)} account updates"
+        )
+        
+        self.history = []
+        self.extended_history = {}
+        self.accounts = {}
+        self.media = {}
+    
+    def finish(self):
+        """Flush, then wait for history rows handed to the write-behind queue"""
+        self.flush()
+        write_behind.flush()
 
 
 # Global service instance
@@ -2,14 +2,25 @@
 Celery tasks for social media synchronization
 """
 
-from celery import shared_task
+import time
+import uuid
+from celery import shared_task, chord
 from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Count
 from django.utils import timezone
 from datetime import timedelta
 from typing import Dict, List
 
-from .sync_service import sync_service
+from .sync_service import sync_service, queryset_chunks
+from .scheduler import sync_scheduler
+from .quota import quota_ledger
 from .models import SocialMediaAccount, SyncJob
+from .services import SocialMediaService
+from accounts.models import InfluencerProfile
 
 logger = get_task_logger(__name__)
 
@@ -22,7 +33,17 @@ def sync_all_social_accounts(self):
     """
     try:
         logger.info("Starting sync_all_social_accounts task")
-        job_id = sync_service.sync_all_accounts()
+        
+        if getattr(settings, 'SOCIAL_SYNC_SHARDED', True):
+            job_id = dispatch_sharded_full_sync()
+            logger.info(f"Dispatched sharded full sync with job_id: {job_id}")
+            return {"status": "dispatched", "job_id": job_id}
+        
+        # Picks up an interrupted sweep (including this task's own failed attempt)
+        # from its checkpoint instead of starting over. Sharded sweeps do not
+        # checkpoint: an interrupted shard is redelivered (acks_late) and retried
+        # on its own, so a lost shard costs at most SOCIAL_SYNC_SHARD_SIZE accounts
+        job_id = sync_service.sync_all_accounts(resume=True)
         logger.info(f"Completed sync_all_social_accounts task with job_id: {job_id}")
         return {"status": "success", "job_id": job_id}
     
@@ -38,14 +59,103 @@ def sync_all_social_accounts(self):
         return {"status": "failed", "error": str(exc)}
 
 
+def dispatch_sharded_full_sync() -> str:
+    """
+    Split a full sync into account-id shards and fan them out as a chord.
+    
+    Each shard runs as its own task so the sweep spreads across every
+    worker; the chord callback merges shard counters into one SyncJob.
+    """
+    shard_size = getattr(settings, 'SOCIAL_SYNC_SHARD_SIZE', 100)
+    active_accounts = SocialMediaAccount.objects.with_oauth_token().filter(status='active').only('id')
+    shards = [
+        [account.id for account in chunk]
+        for chunk in queryset_chunks(active_accounts, shard_size)
+    ]
+    
+    return dispatch_account_shards('full_sync', shards)
+
+
+def dispatch_account_shards(job_type: str, shards: List[List[int]]) -> str:
+    """Create a SyncJob and run the given account-id shards as one chord"""
+    job_id = str(uuid.uuid4())
+    
+    sync_job = SyncJob.objects.create(
+        job_id=job_id,
+        job_type=job_type,
+        status='pending',
+        shard_count=len(shards)
+    )
+    
+    sync_job.mark_started()
+    
+    if not shards:
+        sync_job.mark_completed()
+        return job_id
+    
+    chord(
+        sync_account_shard.s(job_id, shard) for shard in shards
+    )(finalize_sharded_sync.s(job_id))
+    
+    logger.info(f"Sync job {job_id} ({job_type}) split into {len(shards)} shards")
+    return job_id
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60, acks_late=True)
+def sync_account_shard(self, job_id: str, account_ids: List[int]):
+    """
+    Celery task to sync one shard of a distributed full sync
+    A failing shard retries on its own without re-running the others
+    """
+    try:
+        logger.info(f"Starting shard of {len(account_ids)} accounts for sync job {job_id}")
+        result = sync_service.sync_account_ids(account_ids)
+        return {"status": "success", "job_id": job_id, **result}
+    
+    except Exception as exc:
+        logger.error(f"sync_account_shard failed for sync job {job_id}: {exc}")
+        
+        if self.request.retries < self.max_retries:
+            retry_delay = 60 * (2 ** self.request.retries)
+            logger.info(f"Retrying shard for sync job {job_id} in {retry_delay} seconds")
+            raise self.retry(countdown=retry_delay, exc=exc)
+        
+        # Report the failure instead of raising so the chord callback still runs
+        return {"status": "failed", "job_id": job_id, "account_ids": account_ids, "error": str(exc)}
+
+
+@shared_task
+def finalize_sharded_sync(shard_results: List[Dict], job_id: str):
+    """
+    Chord callback merging shard results into the parent SyncJob
+    """
+    try:
+        sync_job = sync_service.merge_shard_results(job_id, shard_results)
+        return {
+            "status": "success",
+            "job_id": job_id,
+            "accounts_processed": sync_job.accounts_processed,
+            "accounts_successful": sync_job.accounts_successful,
+            "accounts_failed": sync_job.accounts_failed,
+        }
+    
+    except Exception as exc:
+        logger.error(f"finalize_sharded_sync failed for sync job {job_id}: {exc}")
+        sync_job = SyncJob.objects.filter(job_id=job_id).first()
+        if sync_job is not None:
+            # Through mark_failed so the job also reaches progress streams and the daily rollup
+            sync_job.mark_failed({**sync_job.error_details, 'error': str(exc)})
+        return {"status": "failed", "error": str(exc), "job_id": job_id}
+
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def sync_user_social_accounts(self, user_id: int):
+def sync_user_social_accounts(self, user_id: int, job_id: str = None):
     """
     Celery task to sync social media accounts for a specific user
     """
     try:
         logger.info(f"Starting sync_user_social_accounts task for user {user_id}")
-        job_id = sync_service.sync_user_accounts(user_id)
+        job_id = sync_service.sync_user_accounts(user_id, job_id=job_id)
         logger.info(f"Completed sync_user_social_accounts task for user {user_id} with job_id: {job_id}")
         return {"status": "success", "job_id": job_id, "user_id": user_id}
     
@@ -60,6 +170,66 @@ def sync_user_social_accounts(self, user_id: int):
         return {"status": "failed", "error": str(exc), "user_id": user_id}
 
 
+def debounce_cache_is_shared() -> bool:
+    """
+    Whether the web process and the Celery worker see the same debounce keys.
+    
+    A process-local cache would leave the pending flag in the web process
+    while the worker never sees the edit timestamps, so later edits would be
+    folded into a task that has already run.
+    """
+    if getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        # Tasks run in the calling process
+        return True
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def schedule_debounced_user_sync(user_id: int):
+    """
+    Request a sync of a user's accounts, coalescing bursts of requests.
+    
+    Every call records the time of the latest edit; only the first call of a
+    burst queues a delayed task, which keeps postponing itself until no edit
+    has arrived for a full debounce window. The debounce relies on the
+    shared (Redis) cache; without one every edit syncs right away.
+    """
+    window = getattr(settings, 'SOCIAL_SYNC_DEBOUNCE_SECONDS', 30)
+    if window <= 0 or not debounce_cache_is_shared():
+        sync_user_social_accounts.delay(user_id)
+        return
+    
+    # Keys outlive the window so a lost task cannot block syncs for long
+    key_timeout = window * 10
+    cache.set(f"social_sync_debounce_edit:{user_id}", time.time(), key_timeout)
+    
+    if cache.add(f"social_sync_debounce_pending:{user_id}", True, key_timeout):
+        debounced_user_sync.apply_async((user_id,), countdown=window)
+    else:
+        logger.debug(f"Sync for user {user_id} already pending, folded into it")
+
+
+@shared_task
+def debounced_user_sync(user_id: int):
+    """
+    Celery task run once a burst of profile edits has settled
+    Re-queues itself while edits keep arriving, then starts the user sync
+    """
+    window = getattr(settings, 'SOCIAL_SYNC_DEBOUNCE_SECONDS', 30)
+    last_edit = cache.get(f"social_sync_debounce_edit:{user_id}")
+    
+    # A missing timestamp (evicted or expired) cannot be waited on; sync now
+    if last_edit is not None:
+        remaining = last_edit + window - time.time()
+        if remaining > 0:
+            debounced_user_sync.apply_async((user_id,), countdown=remaining)
+            return {"status": "rescheduled", "user_id": user_id, "countdown": remaining}
+    
+    # Clear the flag first so edits made during the sync schedule a new one
+    cache.delete(f"social_sync_debounce_pending:{user_id}")
+    sync_user_social_accounts.delay(user_id)
+    return {"status": "dispatched", "user_id": user_id}
+
+
 @shared_task(bind=True, max_retries=2, default_retry_delay=30)
 def sync_single_social_account(self, account_id: int):
     """
@@ -95,24 +265,14 @@ def sync_platform_accounts(platform: str):
     try:
         logger.info(f"Starting sync_platform_accounts task for platform {platform}")
         
-        accounts = SocialMediaAccount.objects.filter(
+        accounts = SocialMediaAccount.objects.with_oauth_token().filter(
             platform=platform,
             status='active'
-        )
+        ).select_related('user')
         
-        successful_syncs = 0
-        failed_syncs = 0
-        
-        for account in accounts:
-            try:
-                success = sync_service.sync_single_account_by_id(account.id)
-                if success:
-                    successful_syncs += 1
-                else:
-                    failed_syncs += 1
-            except Exception as e:
-                logger.error(f"Failed to sync account {account.id}: {e}")
-                failed_syncs += 1
+        results = sync_service.sync_accounts_in_chunks(accounts)
+        successful_syncs = results['successful']
+        failed_syncs = results['failed']
         
         logger.info(f"Completed sync_platform_accounts for {platform}: {successful_syncs} successful, {failed_syncs} failed")
         
@@ -128,6 +288,130 @@ def sync_platform_accounts(platform: str):
         return {"status": "failed", "error": str(exc), "platform": platform}
 
 
+@shared_task
+def schedule_follower_updates():
+    """
+    Celery task to rank accounts by refresh priority
+    Scheduled every 30 minutes; the plan feeds the next periodic_follower_sync ticks
+    """
+    try:
+        logger.info("Starting schedule_follower_updates task")
+        plan = sync_scheduler.refresh_plan()
+        
+        return {
+            "status": "success",
+            "planned_accounts": {platform: len(account_ids) for platform, account_ids in plan.items()}
+        }
+    
+    except Exception as exc:
+        logger.error(f"schedule_follower_updates task failed: {exc}")
+        return {"status": "failed", "error": str(exc)}
+
+
+@shared_task
+def periodic_follower_sync():
+    """
+    Celery task to refresh the highest-priority accounts within the API budget
+    Scheduled every 15 minutes
+    """
+    try:
+        logger.info("Starting periodic_follower_sync task")
+        
+        account_ids = sync_scheduler.next_batch()
+        if not account_ids:
+            logger.info("No accounts due for a follower sync")
+            return {"status": "success", "accounts_dispatched": 0}
+        
+        shard_size = getattr(settings, 'SOCIAL_SYNC_SHARD_SIZE', 100)
+        shards = [account_ids[i:i + shard_size] for i in range(0, len(account_ids), shard_size)]
+        job_id = dispatch_account_shards('scheduled_sync', shards)
+        
+        logger.info(f"Dispatched {len(account_ids)} accounts for scheduled sync job {job_id}")
+        return {"status": "dispatched", "job_id": job_id, "accounts_dispatched": len(account_ids)}
+    
+    except Exception as exc:
+        logger.error(f"periodic_follower_sync task failed: {exc}")
+        return {"status": "failed", "error": str(exc)}
+
+
+@shared_task
+def update_all_influencer_followers():
+    """
+    Celery task to refresh follower counts from the handles on influencer profiles
+    YouTube subscriber counts are fetched for a whole chunk of profiles, 50 channels per request,
+    and recorded as FollowerHistory of each user's YouTube account
+    """
+    logger.info("Starting update_all_influencer_followers task")
+    results = []
+    
+    profiles = InfluencerProfile.objects.exclude(
+        instagram_handle='', youtube_channel=''
+    ).select_related('user')
+    
+    for chunk in queryset_chunks(profiles, getattr(settings, 'SOCIAL_SYNC_CHUNK_SIZE', 500)):
+        channels = [profile.youtube_channel for profile in chunk if profile.youtube_channel]
+        youtube_subscribers = SocialMediaService.get_youtube_subscribers_batch(channels) if channels else {}
+        youtube_accounts = dict(SocialMediaAccount.objects.filter(
+            user_id__in=[profile.user_id for profile in chunk if profile.youtube_channel],
+            platform='youtube'
+        ).values_list('user_id', 'pk'))
+        subscriber_counts = {}
+        
+        for profile in chunk:
+            try:
+                result = SocialMediaService.update_follower_counts(profile, youtube_subscribers=youtube_subscribers)
+            except Exception as exc:
+                logger.error(f"Follower update failed for profile {profile.id}: {exc}")
+                results.append({'profile_id': profile.id, 'error': str(exc)})
+                continue
+            
+            if result['youtube_updated'] and profile.user_id in youtube_accounts:
+                subscriber_counts[youtube_accounts[profile.user_id]] = result['youtube_subscribers']
+            
+            entry = {'profile_id': profile.id, **result}
+            if result['errors']:
+                entry['error'] = '; '.join(result['errors'])
+            results.append(entry)
+        
+        try:
+            sync_service.record_follower_counts(subscriber_counts)
+        except Exception as exc:
+            logger.error(f"Could not record YouTube follower history for {len(subscriber_counts)} accounts: {exc}")
+    
+    logger.info(f"Completed update_all_influencer_followers for {len(results)} profiles")
+    return results
+
+
+@shared_task
+def refresh_public_accounts():
+    """
+    Celery task to refresh handle-only accounts from public profile data
+    These accounts hold no OAuth token and are kept out of the API sweeps
+    """
+    try:
+        logger.info("Starting refresh_public_accounts task")
+        
+        accounts = SocialMediaAccount.objects.handle_only().filter(
+            status='active'
+        ).select_related('user')
+        
+        results = sync_service.sync_accounts_in_chunks(accounts)
+        
+        logger.info(
+            f"Completed refresh_public_accounts: {results['successful']} successful, {results['failed']} failed"
+        )
+        
+        return {
+            "status": "success",
+            "successful_syncs": results['successful'],
+            "failed_syncs": results['failed']
+        }
+    
+    except Exception as exc:
+        logger.error(f"refresh_public_accounts task failed: {exc}")
+        return {"status": "failed", "error": str(exc)}
+
+
 @shared_task
 def cleanup_old_sync_data():
     """
@@ -160,24 +444,26 @@ def refresh_expired_tokens():
             status='active',
             token_expires_at__lte=expiry_threshold,
             token_expires_at__isnull=False
-        )
+        ).select_related('user')
         
         refreshed_count = 0
         failed_count = 0
+        chunk_size = getattr(settings, 'SOCIAL_SYNC_CHUNK_SIZE', 500)
         
-        for account in accounts_to_refresh:
-            try:
-                # Use sync service to refresh token
-                if sync_service._refresh_account_token(account):
-                    refreshed_count += 1
-                    logger.info(f"Refreshed token for account {account}")
-                else:
+        for chunk in queryset_chunks(accounts_to_refresh, chunk_size):
+            for account in chunk:
+                try:
+                    # Use sync service to refresh token
+                    if sync_service._refresh_account_token(account):
+                        refreshed_count += 1
+                        logger.info(f"Refreshed token for account {account}")
+                    else:
+                        failed_count += 1
+                        logger.warning(f"Failed to refresh token for account {account}")
+                
+                except Exception as e:
+                    logger.error(f"Error refreshing token for account {account}: {e}")
                     failed_count += 1
-                    logger.warning(f"Failed to refresh token for account {account}")
-            
-            except Exception as e:
-                logger.error(f"Error refreshing token for account {account}: {e}")
-                failed_count += 1
         
         logger.info(f"Completed refresh_expired_tokens task: {refreshed_count} refreshed, {failed_count} failed")
         
@@ -203,25 +489,35 @@ def generate_sync_report():
         
         # Get statistics for the last 7 days
         stats = sync_service.get_sync_statistics(days=7)
+        daily_stats = sync_service.get_daily_sync_statistics(days=7)
         
-        # Get account status summary
+        # Get account status summary (one grouped query)
+        status_counts = dict(
+            SocialMediaAccount.objects.values_list('status').annotate(count=Count('id')).order_by()
+        )
         account_stats = {
-            'total_accounts': SocialMediaAccount.objects.count(),
-            'active_accounts': SocialMediaAccount.objects.filter(status='active').count(),
-            'expired_accounts': SocialMediaAccount.objects.filter(status='expired').count(),
-            'error_accounts': SocialMediaAccount.objects.filter(status='error').count(),
+            'total_accounts': sum(status_counts.values()),
+            'active_accounts': status_counts.get('active', 0),
+            'expired_accounts': status_counts.get('expired', 0),
+            'error_accounts': status_counts.get('error', 0),
         }
         
-        # Get platform breakdown
-        platform_stats = {}
-        for platform, _ in SocialMediaAccount.PLATFORM_CHOICES:
-            platform_stats[platform] = SocialMediaAccount.objects.filter(platform=platform).count()
+        # Get platform breakdown (one grouped query)
+        platform_counts = dict(
+            SocialMediaAccount.objects.values_list('platform').annotate(count=Count('id')).order_by()
+        )
+        platform_stats = {
+            platform: platform_counts.get(platform, 0)
+            for platform, _ in SocialMediaAccount.PLATFORM_CHOICES
+        }
         
         report = {
             "generated_at": timezone.now().isoformat(),
             "sync_statistics": stats,
+            "daily_sync_statistics": daily_stats,
             "account_statistics": account_stats,
-            "platform_statistics": platform_stats
+            "platform_statistics": platform_stats,
+            "api_quota": quota_ledger.get_usage()
         }
         
         logger.info(f"Generated sync report: {report}")
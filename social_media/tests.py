@@ -1,3 +1,1494 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import queue
+import socket
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import requests
+from urllib3 import HTTPResponse
+from urllib3.exceptions import MaxRetryError
+
+from asgiref.sync import async_to_sync
+from cryptography.fernet import Fernet
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User, InfluencerProfile
+from .api_clients import (
+    APIError, CircuitOpenError, InstagramGraphAPIClient, RateLimitError, UnauthorizedError, YouTubeAPIClient
+)
+from .async_clients import AsyncYouTubeAPIClient
+from .benchmark import BenchmarkSyncService, create_bench_accounts, run_sweep
+from .circuit_breaker import CircuitBreaker, get_circuit_breaker
+from .fake_platforms import FakePlatformServer, load_cassette, record_responses, use_fake_platforms
+from .http import CappedRetry, build_session, get_session
+from .models import (
+    APIQuotaUsage, InstagramMedia, SocialMediaAccount, FollowerHistory, SyncJob, SyncJobDailyStats, WebhookEvent
+)
+from . import progress as progress_module
+from .metrics import MetricsRegistry, registry as metrics_registry
+from .progress import get_progress
+from .quota import quota_ledger
+from .response_cache import response_cache
+from .scheduler import SyncScheduler
+from .services import SocialMediaService
+from .sync_planner import SyncPlanner
+from .sync_service import SocialMediaSyncService, queryset_chunks, sync_service
+from .tasks import (
+    debounced_user_sync, finalize_sharded_sync, schedule_debounced_user_sync, update_all_influencer_followers
+)
+from .write_behind import WriteBehindWriter
+
+
+TEST_ENCRYPTION_KEY = Fernet.generate_key().decode()
+
+
+def fake_metrics(follower_count):
+    return {
+        'follower_count': follower_count,
+        'following_count': 10,
+        'posts_count': 5,
+        'likes_count': 100,
+        'comments_count': 20,
+        'views_count': 0,
+        'engagement_rate': 1.5,
+    }
+
+
+@override_settings(SOCIAL_MEDIA_ENCRYPTION_KEY=TEST_ENCRYPTION_KEY)
+class SyncServiceTestCase(TestCase):
+    """Shared fixtures for sync service tests"""
+
+    def setUp(self):
+        # Leases and freshness markers live in the cache, not the test database
+        metrics_registry.flush()
+        cache.clear()
+        metrics_registry.forget_registrations()
+
+    def create_account(self, username, platform='instagram', token='token'):
+        user = User.objects.create_user(
+            username=username, email=f'{username}@example.com',
+            password='password', user_type='influencer'
+        )
+        account = SocialMediaAccount(
+            user=user, platform=platform,
+            platform_user_id=f'{username}-id', username=username
+        )
+        account.set_access_token(token)
+        account.save()
+        return account
+
+
+class SyncAllAccountsTest(SyncServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.service = SocialMediaSyncService()
+        self.ok_accounts = [self.create_account(f'ok{i}', platform) for i, platform in
+                            enumerate(['instagram', 'youtube', 'instagram', 'youtube'])]
+        self.bad_account = self.create_account('bad', token='bad-token')
+
+    def mock_client_factory(self):
+        def get_client(platform, access_token, refresh_token=None):
+            client = mock.Mock()
+            if access_token == 'bad-token':
+                client.get_engagement_metrics.side_effect = APIError('boom')
+            else:
+                client.get_engagement_metrics.return_value = fake_metrics(1000)
+            return client
+        return get_client
+
+    def assert_sweep_accounting(self):
+        with mock.patch('social_media.sync_service.get_api_client', side_effect=self.mock_client_factory()):
+            job_id = self.service.sync_all_accounts()
+
+        job = SyncJob.objects.get(job_id=job_id)
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.accounts_processed, 5)
+        self.assertEqual(job.accounts_successful, 4)
+        self.assertEqual(job.accounts_failed, 1)
+        self.assertEqual(list(job.error_details), [str(self.bad_account.id)])
+        self.assertEqual(FollowerHistory.objects.count(), 4)
+
+        self.bad_account.refresh_from_db()
+        self.assertEqual(self.bad_account.sync_error_count, 1)
+
+    @override_settings(SOCIAL_SYNC_CONCURRENT=True)
+    def test_concurrent_sweep_accounting(self):
+        self.assert_sweep_accounting()
+
+    @override_settings(SOCIAL_SYNC_CONCURRENT=False)
+    def test_sequential_sweep_accounting(self):
+        self.assert_sweep_accounting()
+
+    @override_settings(SOCIAL_SYNC_CONCURRENT=False)
+    def test_sweep_writes_are_batched(self):
+        accounts = SocialMediaAccount.objects.select_related('user')
+        with mock.patch('social_media.sync_service.get_api_client', side_effect=self.mock_client_factory()):
+            with CaptureQueriesContext(connection) as ctx:
+                self.service._sync_accounts(accounts)
+
+        history_inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "social_media_followerhistory"')]
+        account_updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "social_media_socialmediaaccount"')]
+        self.assertEqual(len(history_inserts), 1)
+        self.assertEqual(len(account_updates), 1)
+        self.assertEqual(FollowerHistory.objects.count(), 4)
+
+
+class ShardedSyncTest(SyncServiceTestCase):
+
+    def test_merge_shard_results_includes_failed_shards(self):
+        service = SocialMediaSyncService()
+        job = SyncJob.objects.create(job_id='sharded', job_type='full_sync', status='running')
+
+        service.merge_shard_results('sharded', [
+            {'status': 'success', 'processed': 3, 'successful': 2, 'failed': 1, 'error_details': {'7': 'boom'}},
+            {'status': 'failed', 'account_ids': [8, 9], 'error': 'worker lost'},
+        ])
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.accounts_processed, 5)
+        self.assertEqual(job.accounts_successful, 2)
+        self.assertEqual(job.accounts_failed, 3)
+        self.assertEqual(job.error_details, {'7': 'boom', '8': 'worker lost', '9': 'worker lost'})
+
+    def test_failed_finalize_reaches_the_daily_rollup(self):
+        SyncJob.objects.create(job_id='sharded', job_type='full_sync', status='running', shard_count=1)
+
+        with mock.patch.object(sync_service, 'merge_shard_results', side_effect=RuntimeError('lost')):
+            result = finalize_sharded_sync([{'status': 'success'}], 'sharded')
+
+        self.assertEqual(result['status'], 'failed')
+        self.assertEqual(SyncJob.objects.get(job_id='sharded').status, 'failed')
+        self.assertEqual(SyncJobDailyStats.objects.get(job_type='full_sync', status='failed').job_count, 1)
+
+
+class InfluencerProfileRollupTest(SyncServiceTestCase):
+
+    def test_rollup_uses_latest_history_per_account(self):
+        instagram = self.create_account('creator')
+        youtube = SocialMediaAccount.objects.create(
+            user=instagram.user, platform='youtube', platform_user_id='yt', username='creator'
+        )
+        profile = InfluencerProfile.objects.create(user=instagram.user)
+
+        FollowerHistory.objects.create(social_account=instagram, follower_count=1, engagement_rate=9)
+        FollowerHistory.objects.create(social_account=instagram, follower_count=100, engagement_rate=2,
+                                       likes_count=40)
+        FollowerHistory.objects.create(social_account=youtube, follower_count=50, engagement_rate=4,
+                                       likes_count=10, views_count=500)
+
+        with self.assertNumQueries(3):
+            SocialMediaSyncService()._update_influencer_profiles([instagram.user_id])
+
+        profile.refresh_from_db()
+        self.assertEqual(profile.followers_count, 150)
+        self.assertEqual(float(profile.engagement_rate), 3.0)
+        self.assertEqual(profile.latest_product_review_likes, 50)
+        self.assertEqual(profile.latest_product_review_views, 500)
+        self.assertEqual(profile.most_viewed_content_views, 500)
+
+
+class StreamingTest(SyncServiceTestCase):
+
+    def test_queryset_chunks_pages_by_primary_key(self):
+        accounts = [self.create_account(f'stream{i}') for i in range(5)]
+
+        chunks = list(queryset_chunks(SocialMediaAccount.objects.all(), chunk_size=2))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual([a.pk for chunk in chunks for a in chunk], [a.pk for a in accounts])
+
+    def test_cleanup_deletes_in_chunks(self):
+        account = self.create_account('old')
+        FollowerHistory.objects.bulk_create([
+            FollowerHistory(social_account=account, follower_count=i) for i in range(5)
+        ])
+        FollowerHistory.objects.update(recorded_at=timezone.now() - timedelta(days=120))
+        FollowerHistory.objects.create(social_account=account, follower_count=99)
+
+        service = SocialMediaSyncService()
+        deleted = service._delete_in_chunks(
+            FollowerHistory.objects.filter(recorded_at__lt=timezone.now() - timedelta(days=90)), chunk_size=2
+        )
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(list(FollowerHistory.objects.values_list('follower_count', flat=True)), [99])
+
+
+class SyncLeaseTest(SyncServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.service = SocialMediaSyncService()
+        self.account = self.create_account('leased')
+        self.client_patch = mock.patch('social_media.sync_service.get_api_client')
+        self.get_api_client = self.client_patch.start()
+        self.get_api_client.return_value.get_engagement_metrics.return_value = fake_metrics(10)
+        self.addCleanup(self.client_patch.stop)
+
+    def test_fresh_account_reuses_last_result(self):
+        self.assertTrue(self.service.sync_single_account_by_id(self.account.id))
+        self.assertTrue(self.service.sync_single_account_by_id(self.account.id))
+
+        self.assertEqual(self.get_api_client.call_count, 1)
+        self.assertEqual(FollowerHistory.objects.count(), 1)
+
+    @override_settings(SOCIAL_SYNC_FRESHNESS_SECONDS=0)
+    def test_leased_account_is_not_synced_twice(self):
+        lease = self.service._acquire_lease(self.account)
+
+        self.assertTrue(self.service.sync_single_account_by_id(self.account.id))
+        self.assertFalse(self.get_api_client.called)
+
+        self.service._release_lease(self.account, lease)
+        self.assertTrue(self.service.sync_single_account_by_id(self.account.id))
+        self.assertEqual(FollowerHistory.objects.count(), 1)
+
+
+@override_settings(SOCIAL_SYNC_CONCURRENT=False, SOCIAL_SYNC_FRESHNESS_SECONDS=0)
+class ResumableSyncTest(SyncServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.service = SocialMediaSyncService()
+        self.accounts = [self.create_account(f'resume{i}') for i in range(5)]
+        self.client_patch = mock.patch('social_media.sync_service.get_api_client')
+        self.get_api_client = self.client_patch.start()
+        self.get_api_client.return_value.get_engagement_metrics.return_value = fake_metrics(10)
+        self.addCleanup(self.client_patch.stop)
+
+    @override_settings(SOCIAL_SYNC_CHUNK_SIZE=2)
+    def test_interrupted_sweep_resumes_from_checkpoint(self):
+        original_sync = self.service._sync_accounts
+        calls = []
+
+        def crash_on_second_chunk(accounts, **kwargs):
+            calls.append(accounts)
+            if len(calls) == 2:
+                raise RuntimeError('worker lost')
+            return original_sync(accounts, **kwargs)
+
+        with mock.patch.object(self.service, '_sync_accounts', side_effect=crash_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self.service.sync_all_accounts()
+
+        job = SyncJob.objects.get()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.checkpoint_account_id, self.accounts[1].pk)
+        self.assertEqual(job.accounts_processed, 2)
+
+        job_id = self.service.sync_all_accounts(resume=True)
+
+        job.refresh_from_db()
+        self.assertEqual(job_id, job.job_id)
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.accounts_processed, 5)
+        self.assertEqual(job.accounts_successful, 5)
+        self.assertNotIn('error', job.error_details)
+        self.assertEqual(self.get_api_client.call_count, 5)
+
+    def test_live_job_is_not_resumed(self):
+        SyncJob.objects.create(job_id='live', job_type='full_sync', status='running',
+                               started_at=timezone.now(), checkpoint_account_id=self.accounts[0].pk)
+
+        job_id = self.service.sync_all_accounts(resume=True)
+
+        self.assertNotEqual(job_id, 'live')
+        self.assertEqual(SyncJob.objects.get(job_id=job_id).accounts_processed, 5)
+
+    def test_sharded_parent_job_is_not_resumed(self):
+        SyncJob.objects.create(job_id='sharded', job_type='full_sync', status='running', shard_count=3,
+                               started_at=timezone.now() - timedelta(days=1))
+
+        job_id = self.service.sync_all_accounts(resume=True)
+
+        self.assertNotEqual(job_id, 'sharded')
+        self.assertEqual(SyncJob.objects.get(job_id='sharded').status, 'running')
+        with self.assertRaises(ValueError):
+            self.service.sync_all_accounts(resume_job_id='sharded')
+
+
+class SyncSchedulerTest(SyncServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.scheduler = SyncScheduler()
+        now = timezone.now()
+        self.dormant = self.create_account('dormant')
+        self.volatile = self.create_account('volatile')
+        self.stale = self.create_account('stale')
+        self.fresh = self.create_account('fresh')
+        SocialMediaAccount.objects.filter(pk__in=[self.dormant.pk, self.volatile.pk]).update(
+            last_sync=now - timedelta(hours=2))
+        SocialMediaAccount.objects.filter(pk=self.stale.pk).update(last_sync=now - timedelta(hours=10))
+        SocialMediaAccount.objects.filter(pk=self.fresh.pk).update(last_sync=now)
+        FollowerHistory.objects.create(social_account=self.volatile, follower_count=1000)
+        FollowerHistory.objects.create(social_account=self.volatile, follower_count=500)
+
+    @override_settings(SOCIAL_SYNC_TICK_BUDGET={'default': 10})
+    def test_plan_orders_by_priority_and_skips_fresh_accounts(self):
+        plan = self.scheduler.build_plan()
+
+        self.assertEqual(plan['instagram'], [self.volatile.pk, self.stale.pk, self.dormant.pk])
+
+    @override_settings(SOCIAL_SYNC_TICK_BUDGET={'default': 2})
+    def test_ticks_consume_the_plan_within_budget(self):
+        self.scheduler.refresh_plan()
+
+        self.assertEqual(self.scheduler.next_batch(), [self.volatile.pk, self.stale.pk])
+        self.assertEqual(self.scheduler.next_batch(), [self.dormant.pk])
+
+
+@override_settings(SOCIAL_SYNC_CONCURRENT=False, SOCIAL_SYNC_FRESHNESS_SECONDS=0,
+                   SOCIAL_SYNC_CHANGE_DETECTION=True)
+class ChangeDetectionTest(SyncServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.service = SocialMediaSyncService()
+        self.account = self.create_account('steady')
+        self.client_patch = mock.patch('social_media.sync_service.get_api_client')
+        self.get_api_client = self.client_patch.start()
+        self.metrics = self.get_api_client.return_value.get_engagement_metrics
+        self.addCleanup(self.client_patch.stop)
+
+    def sync(self, follower_count):
+        self.metrics.return_value = fake_metrics(follower_count)
+        self.service._sync_accounts(SocialMediaAccount.objects.filter(pk=self.account.pk))
+
+    def test_identical_snapshots_extend_the_previous_row(self):
+        self.sync(100)
+        self.sync(100)
+        self.sync(100)
+        self.sync(120)
+
+        rows = list(FollowerHistory.objects.order_by('recorded_at'))
+        self.assertEqual([row.follower_count for row in rows], [100, 120])
+        self.assertEqual([row.sample_count for row in rows], [3, 1])
+        self.assertGreater(rows[0].last_seen_at, rows[0].recorded_at)
+        self.assertIsNone(rows[1].last_seen_at)
+
+    def test_last_updated_reports_the_end_of_the_run(self):
+        self.sync(100)
+        FollowerHistory.objects.update(recorded_at=timezone.now() - timedelta(hours=3))
+        self.sync(100)
+        self.sync(100)
+
+        row = FollowerHistory.objects.get()
+        self.assertEqual(row.sample_count, 3)
+        self.client.force_login(self.account.user)
+
+        response = self.client.get('/api/social-media/stats/follower/')
+
+        self.assertEqual(response.status_code, 200)
+        last_updated = response.data['platform_breakdown']['instagram']['last_updated']
+        self.assertEqual(last_updated, row.last_seen_at)
+        self.assertGreater(last_updated, row.recorded_at)
+
+    def test_encoded_rows_are_read_over_their_validity_window(self):
+        self.sync(100)
+        FollowerHistory.objects.update(recorded_at=timezone.now() - timedelta(days=120))
+        self.sync(100)
+
+        now = timezone.now()
+        self.assertEqual(FollowerHistory.objects.valid_during(now - timedelta(days=1), now).count(), 1)
+
+        self.service.cleanup_old_data(days=90)
+        self.assertEqual(FollowerHistory.objects.count(), 1)
+
+
+@override_settings(SOCIAL_SYNC_CONCURRENT=False, YOUTUBE_API_KEY='key')
+class HandleOnlyAccountTest(SyncServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.service = SocialMediaSyncService()
+        self.oauth_account = self.create_account('oauth')
+        user = User.objects.create_user(username='handle', email='handle@example.com',
+                                        password='password', user_type='influencer')
+        self.handle_account = SocialMediaAccount.objects.create(
+            user=user, platform='youtube', platform_user_id='handle', username='handle',
+            encrypted_access_token=SocialMediaAccount.AUTO_CREATED_TOKEN
+        )
+        FollowerHistory.objects.create(social_account=self.handle_account, follower_count=10,
+                                       engagement_rate=4, sync_source='profile_data')
+
+    def test_full_sync_only_sees_oauth_accounts(self):
+        with mock.patch('social_media.sync_service.get_api_client') as get_api_client:
+            get_api_client.return_value.get_engagement_metrics.return_value = fake_metrics(10)
+            job_id = self.service.sync_all_accounts()
+
+        self.assertEqual(SyncJob.objects.get(job_id=job_id).accounts_processed, 1)
+        self.assertEqual(get_api_client.call_count, 1)
+        self.handle_account.refresh_from_db()
+        self.assertEqual(self.handle_account.sync_error_count, 0)
+
+    def test_handle_only_account_uses_public_source(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'items': [{'statistics': {'subscriberCount': '250', 'videoCount': '12'}}]}
+
+        with mock.patch.object(get_session('youtube_api'), 'get', return_value=response) as get, \
+                mock.patch('social_media.sync_service.get_api_client') as get_api_client:
+            results = self.service._sync_accounts(SocialMediaAccount.objects.handle_only())
+
+        self.assertEqual(results['successful'], 1)
+        self.assertFalse(get_api_client.called)
+        self.assertEqual(get.call_args.kwargs['params']['forHandle'], '@handle')
+
+        latest = self.handle_account.follower_history.order_by('-recorded_at').first()
+        self.assertEqual(latest.follower_count, 250)
+        self.assertEqual(latest.sync_source, 'public')
+        self.assertEqual(float(latest.engagement_rate), 4.0)
+
+
+# Eager tasks share the test process's local memory cache
+@override_settings(SOCIAL_SYNC_DEBOUNCE_SECONDS=30, CELERY_TASK_ALWAYS_EAGER=True)
+class DebouncedUserSyncTest(SyncServiceTestCase):
+
+    def test_burst_of_edits_queues_one_delayed_task(self):
+        with mock.patch('social_media.tasks.debounced_user_sync.apply_async') as apply_async:
+            for _ in range(5):
+                schedule_debounced_user_sync(42)
+
+        apply_async.assert_called_once_with((42,), countdown=30)
+
+    def test_task_waits_for_edits_to_settle(self):
+        with mock.patch('social_media.tasks.debounced_user_sync.apply_async') as apply_async, \
+                mock.patch('social_media.tasks.sync_user_social_accounts.delay') as delay:
+            schedule_debounced_user_sync(42)
+            result = debounced_user_sync(42)
+            self.assertEqual(result['status'], 'rescheduled')
+            self.assertFalse(delay.called)
+
+            cache.set('social_sync_debounce_edit:42', time.time() - 60)
+            result = debounced_user_sync(42)
+
+        self.assertEqual(result['status'], 'dispatched')
+        delay.assert_called_once_with(42)
+        self.assertEqual(apply_async.call_count, 2)
+        self.assertIsNone(cache.get('social_sync_debounce_pending:42'))
+
+    def test_missing_edit_timestamp_still_syncs_and_rearms(self):
+        with mock.patch('social_media.tasks.debounced_user_sync.apply_async') as apply_async, \
+                mock.patch('social_media.tasks.sync_user_social_accounts.delay') as delay:
+            schedule_debounced_user_sync(42)
+            cache.delete('social_sync_debounce_edit:42')
+
+            result = debounced_user_sync(42)
+            self.assertEqual(result['status'], 'dispatched')
+            delay.assert_called_once_with(42)
+
+            # An edit after the dispatch is not folded into the finished task
+            schedule_debounced_user_sync(42)
+
+        self.assertEqual(apply_async.call_count, 2)
+
+    @override_settings(CELERY_TASK_ALWAYS_EAGER=False)
+    def test_process_local_cache_skips_the_debounce(self):
+        with mock.patch('social_media.tasks.debounced_user_sync.apply_async') as apply_async, \
+                mock.patch('social_media.tasks.sync_user_social_accounts.delay') as delay:
+            schedule_debounced_user_sync(42)
+            schedule_debounced_user_sync(42)
+
+        self.assertFalse(apply_async.called)
+        self.assertEqual(delay.call_count, 2)
+        self.assertIsNone(cache.get('social_sync_debounce_pending:42'))
+
+
+@override_settings(SOCIAL_SYNC_CONCURRENT=True, SOCIAL_SYNC_PLATFORM_CONCURRENCY={'default': 2})
+class SyncPlannerTest(SyncServiceTestCase):
+
+    def test_plan_counts_calls_quota_skips_and_duration(self):
+        service = SocialMediaSyncService()
+        youtube = [self.create_account(f'yt{i}', 'youtube') for i in range(3)]
+        fresh = self.create_account('fresh', 'instagram')
+        leased = self.create_account('leased', 'instagram')
+        SocialMediaAccount.objects.filter(pk=fresh.pk).update(last_sync=timezone.now())
+        service._acquire_lease(leased)
+        service._record_latency('youtube', 2.0)
+
+        plan = SyncPlanner(service).plan(SocialMediaAccount.objects.all())
+
+        self.assertEqual(plan['sources']['youtube']['http_calls'], 9)
+        self.assertEqual(plan['sources']['youtube']['quota_units'], 9)
+        self.assertEqual(plan['sources']['youtube']['estimated_seconds'], 4.0)
+        self.assertEqual(plan['sources']['instagram']['skipped']['fresh'], [fresh.pk])
+        self.assertEqual(plan['sources']['instagram']['skipped']['leased'], [leased.pk])
+        self.assertEqual(plan['sources']['instagram']['http_calls'], 0)
+        self.assertEqual(plan['estimated_seconds'], 4.0)
+
+    @override_settings(SOCIAL_API_DAILY_QUOTA={'youtube': 10}, SOCIAL_API_QUOTA_RESERVE=0)
+    def test_planned_accounts_use_up_the_remaining_quota(self):
+        youtube = [self.create_account(f'yt{i}', 'youtube') for i in range(5)]
+
+        plan = SyncPlanner(SocialMediaSyncService()).plan(SocialMediaAccount.objects.order_by('pk'))
+
+        entry = plan['sources']['youtube']
+        self.assertEqual(entry['to_sync'], 3)
+        self.assertEqual(entry['quota_units'], 9)
+        self.assertEqual(entry['skipped']['quota_exhausted'], [account.pk for account in youtube[3:]])
+
+    def test_dry_run_command_prints_plan(self):
+        self.create_account('planned', 'youtube')
+        out = StringIO()
+
+        call_command('sync_social_accounts', '--all', '--dry-run', stdout=out)
+
+        self.assertIn('Plan: 1 accounts, 3 HTTP calls, 3 YouTube quota units', out.getvalue())
+        self.assertIn('0 circuit open, 0 over quota', out.getvalue())
+        self.assertFalse(FollowerHistory.objects.exists())
+
+    @override_settings(SOCIAL_API_DAILY_QUOTA={'youtube': 3}, SOCIAL_API_QUOTA_RESERVE=0)
+    def test_dry_run_command_prints_accounts_over_quota(self):
+        self.create_account('planned', 'youtube')
+        self.create_account('over', 'youtube')
+        out = StringIO()
+
+        call_command('sync_social_accounts', '--all', '--dry-run', stdout=out)
+
+        self.assertIn('1 over quota', out.getvalue())
+
+
+@override_settings(SOCIAL_API_CIRCUIT_BREAKER={'error_rate': 0.5, 'min_requests': 4, 'window_seconds': 60,
+                                               'open_seconds': 120, 'probe_timeout': 60})
+class CircuitBreakerTest(SyncServiceTestCase):
+
+    def failing_client(self):
+        client = InstagramGraphAPIClient('token')
+        client.session = mock.Mock()
+        client.session.request.return_value = mock.Mock(status_code=503, text='down')
+        client.session.request.return_value.json.return_value = {}
+        return client
+
+    def test_failures_open_the_circuit_and_probe_closes_it(self):
+        client = self.failing_client()
+        for _ in range(4):
+            with self.assertRaises(APIError):
+                client.get_user_profile()
+
+        with self.assertRaises(CircuitOpenError):
+            client.get_user_profile()
+        self.assertEqual(client.session.request.call_count, 4)
+
+        breaker = get_circuit_breaker('instagram')
+        with mock.patch('social_media.circuit_breaker.time.time', return_value=time.time() + 121):
+            self.assertEqual(breaker.get_state(), CircuitBreaker.HALF_OPEN)
+            client.session.request.return_value = mock.Mock(status_code=200, headers={})
+            client.session.request.return_value.json.return_value = {'id': '1'}
+            self.assertEqual(client.get_user_profile(), {'id': '1'})
+
+        self.assertEqual(breaker.get_state(), CircuitBreaker.CLOSED)
+
+    @override_settings(SOCIAL_SYNC_CONCURRENT=False)
+    def test_sweep_skips_accounts_while_circuit_is_open(self):
+        account = self.create_account('outage')
+        get_circuit_breaker('instagram')._open()
+
+        with mock.patch('social_media.sync_service.get_api_client') as get_api_client:
+            results = SocialMediaSyncService()._sync_accounts([account])
+
+        self.assertFalse(get_api_client.called)
+        self.assertEqual(results['successful'], 0)
+        account.refresh_from_db()
+        self.assertEqual(account.sync_error_count, 0)
+
+
+class MetricsTest(SyncServiceTestCase):
+
+    def test_histogram_renders_cumulative_buckets(self):
+        registry = MetricsRegistry(cache_prefix='test_metrics')
+        latency = registry.histogram('test_seconds', 'Test latency', labels=('platform',), buckets=(0.1, 1.0))
+        latency.observe(0.05, platform='instagram')
+        latency.observe(0.5, platform='instagram')
+        latency.observe(5, platform='instagram')
+
+        output = registry.render()
+
+        self.assertIn('test_seconds_bucket{platform="instagram",le="0.1"} 1', output)
+        self.assertIn('test_seconds_bucket{platform="instagram",le="1.0"} 2', output)
+        self.assertIn('test_seconds_bucket{platform="instagram",le="+Inf"} 3', output)
+        self.assertIn('test_seconds_count{platform="instagram"} 3', output)
+        self.assertIn('test_seconds_sum{platform="instagram"} 5.55', output)
+
+    @override_settings(SOCIAL_SYNC_CONCURRENT=False, METRICS_AUTH_TOKEN='secret')
+    def test_metrics_endpoint_exposes_sync_outcomes(self):
+        account = self.create_account('measured')
+        with mock.patch('social_media.sync_service.get_api_client') as get_api_client:
+            get_api_client.return_value.get_engagement_metrics.return_value = fake_metrics(10)
+            SocialMediaSyncService()._sync_accounts([account])
+
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('social_sync_outcomes_total{platform="instagram",outcome="success"} 1', response.content.decode())
+
+    @override_settings(METRICS_AUTH_TOKEN='')
+    def test_metrics_endpoint_without_token_is_staff_only(self):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+
+        staff = User.objects.create_user(username='ops', email='ops@example.com', password='password', is_staff=True)
+        self.client.force_login(staff)
+
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICS_AUTH_TOKEN='secret')
+    def test_metrics_endpoint_rejects_non_ascii_token(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s\u00e9cret')
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_samples_are_buffered_until_flushed(self):
+        registry = MetricsRegistry(cache_prefix='test_metrics')
+        latency = registry.histogram('test_seconds', 'Test latency', labels=('view',))
+
+        with mock.patch.object(cache, 'incr', wraps=cache.incr) as incr, \
+                mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            for _ in range(10):
+                latency.observe(0.2, view='home')
+            self.assertEqual(add.call_count + incr.call_count, 0)
+
+            registry.flush()
+
+        self.assertLessEqual(incr.call_count, 3)  # one write per key for all ten samples
+        self.assertIn('test_seconds_count{view="home"} 10', registry.render())
+
+    def test_samples_flush_once_the_interval_has_passed(self):
+        registry = MetricsRegistry(cache_prefix='test_metrics')
+        requests_total = registry.counter('test_total', 'Test counter')
+
+        requests_total.inc()
+        self.assertIsNone(cache.get('test_metrics:test_total:'))
+        with mock.patch('social_media.metrics.time.monotonic', return_value=time.monotonic() + registry.FLUSH_SECONDS):
+            requests_total.inc()
+
+        self.assertEqual(cache.get('test_metrics:test_total:'), 2)
+
+    def test_concurrent_registrations_keep_every_series(self):
+        registry = MetricsRegistry(cache_prefix='test_metrics')
+        web = registry.counter('test_total', 'Test counter', labels=('process',))
+        # A second process holding the same metric definition
+        worker = MetricsRegistry(cache_prefix='test_metrics').counter('test_total', 'Test counter', labels=('process',))
+
+        web.inc(process='gunicorn')
+        worker.inc(process='celery')
+        registry.flush()
+        worker.registry.flush()
+        with mock.patch.object(cache, 'add', wraps=cache.add) as add:
+            web.inc(process='gunicorn')
+            registry.flush()
+
+        self.assertEqual(add.call_count, 1)  # only the counter itself, registration is memoised
+        output = registry.render()
+        self.assertIn('test_total{process="gunicorn"} 2', output)
+        self.assertIn('test_total{process="celery"} 1', output)
+
+        cache.clear()
+        registry.forget_registrations()
+        web.inc(process='gunicorn')
+        self.assertIn('test_total{process="gunicorn"} 1', registry.render())
+
+
+@override_settings(SOCIAL_SYNC_CONCURRENT=False, SOCIAL_SYNC_PROGRESS_INTERVAL=0)
+class SyncProgressTest(SyncServiceTestCase):
+
+    def test_user_sync_publishes_progress_per_account(self):
+        first = self.create_account('progress')
+        SocialMediaAccount.objects.create(
+            user=first.user, platform='youtube', platform_user_id='progress-yt',
+            username='progress-yt', encrypted_access_token=first.encrypted_access_token
+        )
+        snapshots = []
+        publish = progress_module.publish_progress
+
+        def record(*args, **kwargs):
+            snapshots.append(publish(*args, **kwargs))
+            return snapshots[-1]
+
+        with mock.patch('social_media.progress.publish_progress', side_effect=record), \
+                mock.patch('social_media.sync_service.get_api_client') as get_api_client:
+            get_api_client.return_value.get_engagement_metrics.return_value = fake_metrics(10)
+            job_id = SocialMediaSyncService().sync_user_accounts(first.user_id, job_id='job-progress')
+
+        self.assertEqual(job_id, 'job-progress')
+        running = [s for s in snapshots if s['status'] == 'running']
+        self.assertEqual([s['accounts_processed'] for s in running], [0, 1, 2])
+        self.assertEqual(running[-1]['accounts_total'], 2)
+        self.assertEqual(get_progress('job-progress')['status'], 'completed')
+
+    def test_job_status_returns_finished_snapshot(self):
+        account = self.create_account('poller')
+        sync_job = SyncJob.objects.create(job_id='job-status', job_type='user_sync', user=account.user)
+        sync_job.mark_started()
+        sync_job.accounts_processed = 1
+        sync_job.accounts_successful = 1
+        sync_job.mark_completed()
+
+        self.client.force_login(account.user)
+        response = self.client.get('/api/social-media/sync/jobs/job-status/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'completed')
+        self.assertEqual(response.json()['accounts_successful'], 1)
+        self.assertTrue(response.json()['done'])
+
+        other = self.create_account('outsider')
+        self.client.force_login(other.user)
+        response = self.client.get('/api/social-media/sync/jobs/job-status/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_job_status_reads_progress_from_the_cache(self):
+        account = self.create_account('running')
+        sync_job = SyncJob.objects.create(job_id='job-running', job_type='user_sync', user=account.user)
+        sync_job.mark_started()
+        progress_module.publish_progress(sync_job, accounts_total=4, current_platform='youtube', processed=3)
+        self.client.force_login(account.user)
+
+        response = self.client.get('/api/social-media/sync/jobs/job-running/')
+
+        self.assertEqual(response.json()['accounts_processed'], 3)
+        self.assertEqual(response.json()['current_platform'], 'youtube')
+        self.assertFalse(response.json()['done'])
+
+        cache.clear()
+        response = self.client.get('/api/social-media/sync/jobs/job-running/')
+        self.assertEqual(response.json()['status'], 'running')
+        self.assertEqual(get_progress('job-running')['status'], 'running')
+
+
+class SyncStatisticsRollupTest(SyncServiceTestCase):
+
+    def finish_job(self, job_id, status, processed, successful):
+        sync_job = SyncJob.objects.create(job_id=job_id, job_type='full_sync')
+        sync_job.mark_started()
+        sync_job.accounts_processed = processed
+        sync_job.accounts_successful = successful
+        sync_job.accounts_failed = processed - successful
+        if status == 'completed':
+            sync_job.mark_completed()
+        else:
+            sync_job.mark_failed()
+        return sync_job
+
+    def test_statistics_read_rollup_rows(self):
+        self.finish_job('job-a', 'completed', 10, 8)
+        resumed = self.finish_job('job-b', 'failed', 4, 4)
+        SyncJob.objects.create(job_id='job-c', job_type='user_sync', status='running', accounts_processed=2)
+
+        # A resumed job that finishes again replaces its earlier contribution
+        resumed.accounts_processed = 6
+        resumed.accounts_successful = 5
+        resumed.accounts_failed = 1
+        resumed.mark_completed()
+
+        self.assertEqual(SyncJobDailyStats.objects.get(status='completed').job_count, 2)
+        self.assertEqual(SyncJobDailyStats.objects.get(status='completed').accounts_processed, 16)
+        self.assertFalse(SyncJobDailyStats.objects.filter(status='failed').exists())
+
+        with self.assertNumQueries(2):
+            stats = SocialMediaSyncService().get_sync_statistics(days=7)
+
+        self.assertEqual(stats['total_jobs'], 3)
+        self.assertEqual(stats['completed_jobs'], 2)
+        self.assertEqual(stats['running_jobs'], 1)
+        self.assertEqual(stats['total_accounts_processed'], 18)
+        self.assertEqual(stats['total_accounts_successful'], 13)
+
+    def test_rollup_failure_keeps_the_job_status(self):
+        with mock.patch.object(SyncJobDailyStats, 'record_job', side_effect=RuntimeError('locked')):
+            sync_job = self.finish_job('job-d', 'completed', 3, 3)
+
+        sync_job.refresh_from_db()
+        self.assertEqual(sync_job.status, 'completed')
+        self.assertEqual(get_progress('job-d')['status'], 'completed')
+
+    def test_restarted_job_leaves_the_rollup(self):
+        sync_job = self.finish_job('job-e', 'failed', 2, 1)
+
+        sync_job.mark_started()
+
+        self.assertFalse(SyncJobDailyStats.objects.exists())
+
+
+class WriteBehindTest(SyncServiceTestCase):
+
+    def test_disabled_writer_inserts_synchronously(self):
+        account = self.create_account('direct')
+        writer = WriteBehindWriter()
+
+        with override_settings(WRITE_BEHIND_ENABLED=False):
+            writer.bulk_create([FollowerHistory(social_account=account, follower_count=5)])
+
+        self.assertEqual(account.follower_history.count(), 1)
+        self.assertIsNone(writer._thread)
+
+    def test_writer_batches_queued_rows_into_one_transaction(self):
+        account = self.create_account('queued')
+        writer = WriteBehindWriter()
+
+        with override_settings(WRITE_BEHIND_ENABLED=True), \
+                mock.patch.object(writer, '_ensure_started', return_value=queue.Queue()) as started:
+            writer.create(FollowerHistory(social_account=account, follower_count=1))
+            writer.bulk_create([FollowerHistory(social_account=account, follower_count=2)])
+            pending = started.return_value
+
+        # Nothing is written until the writer drains the queue
+        self.assertEqual(account.follower_history.count(), 0)
+        self.assertEqual(pending.qsize(), 2)
+
+        with override_settings(WRITE_BEHIND_FLUSH_SECONDS=0.01), \
+                mock.patch.object(writer, '_write', wraps=writer._write) as write:
+            self.assertEqual(writer._drain_once(pending), 2)
+
+        write.assert_called_once()
+        self.assertEqual(pending.unfinished_tasks, 0)
+        self.assertEqual(sorted(account.follower_history.values_list('follower_count', flat=True)), [1, 2])
+
+    def test_opted_out_kinds_are_written_synchronously(self):
+        account = self.create_account('audited')
+        writer = WriteBehindWriter()
+        written = []
+
+        with override_settings(WRITE_BEHIND_ENABLED=True, WRITE_BEHIND_WEBHOOK_EVENTS=False):
+            event = WebhookEvent(platform='instagram', event_type='follower_update', raw_data={})
+            writer.create(event, opt_in='WRITE_BEHIND_WEBHOOK_EVENTS', on_written=lambda: written.append(event.pk))
+
+        self.assertIsNone(writer._thread)
+        self.assertEqual(written, [event.pk])
+        self.assertTrue(WebhookEvent.objects.filter(pk=event.pk).exists())
+
+    def test_opted_in_rows_run_their_callback_once_written(self):
+        writer = WriteBehindWriter()
+        written = []
+
+        with override_settings(WRITE_BEHIND_ENABLED=True, WRITE_BEHIND_WEBHOOK_EVENTS=True), \
+                mock.patch.object(writer, '_ensure_started', return_value=queue.Queue()) as started:
+            event = WebhookEvent(platform='instagram', event_type='follower_update', raw_data={})
+            writer.create(event, opt_in='WRITE_BEHIND_WEBHOOK_EVENTS', on_written=lambda: written.append(event.pk))
+
+        self.assertEqual(written, [])
+        with override_settings(WRITE_BEHIND_FLUSH_SECONDS=0.01):
+            writer._drain_once(started.return_value)
+
+        self.assertEqual(written, [event.pk])
+        self.assertIsNotNone(event.pk)
+
+    @override_settings(WRITE_BEHIND_ENABLED=True, SOCIAL_SYNC_CONCURRENT=False)
+    def test_sweep_waits_for_queued_history_before_the_profile_rollup(self):
+        account = self.create_account('deferred')
+        profile = InfluencerProfile.objects.create(user=account.user)
+        writer = WriteBehindWriter()
+        pending = queue.Queue()
+
+        def drain(timeout=10.0):
+            while pending.qsize():
+                writer._drain_once(pending)
+            return True
+
+        with mock.patch('social_media.sync_service.write_behind', writer), \
+                mock.patch.object(writer, '_ensure_started', return_value=pending), \
+                mock.patch.object(writer, 'flush', side_effect=drain), \
+                override_settings(WRITE_BEHIND_FLUSH_SECONDS=0.01), \
+                mock.patch('social_media.sync_service.get_api_client') as get_api_client:
+            get_api_client.return_value.get_engagement_metrics.return_value = fake_metrics(10)
+            SocialMediaSyncService().sync_accounts_in_chunks(SocialMediaAccount.objects.all())
+
+        profile.refresh_from_db()
+        self.assertEqual(profile.followers_count, 10)
+        self.assertEqual(account.follower_history.count(), 1)
+
+
+class PooledHTTPTest(TestCase):
+
+    def test_clients_share_one_session_per_platform(self):
+        first = InstagramGraphAPIClient('token-a')
+        second = InstagramGraphAPIClient('token-b')
+
+        self.assertIs(first.session, second.session)
+        self.assertIs(first.session, get_session('instagram_api'))
+
+    @override_settings(SOCIAL_HTTP={'connect_timeout': 3, 'read_timeout': 20, 'pool_maxsize': 8})
+    def test_session_applies_pool_size_and_timeouts(self):
+        session = build_session()
+        adapter = session.get_adapter('https://graph.facebook.com')
+
+        self.assertEqual(adapter._pool_maxsize, 8)
+        with mock.patch('requests.Session.request') as request:
+            session.get('https://graph.facebook.com/me')
+            session.get('https://graph.facebook.com/me', timeout=15)
+
+        self.assertEqual(request.call_args_list[0].kwargs['timeout'], (3, 20))
+        self.assertEqual(request.call_args_list[1].kwargs['timeout'], (3, 15))
+
+    @override_settings(SOCIAL_HTTP={'connect_timeout': 1, 'read_timeout': 0.2, 'retries': 3, 'backoff_factor': 0})
+    def test_read_timeouts_are_not_retried(self):
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen()
+        self.addCleanup(listener.close)
+        accepted = []
+
+        def accept_and_hang():
+            # Accept connections but never answer, like a hung API
+            while True:
+                try:
+                    accepted.append(listener.accept()[0])
+                except OSError:
+                    return
+
+        threading.Thread(target=accept_and_hang, daemon=True).start()
+        url = f"http://127.0.0.1:{listener.getsockname()[1]}/me"
+
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            build_session().get(url)
+
+        self.assertEqual(len(accepted), 1)
+        for connection_socket in accepted:
+            connection_socket.close()
+
+    def test_retry_gives_up_on_long_retry_after(self):
+        retry = CappedRetry(total=3, status_forcelist=(429,), max_retry_after=30)
+
+        short = HTTPResponse(status=429, headers={'Retry-After': '2'})
+        self.assertEqual(retry.increment('GET', '/me', response=short).max_retry_after, 30)
+
+        long = HTTPResponse(status=429, headers={'Retry-After': '600'})
+        with self.assertRaises(MaxRetryError):
+            retry.increment('GET', '/me', response=long)
+
+
+@override_settings(SOCIAL_SYNC_ASYNC=True)
+class AsyncSyncTest(SyncServiceTestCase):
+
+    def test_oauth_accounts_are_fetched_on_the_event_loop(self):
+        accounts = [self.create_account(f'async{i}') for i in range(3)]
+        in_flight = []
+
+        class FakeAsyncClient:
+            async def get_engagement_metrics(self, **kwargs):
+                in_flight.append(1)
+                await asyncio.sleep(0.01)
+                return fake_metrics(100 + len(in_flight))
+
+        class FakeHTTP:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        with mock.patch('social_media.sync_service.async_clients_available', return_value=True), \
+                mock.patch('social_media.sync_service.build_async_client', return_value=FakeHTTP()), \
+                mock.patch('social_media.sync_service.get_async_api_client', return_value=FakeAsyncClient()), \
+                mock.patch('social_media.sync_service.get_api_client') as get_api_client:
+            results = SocialMediaSyncService()._sync_accounts(accounts)
+
+        self.assertEqual(results['processed'], 3)
+        self.assertEqual(results['successful'], 3)
+        self.assertFalse(get_api_client.called)
+        self.assertEqual(FollowerHistory.objects.filter(social_account__in=accounts).count(), 3)
+
+    def test_cache_calls_run_off_the_event_loop(self):
+        loop_threads, cache_threads = [], []
+
+        channel = {
+            'id': 'UCabc', 'snippet': {'title': 'Chan', 'description': '', 'thumbnails': {'default': {'url': ''}}},
+            'statistics': {'subscriberCount': '100', 'videoCount': '0', 'viewCount': '0'},
+            'contentDetails': {'relatedPlaylists': {'uploads': 'UUabc'}},
+        }
+
+        def handler(request):
+            return httpx.Response(200, json={'items': [channel]}, headers={'ETag': '"v1"'})
+
+        async def fetch():
+            loop_threads.append(threading.get_ident())
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+                return await AsyncYouTubeAPIClient('token', http=http).get_user_profile()
+
+        def tracked(name):
+            original = getattr(LocMemCache, name)
+
+            def call(*args, **kwargs):
+                cache_threads.append(threading.get_ident())
+                return original(*args, **kwargs)
+            return mock.patch.object(LocMemCache, name, autospec=True, side_effect=call)
+
+        with tracked('get'), tracked('set'), tracked('add'), tracked('incr'), tracked('touch'):
+            async_to_sync(fetch)()
+
+        # Breaker, quota counter and response cache entry were all read and written
+        self.assertGreaterEqual(len(cache_threads), 4)
+        self.assertNotIn(loop_threads[0], cache_threads)
+
+    def test_retry_delay_backs_off_and_defers_long_retry_after(self):
+        client = AsyncYouTubeAPIClient('token')
+        config = {'backoff_factor': 0.5, 'backoff_max': 10, 'max_retry_after': 30}
+
+        self.assertIsNone(client._retry_delay(mock.Mock(status_code=404, headers={}), 0, config))
+        self.assertEqual(client._retry_delay(mock.Mock(status_code=503, headers={}), 2, config), 2.0)
+        self.assertEqual(client._retry_delay(mock.Mock(status_code=429, headers={'Retry-After': '5'}), 0, config), 5.0)
+        self.assertIsNone(client._retry_delay(mock.Mock(status_code=429, headers={'Retry-After': '600'}), 0, config))
+
+
+class BulkLookupTest(SyncServiceTestCase):
+
+    @mock.patch('social_media.views.BULK_LOOKUP_INTERVAL', 0.05)
+    def test_lookups_overlap_within_the_concurrency_and_pacing_caps(self):
+        user = User.objects.create_user(username='brand', email='brand@example.com', password='password')
+        self.client.force_login(user)
+        starts, in_flight, peak = [], [], [0]
+        lock = threading.Lock()
+
+        def lookup(username, method):
+            with lock:
+                starts.append(time.monotonic())
+                in_flight.append(username)
+                peak[0] = max(peak[0], len(in_flight))
+            time.sleep(0.2)
+            with lock:
+                in_flight.remove(username)
+            if username == 'missing':
+                raise ValueError('not found')
+            return {'username': username}
+
+        usernames = ['a', 'b', 'c', 'd', 'missing']
+        with mock.patch('social_media.public_lookup.public_lookup_service.lookup_instagram_user', side_effect=lookup):
+            response = self.client.post('/api/social-media/lookup/bulk/', json.dumps({'usernames': usernames}),
+                                        content_type='application/json')
+
+        self.assertEqual([result['username'] for result in response.data['results']], usernames)
+        self.assertEqual(response.data['successful'], 4)
+        self.assertEqual(response.data['results'][-1]['error'], 'not found')
+        self.assertLessEqual(peak[0], 3)
+        self.assertGreater(peak[0], 1)
+        starts.sort()
+        self.assertTrue(all(later - earlier >= 0.04 for earlier, later in zip(starts, starts[1:])))
+
+
+@override_settings(SOCIAL_API_DAILY_QUOTA={'youtube': 1000}, SOCIAL_API_QUOTA_RESERVE=0.1)
+class YouTubeQuotaTest(SyncServiceTestCase):
+
+    def fake_response(self, payload):
+        return mock.Mock(status_code=200, headers={}, json=mock.Mock(return_value=payload))
+
+    def test_engagement_reads_uploads_playlist_and_spends_three_units(self):
+        channel = {
+            'id': 'UCabc', 'snippet': {'title': 'Chan', 'description': '', 'thumbnails': {'default': {'url': ''}}},
+            'statistics': {'subscriberCount': '100', 'videoCount': '2', 'viewCount': '500'},
+            'contentDetails': {'relatedPlaylists': {'uploads': 'UUabc'}},
+        }
+        responses = {
+            'channels': self.fake_response({'items': [channel]}),
+            'playlistItems': self.fake_response({'items': [{'contentDetails': {'videoId': 'v1'}}]}),
+            'videos': self.fake_response({'items': [{'statistics': {'likeCount': '4', 'commentCount': '1'}}]}),
+        }
+        client = YouTubeAPIClient('token')
+
+        with mock.patch.object(client.session, 'request',
+                               side_effect=lambda method, url, **kwargs: responses[url.rsplit('/', 1)[-1]]) as request:
+            metrics = client.get_engagement_metrics()
+
+        self.assertEqual(request.call_args_list[1].kwargs['params']['playlistId'], 'UUabc')
+        self.assertEqual(metrics['likes_count'], 4)
+        self.assertEqual(quota_ledger.get_used('youtube'), 3)
+
+    def test_ledger_persists_and_survives_a_cache_flush(self):
+        quota_ledger.spend('youtube', 40)
+        quota_ledger.persist()
+        cache.clear()
+
+        quota_ledger.spend('youtube', 2)
+
+        self.assertEqual(APIQuotaUsage.objects.get(api='youtube').units_used, 40)
+        self.assertEqual(quota_ledger.get_used('youtube'), 42)
+        # 1000 units minus the 100 unit reserve
+        self.assertEqual(quota_ledger.get_remaining('youtube'), 858)
+
+    def test_spending_against_a_warm_counter_skips_the_database(self):
+        quota_ledger.spend('youtube', 1)
+
+        with self.assertNumQueries(0):
+            quota_ledger.spend('youtube', 2)
+
+        self.assertEqual(quota_ledger.get_used('youtube'), 3)
+
+    def test_async_client_records_quota_units(self):
+        # Seeded from the stored row on the first request, read off the event loop
+        APIQuotaUsage.objects.create(date=quota_ledger.quota_day('youtube'), api='youtube', units_used=40)
+        channel = {
+            'id': 'UCabc', 'snippet': {'title': 'Chan', 'description': '', 'thumbnails': {'default': {'url': ''}}},
+            'statistics': {'subscriberCount': '100', 'videoCount': '0', 'viewCount': '0'},
+            'contentDetails': {'relatedPlaylists': {'uploads': 'UUabc'}},
+        }
+        payloads = {'channels': {'items': [channel]}, 'playlistItems': {'items': []}}
+
+        def handler(request):
+            return httpx.Response(200, json=payloads[request.url.path.rsplit('/', 1)[-1]])
+
+        async def fetch():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as http:
+                return await AsyncYouTubeAPIClient('token', http=http).get_engagement_metrics()
+
+        with mock.patch('social_media.quota.logger') as quota_logger:
+            async_to_sync(fetch)()
+
+        self.assertFalse(quota_logger.warning.called)
+        self.assertEqual(quota_ledger.get_used('youtube'), 42)
+        self.assertEqual(cache.get(quota_ledger._cache_key('youtube', quota_ledger.quota_day('youtube'))), 42)
+
+    def test_scheduler_and_sync_stop_before_quota_runs_out(self):
+        accounts = [self.create_account(f'yt{i}', 'youtube') for i in range(3)]
+        quota_ledger.spend('youtube', 894)
+        scheduler = SyncScheduler()
+
+        # 6 units left for scheduled syncs: two accounts now, the third stays planned
+        self.assertEqual(len(scheduler.next_batch()), 2)
+        self.assertEqual(len(cache.get(scheduler.plan_cache_key)['youtube']), 1)
+
+        quota_ledger.spend('youtube', 6)
+        with mock.patch('social_media.sync_service.get_api_client') as get_api_client:
+            results = SocialMediaSyncService()._sync_accounts(accounts)
+
+        self.assertFalse(get_api_client.called)
+        self.assertEqual(results['successful'], 0)
+
+
+@override_settings(YOUTUBE_API_KEY='key', SOCIAL_SYNC_CONCURRENT=False)
+class BatchedChannelStatisticsTest(SyncServiceTestCase):
+
+    def channel_id(self, i):
+        return f"UC{i:022d}"
+
+    def channels_response(self, channel_ids, subscribers=100):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'items': [
+            {'id': channel_id, 'statistics': {'subscriberCount': str(subscribers + i), 'videoCount': '3'}}
+            for i, channel_id in enumerate(channel_ids)
+        ]}
+        return response
+
+    def test_sweep_fetches_handle_only_channels_in_one_request(self):
+        accounts = []
+        for i in range(3):
+            user = User.objects.create_user(username=f'yt{i}', email=f'yt{i}@example.com',
+                                            password='password', user_type='influencer')
+            accounts.append(SocialMediaAccount.objects.create(
+                user=user, platform='youtube', platform_user_id=self.channel_id(i), username=f'yt{i}',
+                encrypted_access_token=SocialMediaAccount.AUTO_CREATED_TOKEN
+            ))
+        response = self.channels_response([self.channel_id(i) for i in range(3)])
+
+        with mock.patch.object(get_session('youtube_api'), 'get', return_value=response) as get:
+            results = SocialMediaSyncService()._sync_accounts(SocialMediaAccount.objects.handle_only())
+
+        self.assertEqual(results['successful'], 3)
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(get.call_args.kwargs['params']['id'].count(','), 2)
+        self.assertEqual(accounts[2].follower_history.get().follower_count, 102)
+
+    def test_legacy_update_batches_channel_ids_fifty_per_request(self):
+        users = [User.objects.create_user(username=f'legacy{i}', email=f'legacy{i}@example.com',
+                                          password='password', user_type='influencer') for i in range(60)]
+        # bulk_create skips the handle-change signal, which would queue a Celery sync
+        InfluencerProfile.objects.bulk_create([
+            InfluencerProfile(user=user, youtube_channel=self.channel_id(i), preferred_platforms=['youtube'])
+            for i, user in enumerate(users)
+        ])
+
+        def list_channels(url, params, timeout):
+            return self.channels_response(params['id'].split(','))
+
+        with mock.patch.object(get_session('youtube_api'), 'get', side_effect=list_channels) as get, \
+                mock.patch.object(SocialMediaService, 'get_youtube_subscribers') as single_lookup:
+            results = update_all_influencer_followers()
+
+        self.assertEqual(get.call_count, 2)
+        self.assertFalse(single_lookup.called)
+        self.assertEqual(len(results), 60)
+        self.assertFalse(any('error' in result for result in results))
+        self.assertEqual(InfluencerProfile.objects.get(youtube_channel=self.channel_id(55)).followers_count, 105)
+
+    def test_legacy_update_records_history_per_youtube_account(self):
+        users = [User.objects.create_user(username=f'history{i}', email=f'history{i}@example.com',
+                                          password='password', user_type='influencer') for i in range(2)]
+        InfluencerProfile.objects.bulk_create([
+            InfluencerProfile(user=user, youtube_channel=self.channel_id(i), preferred_platforms=['youtube'])
+            for i, user in enumerate(users)
+        ])
+        accounts = [SocialMediaAccount.objects.create(
+            user=user, platform='youtube', platform_user_id=self.channel_id(i), username=f'history{i}',
+            encrypted_access_token=SocialMediaAccount.AUTO_CREATED_TOKEN
+        ) for i, user in enumerate(users)]
+        FollowerHistory.objects.create(social_account=accounts[0], follower_count=100, views_count=900,
+                                       sync_source='public')
+
+        def list_channels(url, params, timeout):
+            return self.channels_response(params['id'].split(','))
+
+        with mock.patch.object(get_session('youtube_api'), 'get', side_effect=list_channels):
+            update_all_influencer_followers()
+            update_all_influencer_followers()
+
+        # Unchanged counts extend the latest row; other metrics carry over
+        unchanged = accounts[0].follower_history.get()
+        self.assertEqual(unchanged.sample_count, 3)
+        self.assertEqual(unchanged.views_count, 900)
+        self.assertEqual(accounts[1].follower_history.get().follower_count, 101)
+
+
+@override_settings(SOCIAL_SYNC_CONCURRENT=False, SOCIAL_SYNC_FRESHNESS_SECONDS=0, INSTAGRAM_MEDIA_RECENCY_DAYS=7)
+class InstagramMediaIngestionTest(SyncServiceTestCase):
+
+    def post(self, media_id, days_ago, likes, comments=0):
+        posted_at = timezone.now() - timedelta(days=days_ago)
+        return {'id': media_id, 'like_count': likes, 'comments_count': comments,
+                'timestamp': posted_at.strftime('%Y-%m-%dT%H:%M:%S+0000')}
+
+    def sync(self, account, posts):
+        metrics = dict(fake_metrics(100), media=posts)
+        with mock.patch('social_media.sync_service.get_api_client') as get_api_client:
+            get_api_client.return_value.get_engagement_metrics.return_value = metrics
+            SocialMediaSyncService()._sync_accounts([account])
+        return get_api_client.return_value.get_engagement_metrics.call_args.kwargs
+
+    def test_posts_are_stored_and_later_syncs_fetch_from_the_cursor(self):
+        account = self.create_account('poster')
+
+        first = self.sync(account, [self.post('old', 30, 10), self.post('recent', 2, 20, 5)])
+        self.assertEqual(first, {'media_since': None})
+        self.assertEqual(account.instagram_media.count(), 2)
+
+        second = self.sync(account, [self.post('new', 0, 40), self.post('recent', 2, 30, 5)])
+
+        # Newest stored post is inside the window, so the cursor is the window start
+        window_start = (timezone.now() - timedelta(days=7)).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.assertEqual(second['media_since'], window_start)
+        self.assertEqual(account.instagram_media.count(), 3)
+        self.assertEqual(account.instagram_media.get(media_id='recent').like_count, 30)
+
+        # Engagement covers the untouched old post as well: (10 + 35 + 40) / (100 * 3)
+        latest = account.follower_history.order_by('-recorded_at').first()
+        self.assertEqual(latest.likes_count, 80)
+        self.assertEqual(float(latest.engagement_rate), 28.33)
+
+    def test_incremental_client_read_follows_paging_from_since(self):
+        client = InstagramGraphAPIClient('token')
+        since = timezone.now() - timedelta(days=7)
+        pages = [
+            {'id': '1', 'followers_count': 10},
+            {'data': [self.post('a', 1, 1)], 'paging': {'next': 'https://graph.facebook.com/next'}},
+            {'data': [self.post('b', 3, 2)]},
+        ]
+        responses = [mock.Mock(status_code=200, headers={}, json=mock.Mock(return_value=page)) for page in pages]
+
+        with mock.patch.object(client.session, 'request', side_effect=responses) as request:
+            metrics = client.get_engagement_metrics(media_since=since)
+
+        self.assertEqual(request.call_args_list[1].kwargs['params']['since'], int(since.timestamp()))
+        self.assertEqual(request.call_args_list[2].args[1], 'https://graph.facebook.com/next')
+        self.assertEqual([post['id'] for post in metrics['media']], ['a', 'b'])
+
+
+class ConditionalResponseCacheTest(SyncServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches['api_responses'].clear()
+
+    def channel_payload(self):
+        return {'items': [{
+            'id': 'UCabc', 'snippet': {'title': 'Chan', 'description': '', 'thumbnails': {'default': {'url': ''}}},
+            'statistics': {'subscriberCount': '100', 'videoCount': '2', 'viewCount': '500'},
+        }]}
+
+    def raw_response(self, status, body=b'', etag=None):
+        response = requests.Response()
+        response.status_code = status
+        response._content = body
+        if etag:
+            response.headers['ETag'] = etag
+        response.headers['Content-Type'] = 'application/json'
+        return response
+
+    def test_unchanged_response_is_revalidated_and_served_from_cache(self):
+        body = json.dumps(self.channel_payload()).encode()
+        client = YouTubeAPIClient('token')
+
+        with mock.patch.object(client.session, 'request', side_effect=[
+            self.raw_response(200, body, etag='"v1"'), self.raw_response(304),
+        ]) as request:
+            first = client.get_user_profile()
+            second = client.get_user_profile()
+
+        self.assertNotIn('headers', request.call_args_list[0].kwargs)
+        self.assertEqual(request.call_args_list[1].kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertEqual(first, second)
+        self.assertEqual(second['subscriber_count'], 100)
+
+    def test_entries_are_scoped_to_the_access_token(self):
+        body = json.dumps(self.channel_payload()).encode()
+        with mock.patch.object(get_session('youtube_api'), 'request',
+                               return_value=self.raw_response(200, body, etag='"v1"')) as request:
+            YouTubeAPIClient('token-a').get_user_profile()
+            YouTubeAPIClient('token-b').get_user_profile()
+
+        self.assertNotIn('headers', request.call_args_list[1].kwargs)
+
+    @override_settings(SOCIAL_API_RESPONSE_CACHE={'max_entries': 3})
+    def test_oldest_entries_are_evicted_beyond_max_entries(self):
+        keys = [response_cache.key_for('GET', f'https://example.com/{i}') for i in range(5)]
+
+        for key in keys:
+            response_cache.save(key, 200, {'ETag': '"v1"'}, b'{}')
+        response_cache.save(keys[4], 200, {'ETag': '"v2"'}, b'{}')
+
+        self.assertEqual([response_cache.get(key) is not None for key in keys], [False, False, False, True, True])
+        self.assertEqual(response_cache.get(keys[4])['etag'], '"v2"')
+
+
+class FakePlatformsTest(SyncServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches['api_responses'].clear()
+        self.server = FakePlatformServer(seed=1).start()
+        self.addCleanup(self.server.stop)
+
+    def test_clients_sync_against_fake_servers_and_revalidate(self):
+        with use_fake_platforms(self.server):
+            instagram = InstagramGraphAPIClient('bench-3').get_engagement_metrics()
+            youtube = YouTubeAPIClient('bench-4').get_engagement_metrics()
+            YouTubeAPIClient('bench-4').get_engagement_metrics()
+
+        self.assertEqual(instagram['follower_count'], 1003)
+        self.assertEqual(len(instagram['media']), 25)
+        self.assertEqual(youtube['follower_count'], 2004)
+        self.assertGreater(youtube['views_count'], 0)
+        # The second YouTube sync is answered with 304s from the response cache
+        self.assertEqual(self.server.status_counts, {200: 5, 304: 3})
+        self.assertTrue(InstagramGraphAPIClient.GRAPH_URL.startswith('https://graph.facebook.com'))
+
+    @override_settings(SOCIAL_HTTP={'retries': 0})
+    def test_injected_rate_limits_carry_retry_after(self):
+        self.server.rate_limit_rate = 1.0
+        client = InstagramGraphAPIClient('bench-1')
+        client.session = build_session()
+
+        with use_fake_platforms(self.server):
+            with self.assertRaises(RateLimitError):
+                client.get_user_profile()
+
+        self.assertEqual(self.server.status_counts, {429: 1})
+
+    def test_recorded_responses_replay_offline(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cassette.json')
+            with use_fake_platforms(self.server), record_responses(path):
+                recorded = InstagramGraphAPIClient('bench-7').get_engagement_metrics()
+
+            with open(path) as f:
+                self.assertNotIn('bench-7', f.read())
+            replay_server = FakePlatformServer(cassette=load_cassette(path)).start()
+            self.addCleanup(replay_server.stop)
+
+        caches['api_responses'].clear()
+        with use_fake_platforms(replay_server):
+            replayed = InstagramGraphAPIClient('some-other-token').get_engagement_metrics()
+
+        self.assertEqual(replayed, recorded)
+
+    @override_settings(SOCIAL_SYNC_CONCURRENT=False, SOCIAL_SYNC_FRESHNESS_SECONDS=0)
+    def test_benchmark_sweep_measures_synthetic_accounts(self):
+        accounts = create_bench_accounts(4, ['instagram', 'youtube'])
+        service = BenchmarkSyncService()
+
+        with use_fake_platforms(self.server):
+            first = run_sweep(service, accounts)
+            second = run_sweep(service, accounts)
+
+        self.assertEqual((first['processed'], first['successful'], first['failed']), (4, 4, 0))
+        self.assertEqual(len(service.latencies), 4)
+        self.assertGreater(first['accounts_per_second'], 0)
+        self.assertGreater(first['db_writes'], 0)
+        # Unchanged snapshots are extended rather than inserted again
+        self.assertLess(second['db_writes'], first['db_writes'])
+        self.assertEqual(FollowerHistory.objects.filter(social_account__in=accounts).count(), 4)
+
+
+class InstagramBatchTest(SyncServiceTestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches['api_responses'].clear()
+        self.server = FakePlatformServer().start()
+        self.addCleanup(self.server.stop)
+
+    def batch_reply(self, replies):
+        return mock.Mock(status_code=200, headers={}, json=mock.Mock(return_value=replies))
+
+    def test_batch_chains_media_on_profile_and_maps_errors_per_account(self):
+        ok, expired = InstagramGraphAPIClient('token-a'), InstagramGraphAPIClient('token-b')
+        replies = [
+            {'code': 200, 'body': json.dumps({'id': '1', 'followers_count': 100, 'media_count': 1})},
+            {'code': 200, 'body': json.dumps({'data': [{'id': 'm1', 'like_count': 5, 'comments_count': 1}]})},
+            {'code': 401, 'body': json.dumps({'error': {'message': 'Invalid OAuth access token'}})},
+            None,
+        ]
+
+        with mock.patch.object(ok.session, 'request', return_value=self.batch_reply(replies)) as request:
+            outcomes = InstagramGraphAPIClient.get_engagement_metrics_batch([(ok, None), (expired, None)])
+
+        self.assertEqual(request.call_count, 1)
+        batch = json.loads(request.call_args.kwargs['data']['batch'])
+        self.assertEqual(batch[0]['name'], 'profile0')
+        self.assertFalse(batch[0]['omit_response_on_success'])
+        self.assertTrue(batch[1]['relative_url'].startswith('{result=profile0:$.id}/media?'))
+        self.assertIn('access_token=token-b', batch[2]['relative_url'])
+        self.assertEqual(outcomes[0]['follower_count'], 100)
+        self.assertEqual(outcomes[0]['likes_count'], 5)
+        self.assertIsInstance(outcomes[1], UnauthorizedError)
+
+    @override_settings(SOCIAL_SYNC_INSTAGRAM_BATCH=True, SOCIAL_SYNC_FRESHNESS_SECONDS=0)
+    def test_sweep_packs_instagram_accounts_into_one_batch_call(self):
+        accounts = [self.create_account(f'ig{n}', token=f'bench-{n}') for n in range(3)]
+        accounts.append(self.create_account('yt', platform='youtube', token='bench-9'))
+        service = SocialMediaSyncService()
+
+        plan = SyncPlanner(service).plan(accounts)
+        with use_fake_platforms(self.server):
+            results = service._sync_accounts(accounts)
+
+        self.assertEqual((results['processed'], results['successful'], results['failed']), (4, 4, 0))
+        # One batch for the three Instagram accounts, three calls for the YouTube one
+        self.assertEqual(self.server.requests_served, 4)
+        self.assertEqual(plan['sources']['instagram']['http_calls'], 1)
+        self.assertEqual(InstagramMedia.objects.filter(social_account=accounts[0]).count(), 25)
+        self.assertEqual(FollowerHistory.objects.get(social_account=accounts[2]).follower_count, 1002)
+
+    @override_settings(SOCIAL_SYNC_INSTAGRAM_BATCH=True, SOCIAL_SYNC_FRESHNESS_SECONDS=0)
+    def test_failed_batch_falls_back_to_one_sync_per_account(self):
+        accounts = [self.create_account(f'ig{n}', token=f'bench-{n}') for n in range(2)]
+        service = SocialMediaSyncService()
+
+        with use_fake_platforms(self.server), mock.patch.object(
+            InstagramGraphAPIClient, 'get_engagement_metrics_batch', side_effect=APIError('batch timed out')
+        ):
+            results = service._sync_accounts(accounts)
+
+        self.assertEqual((results['processed'], results['successful']), (2, 2))
+        self.assertEqual(self.server.requests_served, 4)
+        self.assertFalse(any(service._is_leased(account) for account in accounts))
@@ -21,6 +21,7 @@ urlpatterns = [
     # Sync endpoints
     path('sync/user/', views.sync_user_accounts, name='sync-user-accounts'),
     path('sync/status/<str:task_id>/', views.sync_status, name='sync-status'),
+    path('sync/jobs/<str:job_id>/', views.sync_job_status, name='sync-job-status'),
     
     # Real-time Analytics endpoints
     path('analytics/company/', analytics_views.get_company_analytics, name='company-analytics'),
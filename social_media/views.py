@@ -3,14 +3,21 @@ Social Media API Views
 Handles social media account connections, OAuth flows, and sync operations
 """
 
+import hmac
+import threading
+import time
 import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseForbidden
+from django.urls import reverse
+from django.views.decorators.http import require_GET
 
 from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes, action
@@ -18,7 +25,6 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.views import APIView
 
-import requests
 from .models import SocialMediaAccount, FollowerHistory, SyncJob, WebhookEvent
 from .serializers import (
     SocialMediaAccountSerializer, 
@@ -29,6 +35,10 @@ from .serializers import (
 from .sync_service import sync_service
 from .tasks import sync_user_social_accounts, sync_single_social_account
 from .api_clients import get_api_client, APIError
+from .metrics import registry as metrics_registry
+from .progress import TERMINAL_STATUSES, get_progress, publish_progress
+from .write_behind import write_behind
+from .http import get_session
 
 # Legacy imports for backward compatibility
 from accounts.models import InfluencerProfile
@@ -207,7 +217,7 @@ class ConnectSocialAccountView(APIView):
             'code': auth_code
         }
         
-        response = requests.post(token_url, data=data, timeout=30)
+        response = get_session('instagram_api').post(token_url, data=data, timeout=30)
         
         if response.status_code != 200:
             raise APIError(f"Failed to exchange Instagram code: {response.text}")
@@ -223,7 +233,7 @@ class ConnectSocialAccountView(APIView):
             'access_token': short_token
         }
         
-        long_response = requests.get(long_token_url, params=params, timeout=30)
+        long_response = get_session('instagram_api').get(long_token_url, params=params, timeout=30)
         
         if long_response.status_code != 200:
             raise APIError(f"Failed to get Instagram long-lived token: {long_response.text}")
@@ -246,7 +256,7 @@ class ConnectSocialAccountView(APIView):
             'redirect_uri': settings.YOUTUBE_REDIRECT_URI
         }
         
-        response = requests.post(token_url, data=data, timeout=30)
+        response = get_session('youtube_api').post(token_url, data=data, timeout=30)
         
         if response.status_code != 200:
             raise APIError(f"Failed to exchange YouTube code: {response.text}")
@@ -266,12 +276,23 @@ def sync_user_accounts(request):
     """Trigger sync for all user's social media accounts"""
     user = request.user
     
+    # Create the job up front so the client can poll its progress right away
+    sync_job = SyncJob.objects.create(
+        job_id=str(uuid.uuid4()),
+        job_type='user_sync',
+        user=user,
+        status='pending'
+    )
+    publish_progress(sync_job)
+    
     # Trigger async sync task
-    task = sync_user_social_accounts.delay(user.id)
+    task = sync_user_social_accounts.delay(user.id, job_id=sync_job.job_id)
     
     return Response({
         'message': 'User account sync started',
         'task_id': task.id,
+        'job_id': sync_job.job_id,
+        'progress_url': request.build_absolute_uri(reverse('sync-job-status', args=[sync_job.job_id])),
         'user_id': user.id
     })
 
@@ -291,6 +312,30 @@ def sync_status(request, task_id):
     })
 
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def sync_job_status(request, job_id):
+    """
+    Get the latest progress snapshot of a sync job
+    
+    Running syncs publish progress to the shared cache, so clients can poll
+    this endpoint every SOCIAL_SYNC_PROGRESS_INTERVAL seconds without
+    holding a worker open or touching the Celery result backend.
+    """
+    try:
+        sync_job = SyncJob.objects.get(job_id=job_id)
+    except SyncJob.DoesNotExist:
+        return Response({'error': 'Sync job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    # Users follow their own jobs; system-wide sweeps are visible to staff only
+    if sync_job.user_id != request.user.id and not request.user.is_staff:
+        return Response({'error': 'Sync job not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    # Nothing published (yet or any more): publish from the job row
+    payload = get_progress(sync_job.job_id) or publish_progress(sync_job)
+    return Response({**payload, 'done': payload['status'] in TERMINAL_STATUSES}, headers={'Cache-Control': 'no-cache'})
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def follower_stats(request):
@@ -313,7 +358,7 @@ def follower_stats(request):
             platform_stats[account.platform] = {
                 'followers': latest_history.follower_count,
                 'engagement_rate': float(latest_history.engagement_rate),
-                'last_updated': latest_history.recorded_at
+                'last_updated': latest_history.last_confirmed_at
             }
     
     avg_engagement = total_engagement / account_count if account_count > 0 else 0
@@ -352,16 +397,19 @@ class WebhookView(APIView):
             if not self._verify_webhook_signature(request, platform):
                 return Response({'error': 'Invalid signature'}, status=status.HTTP_401_UNAUTHORIZED)
             
-            # Store webhook event
-            webhook_event = WebhookEvent.objects.create(
+            # Store webhook event (batched by the write-behind queue when opted in)
+            webhook_event = WebhookEvent(
                 platform=platform,
                 event_type=self._determine_event_type(request.data, platform),
                 platform_user_id=self._extract_user_id(request.data, platform),
                 raw_data=request.data
             )
             
-            # Process webhook asynchronously
-            self._process_webhook_async(webhook_event)
+            # Process webhook asynchronously, once the event row exists
+            write_behind.create(
+                webhook_event, opt_in='WRITE_BEHIND_WEBHOOK_EVENTS',
+                on_written=lambda: self._process_webhook_async(webhook_event)
+            )
             
             return Response({'status': 'received'})
         
@@ -482,6 +530,42 @@ def lookup_youtube_channel(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+# Lookups a bulk request may have in flight at once
+BULK_LOOKUP_CONCURRENCY = 3
+# Seconds between the starts of two lookups, to stay polite to the looked-up platforms
+BULK_LOOKUP_INTERVAL = 0.5
+
+
+def _run_lookups(usernames, lookup):
+    """
+    Run blocking lookups on a bounded thread pool, exceptions returned in place.
+    
+    Lookups overlap their network waits, but are still started at most once
+    per BULK_LOOKUP_INTERVAL, as the sequential loop used to be paced.
+    """
+    pace_lock = threading.Lock()
+    next_start = [time.monotonic()]
+    
+    def paced(username):
+        with pace_lock:
+            wait = next_start[0] - time.monotonic()
+            next_start[0] = max(next_start[0], time.monotonic()) + BULK_LOOKUP_INTERVAL
+        if wait > 0:
+            time.sleep(wait)
+        return lookup(username)
+    
+    with ThreadPoolExecutor(max_workers=BULK_LOOKUP_CONCURRENCY, thread_name_prefix='bulk-lookup') as executor:
+        futures = [executor.submit(paced, username) for username in usernames]
+    
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def bulk_lookup_influencers(request):
@@ -504,36 +588,32 @@ def bulk_lookup_influencers(request):
             'error': 'Maximum 10 usernames allowed per request'
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    def lookup(username):
+        if platform == 'instagram':
+            return public_lookup_service.lookup_instagram_user(username, method)
+        elif platform == 'youtube':
+            return public_lookup_service.lookup_youtube_channel(username)
+        return None
+    
     results = []
     
-    for username in usernames:
-        try:
-            if platform == 'instagram':
-                user_data = public_lookup_service.lookup_instagram_user(username, method)
-            elif platform == 'youtube':
-                user_data = public_lookup_service.lookup_youtube_channel(username)
-            else:
-                user_data = None
-            
-            results.append({
-                'username': username,
-                'success': user_data is not None,
-                'data': user_data,
-                'platform': platform
-            })
-            
-            # Add delay between requests to be respectful
-            import time
-            time.sleep(0.5)
-            
-        except Exception as e:
-            logger.error(f"Bulk lookup failed for {username}: {e}")
+    for username, user_data in zip(usernames, _run_lookups(usernames, lookup)):
+        if isinstance(user_data, Exception):
+            logger.error(f"Bulk lookup failed for {username}: {user_data}")
             results.append({
                 'username': username,
                 'success': False,
-                'error': str(e),
+                'error': str(user_data),
                 'platform': platform
             })
+            continue
+        
+        results.append({
+            'username': username,
+            'success': user_data is not None,
+            'data': user_data,
+            'platform': platform
+        })
     
     return Response({
         'results': results,
@@ -602,7 +682,7 @@ def search_influencers(request):
                 'profile_picture_url': account.profile_picture_url,
                 'category': user_profile.category if user_profile else None,
                 'rate_per_post': float(user_profile.rate_per_post) if user_profile else None,
-                'last_updated': latest_history.recorded_at if latest_history else None,
+                'last_updated': latest_history.last_confirmed_at if latest_history else None,
                 'is_connected': True
             })
         
@@ -724,4 +804,19 @@ def update_followers_sync(request):
 
 
 # Alias for backward compatibility
-get_follower_stats = follower_stats
\ No newline at end of file
+get_follower_stats = follower_stats
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus scrape endpoint for the sync, lookup and request metrics
+    Scrapers authenticate with METRICS_AUTH_TOKEN (Bearer); logged-in staff may also view it
+    """
+    token = getattr(settings, 'METRICS_AUTH_TOKEN', '')
+    provided = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+    token_valid = bool(token) and hmac.compare_digest(provided.encode(), token.encode())
+    if not token_valid and not request.user.is_staff:
+        return HttpResponseForbidden('Invalid metrics token')
+    
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+Write-Behind Queue
+Batches high-volume, non-interactive inserts through a single writer thread
+"""
+
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional
+
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+write_behind_rows_total = registry.counter(
+    'write_behind_rows_total',
+    'Rows handed to the write-behind queue, by how they were written',
+    labels=('model', 'result'),
+)
+
+
+class WriteBehindWriter:
+    """
+    Process-local queue of unsaved model instances drained by one writer thread.
+
+    Callers hand over rows with create()/bulk_create() and return at once;
+    the writer commits everything queued within WRITE_BEHIND_FLUSH_SECONDS
+    (or up to WRITE_BEHIND_BATCH_SIZE rows) in one transaction, so SQLite
+    sees a few large write transactions instead of many competing small
+    ones. Rows are only durable once written, and a batch that keeps failing
+    is dropped, so by default only follower history snapshots, which the
+    next sync records again, go through it. Webhook events and approval
+    audit logs opt in with their own setting (opt_in) on top of
+    WRITE_BEHIND_ENABLED, accepting that a crash loses what is still
+    queued. Work that needs the saved row, such as processing a webhook
+    event, is passed as on_written and runs once the row is inserted.
+
+    When disabled, not opted in, or when the queue is full, rows are
+    written synchronously and on_written runs right away.
+    """
+
+    # Attempts per batch while SQLite reports "database is locked"
+    MAX_ATTEMPTS = 5
+    RETRY_DELAY = 0.2
+
+    def __init__(self):
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return getattr(settings, 'WRITE_BEHIND_ENABLED', False)
+
+    @property
+    def batch_size(self) -> int:
+        return getattr(settings, 'WRITE_BEHIND_BATCH_SIZE', 500)
+
+    @property
+    def flush_seconds(self) -> float:
+        return getattr(settings, 'WRITE_BEHIND_FLUSH_SECONDS', 1.0)
+
+    def queues(self, opt_in: Optional[str] = None) -> bool:
+        """Whether rows are queued, given the setting that opts their kind in (if any)"""
+        return self.enabled and (opt_in is None or getattr(settings, opt_in, False))
+
+    def create(self, instance, opt_in: Optional[str] = None, on_written: Optional[Callable] = None):
+        """Queue one unsaved instance for insertion"""
+        self.bulk_create([instance], opt_in=opt_in, on_written=on_written)
+
+    def bulk_create(self, instances: Iterable, opt_in: Optional[str] = None,
+                    on_written: Optional[Callable] = None):
+        """Queue unsaved instances; they are inserted together in a later batch"""
+        instances = list(instances)
+        if not instances:
+            return
+
+        if not self.queues(opt_in):
+            self._write(instances)
+            self._count(instances, 'direct')
+            if on_written is not None:
+                on_written()
+            return
+
+        try:
+            self._ensure_started().put_nowait((instances, on_written))
+        except queue.Full:
+            # Back-pressure: the caller pays for the write rather than losing rows
+            logger.warning(f"Write-behind queue full, writing {len(instances)} rows synchronously")
+            self._write(instances)
+            self._count(instances, 'overflow')
+            if on_written is not None:
+                on_written()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything queued so far is written; False on timeout"""
+        if self._queue is None or self._pid != os.getpid():
+            return True
+
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                logger.warning(f"Write-behind flush timed out with {self._queue.qsize()} batches queued")
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _ensure_started(self) -> queue.Queue:
+        """Start the writer thread, again in each forked worker process"""
+        with self._lock:
+            if self._pid != os.getpid() or self._thread is None or not self._thread.is_alive():
+                self._queue = queue.Queue(maxsize=getattr(settings, 'WRITE_BEHIND_MAX_QUEUE', 10000))
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name='write-behind', daemon=True
+                )
+                self._pid = os.getpid()
+                self._thread.start()
+        return self._queue
+
+    def _run(self, pending: queue.Queue):
+        while True:
+            try:
+                self._drain_once(pending)
+            finally:
+                # The writer thread owns its own connection; do not hold it between batches
+                connections.close_all()
+
+    def _drain_once(self, pending: queue.Queue) -> int:
+        """Collect one batch from the queue and write it; returns the number of rows"""
+        batches = [pending.get()]
+        rows = len(batches[0][0])
+        deadline = time.monotonic() + self.flush_seconds
+
+        # Keep collecting until the batch is full or the flush interval is up
+        while rows < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batches.append(pending.get(timeout=remaining))
+            except queue.Empty:
+                break
+            rows += len(batches[-1][0])
+
+        instances = [instance for batch, _ in batches for instance in batch]
+        try:
+            self._write(instances)
+            self._count(instances, 'written')
+            for _, on_written in batches:
+                if on_written is not None:
+                    self._run_callback(on_written)
+        except Exception as e:
+            logger.error(f"Write-behind batch of {len(instances)} rows failed, dropping it: {e}")
+            self._count(instances, 'dropped')
+        finally:
+            for _ in batches:
+                pending.task_done()
+        return len(instances)
+
+    def _run_callback(self, on_written: Callable):
+        try:
+            on_written()
+        except Exception as e:
+            logger.error(f"Write-behind callback failed after its rows were written: {e}")
+
+    def _write(self, instances: List):
+        """Insert instances grouped by model in one transaction, retrying lock timeouts"""
+        by_model = OrderedDict()
+        for instance in instances:
+            by_model.setdefault(type(instance), []).append(instance)
+
+        for attempt in range(1, self.MAX_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    for model, rows in by_model.items():
+                        model.objects.bulk_create(rows, batch_size=self.batch_size)
+                return
+            except OperationalError as e:
+                if attempt == self.MAX_ATTEMPTS:
+                    raise
+                logger.warning(f"Write-behind batch hit {e}, retrying (attempt {attempt})")
+                time.sleep(self.RETRY_DELAY * 2 ** (attempt - 1))
+
+    def _count(self, instances: List, result: str):
+        for model in {type(instance) for instance in instances}:
+            write_behind_rows_total.inc(
+                sum(1 for instance in instances if type(instance) is model),
+                model=model._meta.label, result=result
+            )
+
+
+# Global writer instance
+write_behind = WriteBehindWriter()
+
+
+@atexit.register
+def _flush_on_exit():
+    write_behind.flush()
+
+
+@worker_process_shutdown.connect
+def _flush_on_worker_shutdown(**kwargs):
+    # Prefork children leave through os._exit, which skips atexit handlers
+    write_behind.flush()